@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.analytics'  # <--- CHANGED THIS
\ No newline at end of file
+    name = 'apps.analytics'  # <--- CHANGED THIS
+
+    def ready(self):
+        import apps.analytics.signals # Keep the daily activity rollups in step with RFQs and bids
@@ -1,54 +1,59 @@
-import json  # <--- NEW IMPORT
-from django.db.models import Sum, Count
-from apps.rfqs.models import RFQ, Shipment, Bid
+from django.utils import timezone
+from django.utils.timesince import timesince
+from .kpis import latest_snapshot
 
 def dashboard_callback(request, context):
     """
     Injects KPI data and Charts into the Unfold Admin Dashboard.
+    Everything comes from the latest KPI snapshot (kpis.py): one indexed read, whatever the size of the Bid table.
     """
-    # 1. Calculate KPI Data
-    total_rfqs = RFQ.objects.count()
-    active_shipments = Shipment.objects.filter(rfq__status='OPEN').count()
-    total_spend = Bid.objects.filter(is_winner=True).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # 2. Prepare Chart Data (Bids per Vendor)
-    vendor_stats = Bid.objects.values('vendor__username').annotate(bid_count=Count('id')).order_by('-bid_count')[:5]
-    
-    chart_data = {
-        "labels": [v['vendor__username'] for v in vendor_stats],
-        "datasets": [
-            {
-                "label": "Bids Placed",
-                "data": [v['bid_count'] for v in vendor_stats],
-                "backgroundColor": "#9333ea", 
-            }
-        ]
+    snapshot = latest_snapshot()
+    kpis = snapshot.data if snapshot else {}
+
+    def metric(key, template="{:,}"):
+        # Nothing to show until the first snapshot lands (it is being computed in the background)
+        return template.format(kpis[key]) if key in kpis else "—"
+
+    # 1. KPI cards: headline row, then the last 30 days
+    kpi_rows = [
+        [
+            {"title": "Total RFQs", "metric": metric("total_rfqs"), "footer": f"{metric('open_rfqs')} open, {metric('closed_rfqs')} closed", "icon": "inventory_2"},
+            {"title": "Active Shipments", "metric": metric("active_shipments"), "footer": "Currently bidding", "icon": "local_shipping"},
+            {"title": "Total Spend", "metric": metric("total_spend", "${:,.2f}"), "footer": "Awarded Bids", "icon": "attach_money"},
+        ],
+        [
+            {"title": "Bids Placed", "metric": metric("bids_30d"), "footer": f"Last 30 days ({metric('total_bids')} all time)", "icon": "gavel"},
+            {"title": "Awards", "metric": metric("awards_30d"), "footer": "Last 30 days", "icon": "emoji_events"},
+            {"title": "Vendors", "metric": metric("vendors"), "footer": "Registered carriers", "icon": "groups"},
+        ],
+    ]
+
+    # 2. Prepare Chart Data (Chart.js datasets)
+    top_vendors = kpis.get("top_vendors", [])
+    spend_by_month = kpis.get("spend_by_month", [])
+    top_lanes = kpis.get("top_lanes", [])
+    vendor_chart = {
+        "labels": [v['name'] for v in top_vendors],
+        "datasets": [{"label": "Bids Placed", "data": [v['bids'] for v in top_vendors], "backgroundColor": "#9333ea"}],
+    }
+    spend_chart = {
+        "labels": [m['month'] for m in spend_by_month],
+        "datasets": [{"label": "Awarded Spend ($)", "data": [m['spend'] for m in spend_by_month],
+                      "borderColor": "#ef7d00", "backgroundColor": "rgba(239, 125, 0, 0.15)", "fill": True}],
+    }
+    lane_chart = {
+        "labels": [lane['lane'] for lane in top_lanes],
+        "datasets": [{"label": "Bids", "data": [lane['bids'] for lane in top_lanes], "backgroundColor": "#0ea5e9"}],
     }
 
-    # 3. Update Context
+    # 3. Update Context (dicts: the template serializes them with json_script)
     context.update({
-        "kpi": [
-            {
-                "title": "Total RFQs",
-                "metric": total_rfqs,
-                "footer": "All time",
-                "icon": "inventory_2",
-            },
-            {
-                "title": "Active Shipments",
-                "metric": active_shipments,
-                "footer": "Currently bidding",
-                "icon": "local_shipping",
-            },
-            {
-                "title": "Total Spend",
-                "metric": f"${total_spend:,.2f}",
-                "footer": "Awarded Bids",
-                "icon": "attach_money",
-            },
-        ],
-        # USE JSON DUMPS HERE - Safer and cleaner
-        "vendor_chart": json.dumps(chart_data),
+        "kpi_rows": kpi_rows,
+        "vendor_chart": vendor_chart,
+        "spend_chart": spend_chart,
+        "lane_chart": lane_chart,
+        "kpi_taken_at": snapshot.taken_at if snapshot else None,
+        "kpi_age": timesince(snapshot.taken_at, timezone.now()) if snapshot else None,
     })
 
-    return context
\ No newline at end of file
+    return context
@@ -0,0 +1,112 @@
+"""
+Platform-wide KPIs for the Unfold admin dashboard, materialized into KPISnapshot rows.
+
+Page loads only read the newest snapshot (one indexed query). Snapshots are taken by
+`manage.py refresh_admin_kpis` (cron, or `--every N` as a long-running process), and as a
+fallback the dashboard kicks off a single background refresh when the newest one is older than
+ADMIN_KPI_REFRESH_SECONDS. Spend and bid volumes come from the daily rollups and lane counts from
+the denormalized Shipment.bid_count, so a refresh never scans the Bid table either.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from apps.rfqs.models import RFQ, Shipment
+from .models import KPISnapshot, OrgDailyActivity, VendorDailyActivity
+
+User = get_user_model()
+
+SPEND_MONTHS = 12
+TOP_N = 5
+_REFRESH_LOCK = 'admin_kpis:refreshing'
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='admin-kpis')
+
+
+def compute_kpis():
+    """Every figure on the admin dashboard, as JSON-ready values."""
+    today = timezone.localdate()
+    month_ago = today - timedelta(days=29)
+    months_back = today.year * 12 + today.month - SPEND_MONTHS
+    first_month = date(months_back // 12, months_back % 12 + 1, 1)
+
+    rfqs = RFQ.objects.aggregate(
+        total=Count('id'),
+        open=Count('id', filter=Q(status=RFQ.Status.OPEN)),
+        closed=Count('id', filter=Q(status=RFQ.Status.CLOSED)),
+    )
+    activity = OrgDailyActivity.objects.aggregate(
+        spend=Sum('awarded_spend'),
+        bids=Sum('bids_received'),
+        bids_30d=Sum('bids_received', filter=Q(day__gte=month_ago)),
+        awards_30d=Sum('bids_awarded', filter=Q(day__gte=month_ago)),
+    )
+    spend_by_month = dict(
+        OrgDailyActivity.objects.filter(day__gte=first_month).order_by()
+        .values_list(TruncMonth('day')).annotate(Sum('awarded_spend'))
+    )
+    months, month = [], first_month
+    while month <= today:
+        months.append(month)
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    top_vendors = (
+        VendorDailyActivity.objects.order_by().values(name=F('vendor__username'))
+        .annotate(bids=Sum('bids_submitted')).order_by('-bids')[:TOP_N]
+    )
+    top_lanes = (
+        Shipment.objects.order_by().values('origin_port', 'destination_port')
+        .annotate(bids=Sum('bid_count'), rfqs=Count('rfq', distinct=True)).order_by('-bids')[:TOP_N]
+    )
+    return {
+        "total_rfqs": rfqs['total'],
+        "open_rfqs": rfqs['open'],
+        "closed_rfqs": rfqs['closed'],
+        "active_shipments": Shipment.objects.filter(rfq__status=RFQ.Status.OPEN).count(),
+        "vendors": User.objects.filter(role='VENDOR').count(),
+        "total_bids": activity['bids'] or 0,
+        "total_spend": float(activity['spend'] or 0),
+        "bids_30d": activity['bids_30d'] or 0,
+        "awards_30d": activity['awards_30d'] or 0,
+        "spend_by_month": [
+            {"month": month.strftime("%b %Y"), "spend": float(spend_by_month.get(month) or 0)} for month in months
+        ],
+        "top_vendors": [{"name": row['name'], "bids": row['bids']} for row in top_vendors],
+        "top_lanes": [
+            {"lane": f"{row['origin_port']} → {row['destination_port']}", "bids": row['bids'], "rfqs": row['rfqs']}
+            for row in top_lanes
+        ],
+    }
+
+
+def refresh_snapshot():
+    """Compute the KPIs into a new snapshot and drop the older ones."""
+    started = time.perf_counter()
+    data = compute_kpis()
+    with transaction.atomic():
+        snapshot = KPISnapshot.objects.create(data=data, duration_ms=int((time.perf_counter() - started) * 1000))
+        KPISnapshot.objects.filter(taken_at__lt=snapshot.taken_at).delete()
+    return snapshot
+
+
+def _refresh_in_background():
+    try:
+        refresh_snapshot()
+    finally:
+        cache.delete(_REFRESH_LOCK)
+        # Pool threads outlive requests; don't leave their connections open
+        connections.close_all()
+
+
+def latest_snapshot():
+    """The newest snapshot (or None), scheduling one background refresh when it is missing or stale."""
+    snapshot = KPISnapshot.objects.order_by('-taken_at').first()
+    stale = snapshot is None or timezone.now() - snapshot.taken_at >= timedelta(seconds=settings.ADMIN_KPI_REFRESH_SECONDS)
+    if stale and cache.add(_REFRESH_LOCK, 1, settings.ADMIN_KPI_REFRESH_SECONDS):
+        _refresher.submit(_refresh_in_background)
+    return snapshot
@@ -0,0 +1,30 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from apps.analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = ("Recompute the daily vendor/org activity rollups from the RFQ and Bid tables. "
+            "Run once after deploying them (backfill), or over a recent window to repair drift.")
+
+    def add_arguments(self, parser):
+        window = parser.add_mutually_exclusive_group()
+        window.add_argument('--since', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                            help="Only rebuild days from this local date on. Defaults to all history.")
+        window.add_argument('--days', type=int, help="Only rebuild the last N local days (today included).")
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if options['days'] is not None:
+            if options['days'] < 1:
+                raise CommandError("--days must be at least 1.")
+            since = timezone.localdate() - datetime.timedelta(days=options['days'] - 1)
+
+        # Delete + re-insert in one transaction: charts never see the window half rebuilt
+        with transaction.atomic():
+            vendor_rows, org_rows = rebuild(since)
+
+        scope = f"since {since}" if since else "for all history"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {vendor_rows} vendor and {org_rows} org daily rows {scope}."))
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from apps.analytics.kpis import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = ("Recompute the admin dashboard KPIs into a new snapshot. Run from cron, "
+            "or keep it running with --every to refresh on an interval.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, metavar='SECONDS',
+                            help="Keep running and take a snapshot every SECONDS.")
+
+    def handle(self, *args, **options):
+        every = options['every']
+        if every is not None and every < 1:
+            raise CommandError("--every must be at least 1 second.")
+
+        while True:
+            close_old_connections()
+            snapshot = refresh_snapshot()
+            self.stdout.write(f"KPI snapshot taken in {snapshot.duration_ms} ms.")
+            if every is None:
+                return
+            time.sleep(every)
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rfqs_created', models.PositiveIntegerField(default=0)),
+                ('rfqs_closed', models.PositiveIntegerField(default=0)),
+                ('bids_received', models.PositiveIntegerField(default=0)),
+                ('bids_awarded', models.PositiveIntegerField(default=0)),
+                ('awarded_spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_tendering', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Org daily activity',
+                'constraints': [models.UniqueConstraint(fields=('org', 'day'), name='org_daily_activity_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VendorDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bids_submitted', models.PositiveIntegerField(default=0)),
+                ('bids_won', models.PositiveIntegerField(default=0)),
+                ('awarded_spend', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_bidding', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Vendor daily activity',
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'day'), name='vendor_daily_activity_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KPISnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('duration_ms', models.PositiveIntegerField(default=0, help_text='How long the refresh took')),
+                ('data', models.JSONField(default=dict)),
+            ],
+            options={
+                'get_latest_by': 'taken_at',
+            },
+        ),
+    ]
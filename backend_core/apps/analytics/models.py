@@ -1,3 +1,65 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class VendorDailyActivity(models.Model):
+    """
+    One vendor's bidding on one local day, maintained by rollups.py.
+    Bids count on the day they were placed, wins and their spend on the day they were awarded.
+    """
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="daily_bidding", on_delete=models.CASCADE)
+    day = models.DateField()
+    bids_submitted = models.PositiveIntegerField(default=0)
+    bids_won = models.PositiveIntegerField(default=0)
+    awarded_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Vendor daily activity"
+        constraints = [
+            # Upsert target; also serves the dashboard's per-vendor day range
+            models.UniqueConstraint(fields=['vendor', 'day'], name='vendor_daily_activity_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id} on {self.day}"
+
+
+class OrgDailyActivity(models.Model):
+    """
+    One shipper's tenders on one local day, maintained by rollups.py.
+    RFQs count on the day they were created and on the day they closed; bids on their lanes on
+    the day the bid was placed, and awards (with their spend) on the day they were made.
+    """
+    org = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="daily_tendering", on_delete=models.CASCADE)
+    day = models.DateField()
+    rfqs_created = models.PositiveIntegerField(default=0)
+    rfqs_closed = models.PositiveIntegerField(default=0)
+    bids_received = models.PositiveIntegerField(default=0)
+    bids_awarded = models.PositiveIntegerField(default=0)
+    awarded_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Org daily activity"
+        constraints = [
+            # Upsert target; also serves the dashboard's per-org day range
+            models.UniqueConstraint(fields=['org', 'day'], name='org_daily_activity_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.org_id} on {self.day}"
+
+
+class KPISnapshot(models.Model):
+    """
+    Platform-wide KPIs for the admin dashboard, computed by kpis.py (periodic refresh, never on page load).
+    The newest row is the one shown; older rows are pruned on each refresh.
+    """
+    taken_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    duration_ms = models.PositiveIntegerField(default=0, help_text="How long the refresh took")
+    data = models.JSONField(default=dict)
+
+    class Meta:
+        get_latest_by = 'taken_at'
+
+    def __str__(self):
+        return f"KPIs at {self.taken_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,230 @@
+"""
+Daily activity rollups behind the dashboard charts (VendorDailyActivity / OrgDailyActivity).
+
+New bids and RFQs are folded into their day's rows with F-expression increments. Writes that
+move counts after the fact (awards, edits, counter-offers, closing/reopening, deletes) recompute
+just the (user, day) rows they touch from the source tables, the same split as
+apps/rfqs/summaries.py. Everything runs inside the writing transaction, so the rollups commit or
+roll back with the rows that changed them. `manage.py rebuild_daily_activity` recomputes whole
+date ranges (initial backfill, repairs).
+
+Days are local dates in the current time zone, like the chart buckets that read them.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from apps.rfqs.models import RFQ, Shipment, Bid
+from .models import VendorDailyActivity, OrgDailyActivity
+
+VENDOR_BID_FIELDS = ['bids_submitted', 'bids_won', 'awarded_spend']
+ORG_BID_FIELDS = ['bids_received', 'bids_awarded', 'awarded_spend']
+ORG_RFQ_FIELDS = ['rfqs_created', 'rfqs_closed']
+
+_ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def day_start(day):
+    """The aware datetime a local day starts at."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _on_days(keys, user_path, moment_path):
+    """Q for rows of each (user_id, day) in `keys` whose `moment_path` falls on that local day."""
+    q = Q()
+    for user_id, day in keys:
+        q |= Q(**{user_path: user_id, f'{moment_path}__gte': day_start(day),
+                  f'{moment_path}__lt': day_start(day + timedelta(days=1))})
+    return q
+
+
+# ----------------------------------------------------
+# SOURCE AGGREGATES
+# ----------------------------------------------------
+def _bid_totals(placed, awarded, user_path, fields):
+    """
+    {(user_id, day): values} per `user_path` and local day: `placed` bids count on the day they were
+    placed, `awarded` ones (wins and spend) on the day they were awarded. `fields` names (count, won, spend).
+    """
+    count, won, spend = fields
+    totals = defaultdict(lambda: dict.fromkeys(fields, 0))
+    for row in placed.order_by().values(user=F(user_path), day=TruncDate('created_at')).annotate(n=Count('id')):
+        totals[row['user'], row['day']][count] = row['n']
+    rows = (
+        awarded.order_by()
+        .values(user=F(user_path), day=TruncDate('awarded_at'))
+        .annotate(n=Count('id'), total=Coalesce(Sum('amount'), _ZERO))
+    )
+    for row in rows:
+        totals[row['user'], row['day']].update({won: row['n'], spend: row['total']})
+    return totals
+
+
+def _rfq_totals(created, closed):
+    """{(owner_id, day): values} counting `created` RFQs on their creation day and `closed` ones on their close day."""
+    totals = defaultdict(lambda: dict.fromkeys(ORG_RFQ_FIELDS, 0))
+    for rfqs, moment, field in ((created, 'created_at', 'rfqs_created'), (closed, 'closed_at', 'rfqs_closed')):
+        rows = rfqs.order_by().values(user=F('created_by'), day=TruncDate(moment)).annotate(n=Count('id'))
+        for row in rows:
+            totals[row['user'], row['day']][field] = row['n']
+    return totals
+
+
+def _closed_rfqs():
+    return RFQ.objects.filter(status=RFQ.Status.CLOSED, closed_at__isnull=False)
+
+
+def _awarded_bids():
+    return Bid.objects.filter(is_winner=True, awarded_at__isnull=False)
+
+
+def _write(model, user_field, rows, fields, create):
+    """Store recomputed `rows`; without `create`, only rows that already exist are updated."""
+    if create:
+        model.objects.bulk_create(
+            [model(**{f'{user_field}_id': user_id, 'day': day, **values}) for (user_id, day), values in rows.items()],
+            update_conflicts=True, unique_fields=[user_field, 'day'], update_fields=fields, batch_size=500,
+        )
+    else:
+        for (user_id, day), values in rows.items():
+            model.objects.filter(**{f'{user_field}_id': user_id, 'day': day}).update(**values)
+
+
+def _increment(model, user_field, deltas):
+    """Add {(user_id, day): Counter(field=n)} to their rows, creating missing rows at zero first."""
+    model.objects.bulk_create([model(**{f'{user_field}_id': user_id, 'day': day}) for user_id, day in deltas],
+                              ignore_conflicts=True)
+    for (user_id, day), changes in deltas.items():
+        model.objects.filter(**{f'{user_field}_id': user_id, 'day': day}).update(
+            **{field: F(field) + n for field, n in changes.items()}
+        )
+
+
+def _owners(bids):
+    """{lane id: RFQ owner id} for the lanes of `bids`, from the loaded lane/RFQ where possible."""
+    owners, missing = {}, set()
+    for bid in bids:
+        shipment = bid.shipment if Bid.shipment.is_cached(bid) else None
+        if shipment is not None and Shipment.rfq.is_cached(shipment):
+            owners[bid.shipment_id] = shipment.rfq.created_by_id
+        else:
+            missing.add(bid.shipment_id)
+    if missing:
+        owners.update(RFQ.objects.filter(shipments__id__in=missing).values_list('shipments__id', 'created_by_id'))
+    return owners
+
+
+# ----------------------------------------------------
+# INCREMENTAL (from signals and the bulk write paths)
+# ----------------------------------------------------
+def add_bids(bids, owner_id=None):
+    """Fold newly created bids into their vendors' and their RFQ owner's day rows."""
+    owners = {bid.shipment_id: owner_id for bid in bids} if owner_id else _owners(bids)
+    vendor_deltas, org_deltas = defaultdict(Counter), defaultdict(Counter)
+    for bid in bids:
+        owner = owners.get(bid.shipment_id)
+        day = timezone.localdate(bid.created_at)
+        vendor_deltas[bid.vendor_id, day]['bids_submitted'] += 1
+        if owner:
+            org_deltas[owner, day]['bids_received'] += 1
+        if bid.is_winner and bid.awarded_at:
+            day, spend = timezone.localdate(bid.awarded_at), Decimal(bid.amount)
+            vendor_deltas[bid.vendor_id, day].update(bids_won=1, awarded_spend=spend)
+            if owner:
+                org_deltas[owner, day].update(bids_awarded=1, awarded_spend=spend)
+    _increment(VendorDailyActivity, 'vendor', vendor_deltas)
+    _increment(OrgDailyActivity, 'org', org_deltas)
+
+
+def add_rfq(rfq):
+    deltas = defaultdict(Counter)
+    deltas[rfq.created_by_id, timezone.localdate(rfq.created_at)]['rfqs_created'] += 1
+    if rfq.status == RFQ.Status.CLOSED and rfq.closed_at:
+        deltas[rfq.created_by_id, timezone.localdate(rfq.closed_at)]['rfqs_closed'] += 1
+    _increment(OrgDailyActivity, 'org', deltas)
+
+
+def _bid_days(bids, user_of):
+    """The (user_id, day) rows `bids` count on: the day each was placed, awarded, and awarded as loaded."""
+    days = set()
+    for bid in bids:
+        user_id = user_of(bid)
+        if user_id is None:
+            continue
+        for moment in (bid.created_at, bid.awarded_at, getattr(bid, '_loaded_awarded_at', None)):
+            if moment:
+                days.add((user_id, timezone.localdate(moment)))
+    return days
+
+
+def _refresh_bid_days(model, user_field, user_path, days, fields, create):
+    totals = _bid_totals(Bid.objects.filter(_on_days(days, user_path, 'created_at')),
+                         _awarded_bids().filter(_on_days(days, user_path, 'awarded_at')), user_path, fields)
+    _write(model, user_field, {key: totals[key] for key in days}, fields, create)
+
+
+def refresh_bids(bids, create=True):
+    """
+    Recompute the vendor and owner day rows of `bids` (instances, possibly already deleted) from the
+    Bid table. Deletes pass create=False: they can only lower counts on rows that already exist.
+    """
+    bids = list(bids)
+    if not bids:
+        return
+    owners = _owners(bids)
+    vendor_days = _bid_days(bids, lambda bid: bid.vendor_id)
+    org_days = _bid_days(bids, lambda bid: owners.get(bid.shipment_id))
+
+    _refresh_bid_days(VendorDailyActivity, 'vendor', 'vendor', vendor_days, VENDOR_BID_FIELDS, create)
+    if org_days:
+        _refresh_bid_days(OrgDailyActivity, 'org', 'shipment__rfq__created_by', org_days, ORG_BID_FIELDS, create)
+
+
+def refresh_rfqs(rfqs, create=True):
+    """
+    Recompute the owner day rows of `rfqs` (instances, possibly already deleted): the day each was
+    created, the day it closed, and the close day it had when loaded (reopened or re-closed since).
+    """
+    days = set()
+    for rfq in rfqs:
+        for moment in (rfq.created_at, rfq.closed_at, getattr(rfq, '_loaded_closed_at', None)):
+            if moment:
+                days.add((rfq.created_by_id, timezone.localdate(moment)))
+    if not days:
+        return
+    totals = _rfq_totals(RFQ.objects.filter(_on_days(days, 'created_by', 'created_at')),
+                         _closed_rfqs().filter(_on_days(days, 'created_by', 'closed_at')))
+    _write(OrgDailyActivity, 'org', {key: totals[key] for key in days}, ORG_RFQ_FIELDS, create)
+
+
+# ----------------------------------------------------
+# BACKFILL (manage.py rebuild_daily_activity)
+# ----------------------------------------------------
+def rebuild(since=None):
+    """Recompute every rollup row from local day `since` on (all history when None). Returns (vendor rows, org rows)."""
+    bids, awarded, created, closed = Bid.objects.all(), _awarded_bids(), RFQ.objects.all(), _closed_rfqs()
+    vendor_rows, org_rows = VendorDailyActivity.objects.all(), OrgDailyActivity.objects.all()
+    if since is not None:
+        start = day_start(since)
+        bids, awarded = bids.filter(created_at__gte=start), awarded.filter(awarded_at__gte=start)
+        created, closed = created.filter(created_at__gte=start), closed.filter(closed_at__gte=start)
+        vendor_rows, org_rows = vendor_rows.filter(day__gte=since), org_rows.filter(day__gte=since)
+
+    vendor = _bid_totals(bids, awarded, 'vendor', VENDOR_BID_FIELDS)
+    org = _rfq_totals(created, closed)
+    for key, values in _bid_totals(bids, awarded, 'shipment__rfq__created_by', ORG_BID_FIELDS).items():
+        org[key].update(values)
+
+    vendor_rows.delete()
+    org_rows.delete()
+    VendorDailyActivity.objects.bulk_create(
+        [VendorDailyActivity(vendor_id=user_id, day=day, **values) for (user_id, day), values in vendor.items()],
+        batch_size=1000,
+    )
+    OrgDailyActivity.objects.bulk_create(
+        [OrgDailyActivity(org_id=user_id, day=day, **values) for (user_id, day), values in org.items()],
+        batch_size=1000,
+    )
+    return len(vendor), len(org)
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.rfqs.models import RFQ, Bid
+from . import rollups
+
+# Saves that touch none of these leave the bid's rollup rows as they are (e.g. contract PDF, file uploads)
+BID_ROLLUP_FIELDS = {'amount', 'is_winner', 'awarded_at', 'shipment', 'vendor'}
+
+
+# ----------------------------------------------------
+# DAILY ROLLUPS
+# Bid.save()/RFQ.save() signals run inside the write's transaction, so rollups commit with the row.
+# Bulk updates skip these: their call sites (awards, batch bids, deadline closes, admin actions)
+# call rollups.py themselves.
+# ----------------------------------------------------
+@receiver(post_save, sender=Bid)
+def bid_rollups_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        rollups.add_bids([instance])
+    elif update_fields is None or BID_ROLLUP_FIELDS & set(update_fields):
+        rollups.refresh_bids([instance])
+    instance._loaded_awarded_at = instance.awarded_at
+
+@receiver(post_delete, sender=Bid)
+def bid_rollups_on_delete(sender, instance, **kwargs):
+    rollups.refresh_bids([instance], create=False)
+
+@receiver(post_save, sender=RFQ)
+def rfq_rollups_on_save(sender, instance, created, **kwargs):
+    if created:
+        rollups.add_rfq(instance)
+    elif not hasattr(instance, '_loaded_closed_at') or instance.closed_at != instance._loaded_closed_at:
+        # Closed, reopened or re-closed: moves the RFQ between close days
+        rollups.refresh_rfqs([instance])
+    instance._loaded_closed_at = instance.closed_at
+
+@receiver(post_delete, sender=RFQ)
+def rfq_rollups_on_delete(sender, instance, **kwargs):
+    rollups.refresh_rfqs([instance], create=False)
@@ -0,0 +1,216 @@
+"""
+Dashboard statistics for the landing page.
+
+Each role's totals come from one conditional-aggregation query (`Count(..., filter=Q(...))`) over
+its own rows. The activity chart is read from the daily rollups (rollups.py): one index range scan
+of at most a year of the user's day rows, summed per day/week/month bucket in the database, so a
+365-day chart costs the same as a 7-day one. Shippers also get their lane breakdown (savings against
+target, container mix, most active vendors, volume and savings per chart bucket) as grouped
+aggregates over every one of their lanes, read from the denormalized Shipment.lowest_bid_amount, so
+the dashboard never has to download the nested RFQ list. Results are cached per user and chart period (see
+apps/rfqs/cache.py for the versioned keys and write invalidation): fresh for
+DASHBOARD_CACHE_SECONDS, then served stale for up to DASHBOARD_STALE_SECONDS more while a single
+background refresh recomputes them.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from apps.rfqs.cache import dashboard_cache_key
+from apps.rfqs.models import RFQ, Shipment, Bid
+from .models import VendorDailyActivity, OrgDailyActivity
+
+User = get_user_model()
+
+# ?range= -> days charted (today included); ?granularity= defaults to the one that keeps the chart readable
+CHART_RANGES = {'7d': 7, '30d': 30, '90d': 90, '180d': 180, '365d': 365}
+DEFAULT_GRANULARITY = {'7d': 'day', '30d': 'day', '90d': 'week', '180d': 'week', '365d': 'month'}
+BUCKETS = {'day': F('day'), 'week': TruncWeek('day'), 'month': TruncMonth('day')}
+TOP_VENDORS = 5
+# Lanes that have a target price and at least one bid are the ones savings can be measured on
+PRICED_LANES = Q(target_price__gt=0, lowest_bid_amount__isnull=False)
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dashboard-refresh')
+
+
+def chart_period(chart_range=None, granularity=None):
+    """Validate the ?range= / ?granularity= pair (both optional); raises ValueError with a message for the client."""
+    chart_range = chart_range or '7d'
+    if chart_range not in CHART_RANGES:
+        raise ValueError(f"range must be one of {', '.join(CHART_RANGES)}.")
+    granularity = granularity or DEFAULT_GRANULARITY[chart_range]
+    if granularity not in BUCKETS:
+        raise ValueError(f"granularity must be one of {', '.join(BUCKETS)}.")
+    return chart_range, granularity
+
+
+def _bucket_starts(first_day, granularity):
+    """Every bucket from the one holding `first_day` up to today's, so empty buckets still get a point."""
+    today = timezone.localdate()
+    if granularity == 'week':
+        current = first_day - timedelta(days=first_day.weekday())
+    elif granularity == 'month':
+        current = first_day.replace(day=1)
+    else:
+        current = first_day
+    while current <= today:
+        yield current
+        if granularity == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if granularity == 'week' else 1)
+
+
+def _label(bucket, chart_range, granularity):
+    if granularity == 'month':
+        return bucket.strftime("%b %Y")
+    if granularity == 'day' and CHART_RANGES[chart_range] <= 7:
+        return bucket.strftime("%a")
+    return bucket.strftime("%d %b")
+
+
+def _chart(rows, chart_range, granularity, series):
+    """
+    Chart points from `rows`, a queryset with a `day` column: `series` maps each point's keys to the
+    columns (or aggregates) to sum. One query, grouped per bucket; money comes back as floats for the
+    charting library.
+    """
+    first_day = timezone.localdate() - timedelta(days=CHART_RANGES[chart_range] - 1)
+    rows = (
+        rows.filter(day__gte=first_day).order_by()
+        .values(bucket=BUCKETS[granularity])
+        .annotate(**{key: Sum(column) if isinstance(column, str) else column for key, column in series.items()})
+    )
+    totals = {row['bucket']: row for row in rows}
+    points = []
+    for bucket in _bucket_starts(first_day, granularity):
+        row = totals.get(bucket, {})
+        point = {"name": _label(bucket, chart_range, granularity), "date": bucket.isoformat()}
+        point.update({key: row.get(key) or 0 for key in series})
+        for key in ('spend', 'savings'):
+            if key in point:
+                point[key] = float(point[key])
+        points.append(point)
+    return points
+
+
+def vendor_count():
+    # Same for every shipper: cached once for everybody rather than per user
+    return cache.get_or_set('dashboard:vendor_count', lambda: User.objects.filter(role='VENDOR').count(),
+                            settings.DASHBOARD_CACHE_SECONDS)
+
+
+def vendor_stats(user, chart_range='7d', granularity='day'):
+    totals = Bid.objects.filter(vendor=user).aggregate(
+        active_bids=Count('id', filter=Q(is_winner=False)),
+        won_bids=Count('id', filter=Q(is_winner=True)),
+    )
+    active_bids, won_bids = totals['active_bids'], totals['won_bids']
+    return {
+        "active_bids": active_bids,
+        "won_bids": won_bids,
+        "pie_data": [
+            {"name": "Won Awards", "value": won_bids if won_bids > 0 else 1}, # Fallback to 1 to render empty ring
+            {"name": "Pending Bids", "value": active_bids if active_bids > 0 else 1}
+        ],
+        "chart_data": _chart(VendorDailyActivity.objects.filter(vendor=user), chart_range, granularity,
+                             {"bids": "bids_submitted", "won": "bids_won", "spend": "awarded_spend"}),
+    }
+
+
+def _lane_savings():
+    """Target price minus the lowest bid, for lanes where the bids came in under target."""
+    return Greatest(F('target_price') - F('lowest_bid_amount'), Value(0),
+                    output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def lane_breakdown(user, chart_range='7d', granularity='day'):
+    """
+    Every lane of `user`'s RFQs, aggregated: savings against target, volume per container type and the
+    most active vendors, plus volume/savings per chart bucket (by the day each RFQ was created).
+    """
+    lanes = Shipment.objects.filter(rfq__created_by=user)
+    containers = list(
+        lanes.order_by().values('container_type').annotate(
+            volume=Sum('volume'),
+            target=Sum('target_price', filter=PRICED_LANES),
+            lowest=Sum('lowest_bid_amount', filter=PRICED_LANES),
+        ).order_by('-volume', 'container_type')
+    )
+    target = sum(row['target'] or 0 for row in containers)
+    lowest = sum(row['lowest'] or 0 for row in containers)
+    vendors = (
+        Bid.objects.filter(shipment__rfq__created_by=user).order_by()
+        .values(name=Coalesce(F('vendor__company_name'), F('vendor__username')))
+        .annotate(submitted=Count('id'), won=Count('id', filter=Q(is_winner=True)))
+        .order_by('-submitted', 'name')[:TOP_VENDORS]
+    )
+    chart = _chart(
+        lanes.annotate(day=TruncDate('rfq__created_at')), chart_range, granularity,
+        {"volume": Sum('volume'), "savings": Sum(_lane_savings(), filter=PRICED_LANES)},
+    )
+    return {
+        "savings_pct": round(float((target - lowest) / target * 100), 1) if target > 0 else 0,
+        "containers": [{"name": row['container_type'], "value": row['volume']} for row in containers],
+        "top_vendors": list(vendors),
+        "chart_data": [{key: point[key] for key in ('date', 'volume', 'savings')} for point in chart],
+    }
+
+
+def org_stats(user, chart_range='7d', granularity='day'):
+    totals = RFQ.objects.filter(created_by=user).aggregate(
+        total_rfqs=Count('id'),
+        # Denormalized per RFQ (apps/rfqs/summaries.py): no join through lanes to the bids table
+        total_bids=Coalesce(Sum('bid_count'), 0),
+        open_rfqs=Count('id', filter=Q(status='OPEN')),
+        closed_rfqs=Count('id', filter=Q(status='CLOSED')),
+        draft_rfqs=Count('id', filter=Q(status='DRAFT')),
+    )
+    open_rfqs, closed_rfqs, draft_rfqs = totals['open_rfqs'], totals['closed_rfqs'], totals['draft_rfqs']
+    return {
+        "total_rfqs": totals['total_rfqs'],
+        "total_bids": totals['total_bids'],
+        "total_users": vendor_count(),
+        "pie_data": [
+            {"name": "Open/Live", "value": open_rfqs if open_rfqs > 0 else 1},
+            {"name": "Closed/Awarded", "value": closed_rfqs if closed_rfqs > 0 else 1},
+            {"name": "Drafts", "value": draft_rfqs if draft_rfqs > 0 else 1},
+        ],
+        "chart_data": _chart(OrgDailyActivity.objects.filter(org=user), chart_range, granularity,
+                             {"rfqs": "rfqs_created", "closed": "rfqs_closed", "bids": "bids_received",
+                              "spend": "awarded_spend"}),
+        "lanes": lane_breakdown(user, chart_range, granularity),
+    }
+
+
+def _compute(user, key, period):
+    data = vendor_stats(user, *period) if user.role == 'VENDOR' else org_stats(user, *period)
+    entry = {"data": data, "fresh_until": time.time() + settings.DASHBOARD_CACHE_SECONDS}
+    cache.set(key, entry, settings.DASHBOARD_CACHE_SECONDS + settings.DASHBOARD_STALE_SECONDS)
+    return data
+
+
+def _refresh_in_background(user, key, period):
+    try:
+        _compute(user, key, period)
+    finally:
+        cache.delete(f"{key}:refreshing")
+        # Pool threads outlive requests; don't leave their connections open
+        connections.close_all()
+
+
+def dashboard_stats(user, chart_range='7d', granularity='day'):
+    period = (chart_range, granularity)
+    key = f"{dashboard_cache_key(user.pk)}:{chart_range}:{granularity}"
+    entry = cache.get(key)
+    if entry is None:
+        return _compute(user, key, period)
+    if time.time() >= entry['fresh_until'] and cache.add(f"{key}:refreshing", 1, settings.DASHBOARD_STALE_SECONDS):
+        # Stale: answer from cache now, and let exactly one refresh run per key
+        _refresher.submit(_refresh_in_background, user, key, period)
+    return entry['data']
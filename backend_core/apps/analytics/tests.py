@@ -1,3 +1,242 @@
+import datetime
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.rfqs.models import RFQ, Shipment, Bid
+from apps.users.models import User
+from .dashboard import dashboard_callback
+from .kpis import refresh_snapshot
+from .models import VendorDailyActivity, OrgDailyActivity
+from .rollups import rebuild
+from .stats import vendor_count
 
-# Create your tests here.
+
+class DashboardStatsTests(TestCase):
+    """
+    Each dashboard branch is one aggregate query for its totals plus one over its daily rollups for the
+    chart (shippers add three grouped queries over their lanes), cached per user and chart period and
+    refreshed by RFQ/Bid writes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = User.objects.create_user('dash_org', password='x', role='ORG')
+        cls.vendor = User.objects.create_user('dash_vendor', password='x', role='VENDOR')
+        deadline = timezone.now() + datetime.timedelta(days=7)
+        cls.rfqs = [
+            RFQ.objects.create(created_by=cls.org, title=f'Tender {status}', status=status, deadline=deadline)
+            for status in ('OPEN', 'OPEN', 'DRAFT', 'CLOSED')
+        ]
+        shipment = Shipment.objects.create(rfq=cls.rfqs[0], origin_port='Shanghai', destination_port='Rotterdam',
+                                           volume=3, target_price=2000)
+        Shipment.objects.create(rfq=cls.rfqs[1], origin_port='Ningbo', destination_port='Hamburg', container_type='20GP',
+                                target_price=1800)
+        for amount, won in ((1500, True), (1600, False), (1700, False)):
+            Bid.objects.create(shipment=shipment, vendor=cls.vendor, amount=amount, transit_time_days=30,
+                               valid_until=datetime.date.today() + datetime.timedelta(days=30), is_winner=won)
+
+    def setUp(self):
+        cache.clear()
+        # Shared across all shippers, cached on its own
+        vendor_count()
+        self.client = APIClient()
+
+    def get_stats(self, user, query=''):
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/v1/analytics/stats/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_org_stats_are_five_queries(self):
+        # Totals, the rollup chart, then the lane breakdown: containers, vendors and its chart
+        with self.assertNumQueries(5):
+            data = self.get_stats(self.org)
+        self.assertEqual((data['total_rfqs'], data['total_bids'], data['total_users']), (4, 3, 1))
+        self.assertEqual([slice['value'] for slice in data['pie_data']], [2, 1, 1])
+        today = timezone.localdate()
+        self.assertEqual(len(data['chart_data']), 7)
+        self.assertEqual(data['chart_data'][-1], {
+            "name": today.strftime("%a"), "date": today.isoformat(), "rfqs": 4, "closed": 1, "bids": 3, "spend": 1500.0,
+        })
+
+    def test_org_lane_breakdown_covers_every_lane(self):
+        lanes = self.get_stats(self.org)['lanes']
+        # Only the lane with bids is measured against its target: (2000 - 1500) / 2000
+        self.assertEqual(lanes['savings_pct'], 25.0)
+        self.assertEqual(lanes['containers'], [{"name": "40HC", "value": 3}, {"name": "20GP", "value": 1}])
+        self.assertEqual(lanes['top_vendors'], [{"name": "dash_vendor", "submitted": 3, "won": 1}])
+        self.assertEqual(lanes['chart_data'][-1], {"date": timezone.localdate().isoformat(), "volume": 4, "savings": 500.0})
+        self.assertEqual(len(lanes['chart_data']), 7)
+
+    def test_vendor_stats_are_two_queries(self):
+        with self.assertNumQueries(2):
+            data = self.get_stats(self.vendor)
+        self.assertEqual((data['active_bids'], data['won_bids']), (2, 1))
+        self.assertEqual(sum(day['bids'] for day in data['chart_data']), 3)
+        self.assertEqual(sum(day['won'] for day in data['chart_data']), 1)
+
+    def test_yearly_chart_costs_the_same_as_weekly(self):
+        with self.assertNumQueries(2):
+            data = self.get_stats(self.vendor, '?range=365d')
+        # Monthly by default: every month of the year, oldest first, ending with the current one
+        months = data['chart_data']
+        self.assertIn(len(months), (12, 13))
+        self.assertEqual(months[-1]['date'], timezone.localdate().replace(day=1).isoformat())
+        self.assertEqual(sum(month['bids'] for month in months), 3)
+        weeks = self.get_stats(self.vendor, '?range=90d&granularity=week')['chart_data']
+        self.assertTrue(all(datetime.date.fromisoformat(week['date']).weekday() == 0 for week in weeks))
+
+    def test_unknown_range_is_rejected(self):
+        self.client.force_authenticate(self.vendor)
+        self.assertEqual(self.client.get('/api/v1/analytics/stats/?range=10y').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/analytics/stats/?granularity=hour').status_code, 400)
+
+    def test_repeat_load_is_served_from_cache(self):
+        self.get_stats(self.org)
+        with self.assertNumQueries(0):
+            self.get_stats(self.org)
+
+    def test_new_rfq_refreshes_the_owners_dashboard(self):
+        self.get_stats(self.org)
+        with self.captureOnCommitCallbacks(execute=True):
+            RFQ.objects.create(created_by=self.org, title='Another', status='DRAFT',
+                               deadline=timezone.now() + datetime.timedelta(days=7))
+        self.assertEqual(self.get_stats(self.org)['total_rfqs'], 5)
+
+    def test_lane_edit_refreshes_the_owners_breakdown(self):
+        self.get_stats(self.org)
+        lane = Shipment.objects.get(container_type='20GP')
+        lane.volume = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            lane.save()
+        self.assertEqual(self.get_stats(self.org)['lanes']['containers'][0], {"name": "20GP", "value": 4})
+
+
+class DailyRollupTests(TestCase):
+    """Incremental rollup maintenance always agrees with a rebuild from the source tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = User.objects.create_user('rollup_org', password='x', role='ORG')
+        cls.vendors = [User.objects.create_user(f'rollup_vendor_{i}', password='x', role='VENDOR') for i in range(2)]
+        cls.rfq = RFQ.objects.create(created_by=cls.org, title='Rollups', status='OPEN',
+                                     deadline=timezone.now() + datetime.timedelta(days=7))
+        cls.lane = Shipment.objects.create(rfq=cls.rfq, origin_port='Shanghai', destination_port='Rotterdam')
+
+    def rows(self):
+        # Deletes leave emptied rows at zero where a rebuild has none; both chart the same
+        return (
+            sorted(VendorDailyActivity.objects.exclude(bids_submitted=0, bids_won=0).values_list(
+                'vendor_id', 'day', 'bids_submitted', 'bids_won', 'awarded_spend'
+            )),
+            sorted(OrgDailyActivity.objects.exclude(rfqs_created=0, rfqs_closed=0, bids_received=0, bids_awarded=0).values_list(
+                'org_id', 'day', 'rfqs_created', 'rfqs_closed', 'bids_received', 'bids_awarded', 'awarded_spend'
+            )),
+        )
+
+    def bid(self, vendor, amount):
+        return Bid.objects.create(shipment=self.lane, vendor=vendor, amount=amount, transit_time_days=30,
+                                  valid_until=datetime.date.today() + datetime.timedelta(days=30))
+
+    def test_writes_keep_rollups_equal_to_a_rebuild(self):
+        first, second = self.bid(self.vendors[0], 1200), self.bid(self.vendors[1], 1100)
+        self.bid(self.vendors[1], 1300).delete()
+        second.is_winner = True
+        second.save(update_fields=['is_winner'])
+        second.amount = 1050 # accepted counter-offer on the winning bid
+        second.save()
+        self.rfq.status = 'CLOSED'
+        self.rfq.save()
+
+        incremental = self.rows()
+        self.assertEqual(incremental[1][0][2:], (1, 1, 2, 1, 1050))
+        rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+        # Reopening moves the RFQ off its close day again
+        self.rfq.status = 'OPEN'
+        self.rfq.save()
+        self.assertIsNone(self.rfq.closed_at)
+        self.assertEqual(self.rows()[1][0][3], 0)
+        first.delete()
+        incremental = self.rows()
+        rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+
+    def test_awards_count_on_the_day_they_are_made(self):
+        placed = self.bid(self.vendors[0], 1200)
+        other = self.bid(self.vendors[1], 1100)
+        last_week = timezone.now() - datetime.timedelta(days=7)
+        Bid.objects.filter(pk__in=[placed.pk, other.pk]).update(created_at=last_week)
+        RFQ.objects.filter(pk=self.rfq.pk).update(created_at=last_week)
+        rebuild()
+
+        client = APIClient()
+        client.force_authenticate(self.org)
+        self.assertEqual(client.post(f'/api/v1/bids/{placed.id}/award/').status_code, 200)
+        today, placed_day = timezone.localdate(), timezone.localdate(last_week)
+        vendor_rows = {(vendor, day): row for vendor, day, *row in self.rows()[0]}
+        self.assertEqual(vendor_rows[self.vendors[0].id, placed_day], [1, 0, 0])
+        self.assertEqual(vendor_rows[self.vendors[0].id, today], [0, 1, 1200])
+        self.assertIsNotNone(Bid.objects.get(pk=placed.pk).awarded_at)
+        incremental = self.rows()
+        rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+        # The whole-RFQ award moves the win (and the spend) to the other vendor, still dated today
+        response = client.post(f'/api/v1/rfqs/{self.rfq.id}/award/', {'strategy': 'lowest'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(Bid.objects.get(pk=placed.pk).awarded_at)
+        org_rows = {day: row for _, day, *row in self.rows()[1]}
+        # rfqs_created, rfqs_closed, bids_received, bids_awarded, awarded_spend
+        self.assertEqual(org_rows[placed_day], [1, 0, 2, 0, 0])
+        self.assertEqual(org_rows[today], [0, 1, 0, 1, 1100])
+        incremental = self.rows()
+        rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+
+class AdminKPISnapshotTests(TestCase):
+    """The admin dashboard reads one snapshot row; computing it is left to the refresh."""
+
+    @classmethod
+    def setUpTestData(cls):
+        org = User.objects.create_user('kpi_org', password='x', role='ORG')
+        vendor = User.objects.create_user('kpi_vendor', password='x', role='VENDOR')
+        rfq = RFQ.objects.create(created_by=org, title='KPIs', status='OPEN',
+                                 deadline=timezone.now() + datetime.timedelta(days=7))
+        lane = Shipment.objects.create(rfq=rfq, origin_port='Shanghai', destination_port='Rotterdam')
+        for amount, won in ((900, True), (950, False)):
+            Bid.objects.create(shipment=lane, vendor=vendor, amount=amount, transit_time_days=30,
+                               valid_until=datetime.date.today() + datetime.timedelta(days=30), is_winner=won)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refresh_materializes_the_kpis(self):
+        data = refresh_snapshot().data
+        self.assertEqual((data['total_rfqs'], data['active_shipments'], data['total_bids'], data['vendors']), (1, 1, 2, 1))
+        self.assertEqual(data['total_spend'], 900.0)
+        self.assertEqual(len(data['spend_by_month']), 12)
+        self.assertEqual(data['spend_by_month'][-1]['spend'], 900.0)
+        self.assertEqual(data['top_vendors'], [{"name": "kpi_vendor", "bids": 2}])
+        self.assertEqual(data['top_lanes'], [{"lane": "Shanghai → Rotterdam", "bids": 2, "rfqs": 1}])
+
+    def test_dashboard_is_one_query_on_a_fresh_snapshot(self):
+        refresh_snapshot()
+        with mock.patch('apps.analytics.kpis._refresher') as refresher, self.assertNumQueries(1):
+            context = dashboard_callback(None, {})
+        refresher.submit.assert_not_called()
+        self.assertEqual(context['kpi_rows'][0][2]['metric'], "$900.00")
+        self.assertEqual(context['vendor_chart']['labels'], ["kpi_vendor"])
+
+    def test_missing_snapshot_is_computed_in_the_background_once(self):
+        with mock.patch('apps.analytics.kpis._refresher') as refresher:
+            context = dashboard_callback(None, {})
+            dashboard_callback(None, {})
+        refresher.submit.assert_called_once()
+        self.assertIsNone(context['kpi_taken_at'])
+        self.assertEqual(context['kpi_rows'][0][0]['metric'], "—")
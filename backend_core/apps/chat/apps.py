@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.chat'  # <--- CHANGED THIS
\ No newline at end of file
+    name = 'apps.chat'  # <--- CHANGED THIS
+
+    def ready(self):
+        import apps.chat.signals # Push new messages to the chat sockets
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Q
+from apps.rfqs.broadcast import broadcaster
+from apps.rfqs.models import Bid
+from .models import ChatMessage
+from .signals import chat_group
+
+
+@database_sync_to_async
+def is_party(user, bid_id):
+    # Same people the REST endpoints show the thread to: the bidding vendor and the RFQ's owner
+    return Bid.objects.filter(pk=bid_id).filter(Q(vendor=user) | Q(shipment__rfq__created_by=user)).exists()
+
+
+@database_sync_to_async
+def mark_read(user, bid_id, up_to):
+    return (
+        ChatMessage.objects.filter(bid_id=bid_id, pk__lte=up_to, is_read=False)
+        .exclude(sender=user)
+        .update(is_read=True)
+    )
+
+
+class BidChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live negotiation thread for one bid; messages are still posted over REST.
+    Client connects to: ws://localhost:8000/ws/chat/bid/<bid_id>/?token=<access JWT>
+    Client sends:       {"type": "typing"} | {"type": "read", "up_to": <message id>}
+    Server sends:       {"type": "message", "data": {...same as the REST API...}}
+                        {"type": "typing", "user": 7, "name": "acme"}
+                        {"type": "read", "user": 7, "up_to": 42}  (the other party has seen messages up to 42)
+    """
+    TYPING_INTERVAL = 1.0 # seconds; faster keystroke pings are dropped
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.bid_id = int(self.scope['url_route']['kwargs']['bid_id'])
+        self.group_name = chat_group(self.bid_id)
+        self.last_typing = 0.0
+        if not self.user or not self.user.is_authenticated or not await is_party(self.user, self.bid_id):
+            await self.close()
+            return
+        broadcaster.attach(asyncio.get_running_loop())
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        try:
+            return await super().decode_json(text_data)
+        except ValueError:
+            return None
+
+    async def receive_json(self, content, **kwargs):
+        kind = content.get('type') if isinstance(content, dict) else None
+        if kind == 'typing':
+            now = time.monotonic()
+            if now - self.last_typing >= self.TYPING_INTERVAL:
+                self.last_typing = now
+                await self.channel_layer.group_send(self.group_name, {
+                    'type': 'chat.typing', 'user': self.user.id, 'name': self.user.username, 'origin': self.channel_name,
+                })
+        elif kind == 'read' and isinstance(content.get('up_to'), int):
+            await mark_read(self.user, self.bid_id, content['up_to'])
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.read', 'user': self.user.id, 'up_to': content['up_to'],
+            })
+        else:
+            await self.send_json({'type': 'error', 'error': 'Send {"type": "typing"} or {"type": "read", "up_to": <id>}.'})
+
+    # Group events
+    async def chat_message(self, event):
+        data = dict(event['message'], is_mine=event['message']['sender'] == self.user.id)
+        await self.send_json({'type': 'message', 'data': data})
+
+    async def chat_typing(self, event):
+        if event['origin'] != self.channel_name:
+            await self.send_json({'type': 'typing', 'user': event['user'], 'name': event['name']})
+
+    async def chat_read(self, event):
+        # Only the other party cares that their messages were seen
+        if event['user'] != self.user.id:
+            await self.send_json({'type': 'read', 'user': event['user'], 'up_to': event['up_to']})
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        ('rfqs', '0011_procurement_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['bid', 'created_at'], name='chat_bid_created_idx'),
+        ),
+    ]
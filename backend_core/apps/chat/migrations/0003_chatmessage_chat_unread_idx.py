@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_chatmessage_chat_bid_created_idx'),
+        ('rfqs', '0014_bid_contract_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['bid', 'sender'], name='chat_unread_idx'),
+        ),
+    ]
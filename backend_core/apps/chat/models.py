@@ -15,6 +15,12 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at'] # Oldest messages at the top, newest at the bottom
+        indexes = [
+            # A bid's thread in display order
+            models.Index(fields=['bid', 'created_at'], name='chat_bid_created_idx'),
+            # Unread counters only ever look at the (few) unread rows
+            models.Index(fields=['bid', 'sender'], condition=models.Q(is_read=False), name='chat_unread_idx'),
+        ]
 
     def __str__(self):
         return f"Message by {self.sender.username} on Bid #{self.bid.id}"
\ No newline at end of file
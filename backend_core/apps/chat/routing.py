@@ -0,0 +1,7 @@
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    # Route: ws://localhost:8000/ws/chat/bid/123/?token=<JWT>
+    re_path(r'ws/chat/bid/(?P<bid_id>\d+)/$', consumers.BidChatConsumer.as_asgi()),
+]
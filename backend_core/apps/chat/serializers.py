@@ -15,5 +15,6 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         # Tells the frontend if the logged-in user sent this message (so we can color it blue vs gray)
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.sender == request.user
+            # Compare ids: `obj.sender == request.user` would fetch the sender for every row
+            return obj.sender_id == request.user.id
         return False
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.rfqs.broadcast import broadcaster
+from .models import ChatMessage
+from .serializers import ChatMessageSerializer
+
+
+def chat_group(bid_id):
+    return f"chat_bid_{bid_id}"
+
+
+@receiver(post_save, sender=ChatMessage)
+def chat_message_created(sender, instance, created, **kwargs):
+    """
+    Push a new message to both parties of the bid once it has committed.
+    Same fields as the REST API; each socket fills in is_mine for its own user.
+    """
+    if created:
+        data = ChatMessageSerializer(instance).data
+        transaction.on_commit(lambda: broadcaster.send(chat_group(instance.bid_id), {
+            "type": "chat.message", # -> BidChatConsumer.chat_message
+            "message": data,
+        }))
@@ -1,3 +1,120 @@
-from django.test import TestCase
+import datetime
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.rfqs.models import RFQ, Shipment, Bid
+from apps.users.models import User
+from . import routing
+from .models import ChatMessage
 
-# Create your tests here.
+
+@override_settings(CHAT_PAGE_SIZE=2)
+class ChatSyncTests(TestCase):
+    """Threads sync incrementally from a since-cursor; unread badges and mark-read are one query each."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = User.objects.create_user('chat_org', password='x', role='ORG')
+        cls.vendor = User.objects.create_user('chat_vendor', password='x', role='VENDOR')
+        rfq = RFQ.objects.create(created_by=cls.org, title='Chat', status='OPEN',
+                                 deadline=timezone.now() + datetime.timedelta(days=7))
+        lane = Shipment.objects.create(rfq=rfq, origin_port='Haiphong', destination_port='Long Beach')
+        cls.bids = [
+            Bid.objects.create(shipment=lane, vendor=cls.vendor, amount=amount, transit_time_days=20,
+                               valid_until=datetime.date.today() + datetime.timedelta(days=30))
+            for amount in (1600, 1650)
+        ]
+        cls.messages = [
+            ChatMessage.objects.create(bid=cls.bids[0], sender=sender, message=text)
+            for sender, text in ((cls.vendor, 'Hello'), (cls.org, 'Hi'), (cls.vendor, 'Any news?'))
+        ]
+        ChatMessage.objects.create(bid=cls.bids[1], sender=cls.vendor, message='Second lane')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.org)
+
+    def thread(self, **params):
+        response = self.client.get(f'/api/v1/chat/messages/bid/{self.bids[0].id}/', params)
+        self.assertEqual(response.status_code, 200)
+        return [message['message'] for message in response.json()]
+
+    def test_since_cursor_pages_through_the_thread(self):
+        self.assertEqual(self.thread(), ['Hello', 'Hi'])
+        self.assertEqual(self.thread(since=self.messages[1].id), ['Any news?'])
+        self.assertEqual(self.thread(since=self.messages[2].id), [])
+        self.assertEqual(self.client.get(f'/api/v1/chat/messages/bid/{self.bids[0].id}/', {'since': 'yesterday'}).status_code, 400)
+
+    def test_unread_counts_and_mark_read(self):
+        with self.assertNumQueries(1):
+            unread = self.client.get('/api/v1/chat/messages/unread/').json()
+        self.assertEqual(unread, {"total": 3, "bids": {str(self.bids[0].id): 2, str(self.bids[1].id): 1}})
+
+        response = self.client.post('/api/v1/chat/messages/mark_read/',
+                                    {'bids': [self.bids[0].id], 'up_to': self.messages[0].id}, format='json')
+        self.assertEqual(response.json(), {"updated": 1})
+        self.assertEqual(self.client.get('/api/v1/chat/messages/unread/').json()['total'], 2)
+        self.assertEqual(self.client.post('/api/v1/chat/messages/mark_read/', {}, format='json').json(), {"updated": 2})
+        # The sender's own messages never count as unread for them
+        self.client.force_authenticate(self.vendor)
+        self.assertEqual(self.client.get('/api/v1/chat/messages/unread/').json()['total'], 1)
+
+
+class BidChatSocketTests(TransactionTestCase):
+    """Both parties of a bid get new messages pushed, plus typing and read receipts from the other side."""
+
+    def setUp(self):
+        self.org = User.objects.create_user('push_org', password='x', role='ORG')
+        self.vendor = User.objects.create_user('push_vendor', password='x', role='VENDOR')
+        self.outsider = User.objects.create_user('push_outsider', password='x', role='VENDOR')
+        rfq = RFQ.objects.create(created_by=self.org, title='Push', status='OPEN',
+                                 deadline=timezone.now() + datetime.timedelta(days=7))
+        lane = Shipment.objects.create(rfq=rfq, origin_port='Chittagong', destination_port='Bremerhaven')
+        self.bid = Bid.objects.create(shipment=lane, vendor=self.vendor, amount=1500, transit_time_days=26,
+                                      valid_until=datetime.date.today() + datetime.timedelta(days=30))
+
+    def socket(self, user):
+        communicator = WebsocketCommunicator(URLRouter(routing.websocket_urlpatterns), f'/ws/chat/bid/{self.bid.id}/')
+        communicator.scope['user'] = user
+        return communicator
+
+    def test_only_the_bid_parties_can_connect(self):
+        async def run():
+            return (await self.socket(self.outsider).connect())[0]
+        self.assertFalse(async_to_sync(run)())
+
+    def test_messages_typing_and_receipts_are_pushed(self):
+        def post(user, text):
+            return ChatMessage.objects.create(bid=self.bid, sender=user, message=text)
+
+        async def run():
+            org, vendor = self.socket(self.org), self.socket(self.vendor)
+            await org.connect()
+            await vendor.connect()
+
+            message = await database_sync_to_async(post)(self.vendor, 'Rate holds until Friday')
+            pushed = await org.receive_json_from(timeout=5)
+            echoed = await vendor.receive_json_from(timeout=5)
+
+            await org.send_json_to({'type': 'typing'})
+            typing = await vendor.receive_json_from(timeout=5)
+            typing_echo = await org.receive_nothing(timeout=0.2)
+
+            await org.send_json_to({'type': 'read', 'up_to': message.id})
+            receipt = await vendor.receive_json_from(timeout=5)
+            await org.disconnect()
+            await vendor.disconnect()
+            return pushed, echoed, typing, typing_echo, receipt
+
+        pushed, echoed, typing, typing_echo, receipt = async_to_sync(run)()
+        self.assertEqual((pushed['type'], pushed['data']['message'], pushed['data']['is_mine']),
+                         ('message', 'Rate holds until Friday', False))
+        self.assertTrue(echoed['data']['is_mine'])
+        self.assertEqual((typing['type'], typing['user']), ('typing', self.org.id))
+        self.assertTrue(typing_echo)
+        self.assertEqual((receipt['type'], receipt['user']), ('read', self.org.id))
+        self.assertTrue(ChatMessage.objects.get(bid=self.bid).is_read)
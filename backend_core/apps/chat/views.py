@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db.models import Count
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -13,17 +16,66 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
         # Basic security: only return messages for bids the user is involved in
         user = self.request.user
         if user.role == 'VENDOR':
-            return ChatMessage.objects.filter(bid__vendor=user)
-        # ORG sees messages for bids on their RFQs
-        return ChatMessage.objects.filter(bid__shipment__rfq__created_by=user)
+            messages = ChatMessage.objects.filter(bid__vendor=user)
+        else:
+            # ORG sees messages for bids on their RFQs
+            messages = ChatMessage.objects.filter(bid__shipment__rfq__created_by=user)
+        # sender_name/sender_role come from the sender
+        return messages.select_related('sender')
 
     def perform_create(self, serializer):
         # Automatically set the sender to the logged-in user
         serializer.save(sender=self.request.user)
 
-    # Custom Endpoint: GET /api/chat/bid/<bid_id>/
+    # Custom Endpoint: GET /api/chat/bid/<bid_id>/?since=<message id | ISO timestamp>&limit=<n>
     @action(detail=False, methods=['get'], url_path='bid/(?P<bid_id>[^/.]+)')
     def for_bid(self, request, bid_id=None):
-        messages = self.get_queryset().filter(bid_id=bid_id)
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        """
+        Oldest first, at most `limit` messages (default CHAT_PAGE_SIZE) after the `since` cursor.
+        A full page means there may be more: ask again with the last id as `since`.
+        """
+        messages = self.get_queryset().filter(bid_id=bid_id).order_by('created_at', 'id')
+
+        since = request.query_params.get('since')
+        if since and since.isdigit():
+            messages = messages.filter(id__gt=int(since))
+        elif since:
+            # A '+' in an unescaped query string arrives as a space
+            since_time = parse_datetime(since.replace(' ', '+'))
+            if since_time is None:
+                return Response({"error": "since must be a message id or an ISO 8601 timestamp."}, status=400)
+            messages = messages.filter(created_at__gt=since_time)
+
+        limit = request.query_params.get('limit', str(settings.CHAT_PAGE_SIZE))
+        if not limit.isdigit() or not 1 <= int(limit) <= settings.CHAT_PAGE_MAX:
+            return Response({"error": f"limit must be between 1 and {settings.CHAT_PAGE_MAX}."}, status=400)
+
+        serializer = self.get_serializer(messages[:int(limit)], many=True)
+        return Response(serializer.data)
+
+    # Custom Endpoint: GET /api/chat/messages/unread/ -> inbox badges for every bid in one query
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        counts = (
+            self.get_queryset().filter(is_read=False).exclude(sender=request.user)
+            .order_by().values('bid_id').annotate(unread=Count('id'))
+        )
+        bids = {row['bid_id']: row['unread'] for row in counts}
+        return Response({"total": sum(bids.values()), "bids": bids})
+
+    # Custom Endpoint: POST /api/chat/messages/mark_read/ {"bids": [ids], "up_to": <message id>} (both optional)
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """Marks the other party's messages as read with a single UPDATE; no body means the whole inbox."""
+        bids, up_to = request.data.get('bids'), request.data.get('up_to')
+        if bids is not None and (not isinstance(bids, list) or not all(isinstance(bid, int) for bid in bids)):
+            return Response({"error": "bids must be a list of bid ids."}, status=400)
+        if up_to is not None and not isinstance(up_to, int):
+            return Response({"error": "up_to must be a message id."}, status=400)
+
+        messages = self.get_queryset().filter(is_read=False).exclude(sender=request.user)
+        if bids is not None:
+            messages = messages.filter(bid_id__in=bids)
+        if up_to is not None:
+            messages = messages.filter(id__lte=up_to)
+        return Response({"updated": messages.order_by().update(is_read=True)})
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from unfold.admin import ModelAdmin, TabularInline
-from .models import RFQ, Shipment, Bid
+from apps.analytics import rollups
+from .models import RFQ, Shipment, Bid, ContractJob
 
 # 1. Inline Shipments (Full Edit/Delete Control)
 class ShipmentInline(TabularInline):
@@ -29,12 +33,17 @@ class RFQAdmin(ModelAdmin):
     inlines = [ShipmentInline] 
     actions = ['mark_as_open', 'mark_as_closed']
 
+    # Bulk updates skip post_save, so bump the version here to invalidate cached detail payloads
+    # and refresh the daily rollups of the close days they leave or enter
     def mark_as_open(self, request, queryset):
-        queryset.update(status='OPEN')
+        previously = list(queryset.only('created_by', 'created_at', 'closed_at'))
+        queryset.update(status='OPEN', closed_at=None, version=F('version') + 1)
+        rollups.refresh_rfqs(previously)
     mark_as_open.short_description = "Mark selected RFQs as OPEN"
 
     def mark_as_closed(self, request, queryset):
-        queryset.update(status='CLOSED')
+        queryset.update(status='CLOSED', closed_at=Coalesce('closed_at', Value(timezone.now())), version=F('version') + 1)
+        rollups.refresh_rfqs(queryset.only('created_by', 'created_at', 'closed_at'))
     mark_as_closed.short_description = "Mark selected RFQs as CLOSED"
 
 @admin.register(Shipment)
@@ -56,4 +65,19 @@ class BidAdmin(ModelAdmin):
     list_editable = ('amount', 'is_winner', 'counter_offer_status')
     
     list_filter = ('is_winner', 'counter_offer_status')
-    search_fields = ('vendor__username', 'vendor__company_name', 'shipment__rfq__title')
\ No newline at end of file
+    search_fields = ('vendor__username', 'vendor__company_name', 'shipment__rfq__title')
+
+@admin.register(ContractJob)
+class ContractJobAdmin(ModelAdmin):
+    list_display = ('id', 'bid', 'status', 'attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('bid__id', 'bid__vendor__username', 'last_error')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'last_error')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        queryset.filter(status=ContractJob.Status.FAILED).update(
+            status=ContractJob.Status.PENDING, attempts=0, run_after=timezone.now()
+        )
+    retry_now.short_description = "Retry selected failed jobs now"
+
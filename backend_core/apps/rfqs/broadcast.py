@@ -0,0 +1,106 @@
+"""
+Coalescing dispatcher for live bid events.
+
+Signals hand new bids over once their transaction has committed. The dispatcher buffers them per
+RFQ for BID_BROADCAST_WINDOW seconds and then sends a single batched `bid_update` to the RFQ's
+group from an event loop, so request threads never wait on the channel layer and bids that roll
+back are never announced.
+
+`send()` pushes one-off events (chat, scheduler notices) through the same loop without coalescing,
+and `send_rfq()` does the same for logged RFQ events such as deadline closes.
+Sends happen on the ASGI server's loop when a consumer has registered it (the only loop an
+in-memory channel layer can deliver on), otherwise on a private background loop.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from channels.layers import get_channel_layer
+from django.conf import settings
+from . import events
+
+logger = logging.getLogger(__name__)
+
+
+class BidBroadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._tasks = set()
+        self._asgi_loop = None
+        self._own_loop = None
+
+    def attach(self, loop):
+        """Remember the ASGI server's event loop; called by the consumers when a socket connects."""
+        self._asgi_loop = loop
+
+    def _loop(self):
+        loop = self._asgi_loop
+        if loop is not None and loop.is_running():
+            return loop
+        with self._lock:
+            if self._own_loop is None:
+                self._own_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._own_loop.run_forever, name='bid-broadcast', daemon=True).start()
+            return self._own_loop
+
+    def publish(self, rfq_id, *bids):
+        """Queue bid events for `rfq_id`. Thread-safe and non-blocking; the first bid of a window schedules the flush."""
+        with self._lock:
+            first = rfq_id not in self._pending
+            self._pending.setdefault(rfq_id, []).extend(bids)
+        if first:
+            loop = self._loop()
+            loop.call_soon_threadsafe(
+                loop.call_later, settings.BID_BROADCAST_WINDOW, self._spawn, self._flush, rfq_id,
+                context=contextvars.Context(),
+            )
+
+    def send(self, group, event):
+        """Send one event to `group` right away, without coalescing (chat messages, receipts). Thread-safe, non-blocking."""
+        self._loop().call_soon_threadsafe(self._spawn, self._group_send, group, event, context=contextvars.Context())
+
+    def send_rfq(self, rfq_id, event):
+        """Like send(), for an RFQ's own group: the event is numbered and logged so it can be replayed."""
+        self._loop().call_soon_threadsafe(self._spawn, self._send_rfq, rfq_id, event, context=contextvars.Context())
+
+    async def drain(self):
+        """On the attached loop: wait for sends already handed over (short-lived commands call this before exiting)."""
+        await asyncio.sleep(0)
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # Callbacks run in a fresh context: the publishing thread's contextvars (asgiref's
+    # sync_to_async bookkeeping, request state) must not leak into the dispatcher's tasks
+    def _spawn(self, coroutine, *args):
+        task = asyncio.get_running_loop().create_task(coroutine(*args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _group_send(self, group, event):
+        try:
+            await get_channel_layer().group_send(group, event)
+        except Exception:
+            logger.exception("Could not send %s to %s", event.get("type"), group)
+
+    async def _flush(self, rfq_id):
+        with self._lock:
+            bids = self._pending.pop(rfq_id, [])
+        if bids:
+            await self._send_rfq(rfq_id, {
+                "type": "bid_update", # Matches the method name in consumers.py
+                "rfq_id": rfq_id,
+                "message": {"count": len(bids), "bids": bids},
+            })
+
+    async def _send_rfq(self, rfq_id, event):
+        try:
+            # Numbered and logged first, so a socket that drops now can replay it (events.py)
+            event = await events.append(rfq_id, event)
+        except Exception:
+            logger.exception("Could not log %s for RFQ %s", event["type"], rfq_id)
+            return
+        await self._group_send(f"rfq_{rfq_id}", event)
+
+
+broadcaster = BidBroadcaster()
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from .models import RFQ
+
+
+def bump_rfq_version(**filters):
+    """
+    Invalidate cached detail payloads by moving the RFQ(s) matching `filters` to a new version.
+    Uses a single UPDATE so it never re-fires the RFQ post_save signal.
+    """
+    RFQ.objects.filter(**filters).update(version=F('version') + 1)
+
+
+def detail_cache_key(rfq, user):
+    """
+    Cache key and ETag for the serialized detail tree of `rfq` as seen by `user`.
+
+    Owners and admins all see the same tree. Vendors get their own `my_bid`, so their
+    payload is keyed per vendor; the visibility flags are part of the key so toggling
+    them never serves a tree built under the other setting.
+    """
+    audience = f"vendor{user.pk}" if user.role == 'VENDOR' else "all"
+    visibility = f"{int(rfq.visible_bids)}{int(rfq.visible_target_price)}"
+    key = f"rfq_detail:{rfq.pk}:v{rfq.version}:{user.role}:{visibility}:{audience}"
+    etag = f'W/"rfq-{rfq.pk}-v{rfq.version}-{user.role}-{visibility}-{audience}"'
+    return key, etag
+
+
+def get_cached_detail(key):
+    return cache.get(key)
+
+
+def set_cached_detail(key, data):
+    cache.set(key, data, settings.RFQ_DETAIL_CACHE_TIMEOUT)
+
+
+# ----------------------------------------------------
+# DASHBOARD STATS (apps/analytics/stats.py)
+# Each user's cached dashboard lives under a per-user version. Writes bump the versions of the
+# users they affect after commit; a refresh that started before the bump stores under the old
+# version, which nobody reads any more, so a slow recompute can never resurrect stale numbers.
+# ----------------------------------------------------
+def _dashboard_version_key(user_id):
+    return f"dashboard_version:{user_id}"
+
+
+def dashboard_cache_key(user_id):
+    version = cache.get(_dashboard_version_key(user_id), 0)
+    return f"dashboard:{user_id}:v{version}"
+
+
+def invalidate_dashboards(*user_ids):
+    """Drop the cached dashboards of `user_ids` once the current transaction commits."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+
+    def bump():
+        for user_id in user_ids:
+            cache.add(_dashboard_version_key(user_id), 0, timeout=None)
+            cache.incr(_dashboard_version_key(user_id))
+
+    if user_ids:
+        transaction.on_commit(bump)
@@ -1,15 +1,34 @@
+import asyncio
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer, AsyncJsonWebsocketConsumer
+from . import events
+from .broadcast import broadcaster
+from .models import RFQ
 
 class RFQConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """
-        Client connects to: ws://localhost:8000/ws/rfq/<rfq_id>/
+        Client connects to: ws://localhost:8000/ws/rfq/<rfq_id>/[?last_seq=<n>]
+        Every event carries a "seq". On reconnect pass the last one seen: the server replays the
+        missed events and sends {"type": "resumed", "seq"}. Without last_seq, or when the log no
+        longer covers the gap, it sends {"type": "snapshot", "seq", "data"} instead; events with a
+        higher seq may already be reflected in it, so apply them idempotently.
+        Authenticate with ?token=<access JWT>; the RFQ must be one the user could open over the API
+        (same rule as LiveConsumer subscriptions), otherwise the socket is closed.
         """
         self.rfq_id = self.scope['url_route']['kwargs']['rfq_id']
         self.room_group_name = f'rfq_{self.rfq_id}'
+        self.user = self.scope.get('user')
+        if not self.rfq_id.isdigit() or not self.user or not self.user.is_authenticated \
+                or int(self.rfq_id) not in await visible_rfq_ids(self.user, [int(self.rfq_id)]):
+            await self.close()
+            return
+        broadcaster.attach(asyncio.get_running_loop())
 
         # Join the "Room" for this specific RFQ
+        # (before reading the log: anything newer queues up behind the replay/snapshot)
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
@@ -17,6 +36,26 @@ class RFQConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
         print(f"✅ WebSocket Connected: {self.room_group_name}")
+        await self.catch_up()
+
+    async def catch_up(self):
+        last_seq = parse_qs(self.scope.get('query_string', b'').decode()).get('last_seq', [''])[0]
+        if last_seq.isdigit():
+            seq, missed = await events.missed(int(self.rfq_id), int(last_seq))
+            if missed is not None:
+                for event in missed:
+                    # Same handler the group message would have reached
+                    await getattr(self, event['type'])(event)
+                await self.send(text_data=json.dumps({'type': 'resumed', 'seq': seq}))
+                return
+
+        # Counter first: a bid landing in between shows up twice rather than not at all
+        seq = await events.current_seq(int(self.rfq_id))
+        data = await events.snapshot(int(self.rfq_id), self.user)
+        if data is None:
+            await self.close()
+            return
+        await self.send(text_data=json.dumps({'type': 'snapshot', 'seq': seq, 'data': data}))
 
     async def disconnect(self, close_code):
         # Leave the room
@@ -32,11 +71,99 @@ class RFQConsumer(AsyncWebsocketConsumer):
         pass
 
     # Custom Handler: Send "New Bid" notification to Frontend
+    # data: {"count": n, "bids": [{"shipment_id", "amount", "vendor"}, ...]}, coalesced per RFQ
     async def bid_update(self, event):
         message = event['message']
 
         # Send JSON to the Frontend Client
         await self.send(text_data=json.dumps({
             'type': 'bid_update',
+            'seq': event.get('seq'),
             'data': message
-        }))
\ No newline at end of file
+        }))
+
+    # Custom Handler: the deadline passed and the scheduler closed the RFQ
+    async def rfq_closed(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'rfq_closed',
+            'seq': event.get('seq'),
+            'data': event['message']
+        }))
+
+
+@database_sync_to_async
+def visible_rfq_ids(user, rfq_ids):
+    """Same visibility as RFQViewSet: vendors follow OPEN tenders, organizations their own, admins all."""
+    rfqs = RFQ.objects.filter(pk__in=rfq_ids)
+    if user.role == 'VENDOR':
+        rfqs = rfqs.filter(status='OPEN')
+    elif user.role != 'ADMIN':
+        rfqs = rfqs.filter(created_by=user)
+    return set(rfqs.values_list('pk', flat=True))
+
+
+class LiveConsumer(AsyncJsonWebsocketConsumer):
+    """
+    One authenticated socket per user, multiplexing any number of RFQs.
+    Client connects to: ws://localhost:8000/ws/live/?token=<access JWT>
+    Client sends:       {"action": "subscribe" | "unsubscribe", "rfqs": [12, 15, ...]}
+    Server sends:       {"type": "bid_update" | "rfq_closed", "rfq": 12, "seq": 57, "data": {...}}
+    """
+    MAX_SUBSCRIPTIONS = 200
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.rfq_ids = set()
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+        broadcaster.attach(asyncio.get_running_loop())
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        for rfq_id in self.rfq_ids:
+            await self.channel_layer.group_discard(f'rfq_{rfq_id}', self.channel_name)
+        self.rfq_ids.clear()
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        try:
+            return json.loads(text_data)
+        except ValueError:
+            return None
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action') if isinstance(content, dict) else None
+        rfq_ids = content.get('rfqs') if isinstance(content, dict) else None
+        if action not in ('subscribe', 'unsubscribe') or not isinstance(rfq_ids, list) \
+                or not all(isinstance(rfq_id, int) for rfq_id in rfq_ids):
+            await self.send_json({'type': 'error', 'error': 'Send {"action": "subscribe"|"unsubscribe", "rfqs": [ids]}.'})
+            return
+
+        if action == 'unsubscribe':
+            leaving = self.rfq_ids.intersection(rfq_ids)
+            for rfq_id in leaving:
+                await self.channel_layer.group_discard(f'rfq_{rfq_id}', self.channel_name)
+            self.rfq_ids -= leaving
+            await self.send_json({'type': 'unsubscribed', 'rfqs': sorted(leaving)})
+            return
+
+        requested = set(rfq_ids) - self.rfq_ids
+        if len(self.rfq_ids) + len(requested) > self.MAX_SUBSCRIPTIONS:
+            await self.send_json({'type': 'error', 'error': f'At most {self.MAX_SUBSCRIPTIONS} RFQs per connection.'})
+            return
+
+        allowed = await visible_rfq_ids(self.user, requested) if requested else set()
+        for rfq_id in allowed:
+            await self.channel_layer.group_add(f'rfq_{rfq_id}', self.channel_name)
+        self.rfq_ids |= allowed
+        await self.send_json({
+            'type': 'subscribed', 'rfqs': sorted(self.rfq_ids.intersection(rfq_ids)), 'denied': sorted(requested - allowed),
+        })
+
+    # Group events are the same ones RFQConsumer receives, tagged with the RFQ they belong to
+    async def bid_update(self, event):
+        await self.send_json({'type': 'bid_update', 'rfq': event.get('rfq_id'), 'seq': event.get('seq'), 'data': event['message']})
+
+    async def rfq_closed(self, event):
+        await self.send_json({'type': 'rfq_closed', 'rfq': event.get('rfq_id'), 'seq': event.get('seq'), 'data': event['message']})
@@ -0,0 +1,96 @@
+"""
+Contract pack for a whole RFQ: every winning bid's contract as one ZIP or one merged PDF.
+
+Only stored contract files whose contract_hash still matches the bid's terms are packed; nothing is
+rendered on the request path. The contracts action first asks `missing_contracts` which lanes lack a
+current PDF on disk (job still queued, terms changed, file missing), queues ContractJobs for them and
+answers 202 until the worker has caught up. The ZIP is written member by member into a small buffer that is drained after every chunk,
+so memory stays flat however many lanes were awarded. pypdf has to hold the page tree of a merged PDF until it writes it out,
+so the merged variant grows with the pack: the contracts action only builds it up to CONTRACT_PACK_PDF_MAX_LANES contracts
+and serves larger packs as the ZIP.
+"""
+import io
+import tempfile
+import zipfile
+from pypdf import PdfReader, PdfWriter
+from .models import Bid
+from .pdf_service import contract_filename, contract_hash
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink: zipfile falls back to data descriptors and never seeks back."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def winning_bids(rfq):
+    return (
+        Bid.objects.filter(shipment__rfq=rfq, is_winner=True)
+        .select_related('shipment__rfq__created_by', 'vendor')
+        .order_by('shipment_id')
+    )
+
+
+def is_current(bid):
+    """True when `bid` has a stored contract PDF made from its current terms."""
+    return bool(bid.contract_file) and bid.contract_hash == contract_hash(bid) \
+        and bid.contract_file.storage.exists(bid.contract_file.name)
+
+
+def missing_contracts(rfq):
+    """Ids of the RFQ's winning bids without a current stored contract, i.e. not packable yet."""
+    return [bid.id for bid in winning_bids(rfq) if not is_current(bid)]
+
+
+def contract_chunks(bid):
+    """Yield the stored contract PDF for `bid` in chunks. Callers check `missing_contracts` first."""
+    if not (bid.contract_file and bid.contract_hash == contract_hash(bid)):
+        raise RuntimeError(f"The contract for bid {bid.id} is not current; it has to be regenerated first.")
+    with bid.contract_file.open('rb') as stored:
+        yield from stored.chunks(CHUNK_SIZE)
+
+
+def stream_zip(rfq):
+    buffer = _StreamBuffer()
+    # Contracts are already deflate-compressed PDFs; storing them avoids burning CPU for nothing
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for bid in winning_bids(rfq).iterator(chunk_size=100):
+            with archive.open(contract_filename(rfq.id, bid.id), mode='w') as member:
+                for chunk in contract_chunks(bid):
+                    member.write(chunk)
+                    yield buffer.drain()
+            # Data descriptor of the member just closed
+            yield buffer.drain()
+    # Central directory, written on close
+    yield buffer.drain()
+
+
+def stream_merged_pdf(rfq):
+    writer = PdfWriter()
+    for bid in winning_bids(rfq).iterator(chunk_size=100):
+        reader = PdfReader(io.BytesIO(b''.join(contract_chunks(bid))))
+        shipment = bid.shipment
+        writer.append(reader, outline_item=f"{shipment.origin_port} → {shipment.destination_port} (BID-{bid.id})")
+
+    with tempfile.TemporaryFile() as spool:
+        writer.write(spool)
+        writer.close()
+        spool.seek(0)
+        while chunk := spool.read(CHUNK_SIZE):
+            yield chunk
+
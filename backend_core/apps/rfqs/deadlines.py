@@ -0,0 +1,63 @@
+"""
+RFQ deadlines: closing tenders on time and refusing bids that arrive after it.
+
+`manage.py run_deadline_scheduler` keeps the upcoming deadlines of OPEN RFQs in a heap and sleeps
+until the earliest one. RFQ saves tell it about new or moved deadlines through the channel layer,
+and a periodic resync from the (status, deadline) index covers anything it missed. Closing is a
+conditional UPDATE, so stale heap entries, duplicate schedulers and manual closes are harmless.
+
+Bids take a row lock on their RFQ and re-check status and deadline in the same transaction as the
+insert, so a bid either commits before the close or is rejected.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+from apps.analytics import rollups
+from .broadcast import broadcaster
+from .cache import invalidate_dashboards
+from .models import RFQ
+
+# Group the scheduler joins to hear about deadline changes
+SCHEDULER_GROUP = "rfq_deadlines"
+
+
+def lock_open_rfq(rfq_id):
+    """Inside a transaction: lock the RFQ row and make sure it still takes bids, else raise a 400."""
+    open_rfq = (
+        RFQ.objects.select_for_update()
+        .filter(pk=rfq_id, status=RFQ.Status.OPEN, deadline__gt=timezone.now())
+        .values_list('pk', flat=True)
+    )
+    if not open_rfq:
+        raise serializers.ValidationError({"detail": "This RFQ is closed for bidding."})
+
+
+def upcoming_deadlines():
+    """(deadline, rfq_id) for every OPEN RFQ, earliest first; served by the (status, deadline) index."""
+    return list(RFQ.objects.filter(status=RFQ.Status.OPEN).order_by('deadline').values_list('deadline', 'pk'))
+
+
+def close_if_due(rfq_id):
+    """Close `rfq_id` if it is still OPEN and its deadline has passed. Returns True when this call closed it."""
+    now = timezone.now()
+    with transaction.atomic():
+        closed = RFQ.objects.filter(pk=rfq_id, status=RFQ.Status.OPEN, deadline__lte=now).update(
+            status=RFQ.Status.CLOSED, closed_at=now, version=F('version') + 1
+        )
+        if closed:
+            rfq = RFQ.objects.only('created_by', 'created_at', 'closed_at').get(pk=rfq_id)
+            rollups.refresh_rfqs([rfq])
+            invalidate_dashboards(rfq.created_by_id)
+            transaction.on_commit(lambda: broadcaster.send_rfq(rfq_id, {
+                "type": "rfq_closed", # Matches the method name in consumers.py
+                "rfq_id": rfq_id,
+                "message": {"status": RFQ.Status.CLOSED.value, "reason": "deadline", "closed_at": now.isoformat()},
+            }))
+    return bool(closed)
+
+
+def deadline_changed(rfq):
+    """Tell the scheduler(s) about an OPEN RFQ's (possibly new) deadline once the save commits."""
+    event = {"type": "deadline.changed", "rfq_id": rfq.pk, "deadline": rfq.deadline.isoformat()}
+    transaction.on_commit(lambda: broadcaster.send(SCHEDULER_GROUP, event))
@@ -0,0 +1,175 @@
+"""
+Authenticated file downloads (RFQ spec sheets, bid documents, contracts).
+
+The API actions check access to the RFQ/bid and hand out a link valid for FILE_DOWNLOAD_TTL:
+- remote storage (S3): a presigned URL, so the bytes never pass through our workers;
+- local storage: a signed /files/<token>/ URL. That view hands the file to the web server with
+  X-Accel-Redirect / X-Sendfile when FILE_DOWNLOAD_OFFLOAD is set, and otherwise streams it itself
+  with Range and conditional request support.
+"""
+import mimetypes
+import os
+import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+SALT = 'rfqs.downloads'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def aiterate(chunks):
+    """
+    Serve a sync generator to an ASGI server one chunk at a time. Django would otherwise
+    collect a sync streaming iterator into a list before sending it under ASGI.
+    """
+    done = object()
+    step = sync_to_async(lambda: next(chunks, done))
+
+    async def iterate():
+        while (chunk := await step()) is not done:
+            if chunk:
+                yield chunk
+
+    return iterate()
+
+
+def streaming_response(request, chunks, **kwargs):
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = aiterate(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+def _local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def download_link(request, field_file):
+    """A short-lived URL for `field_file`. Only call this after the caller's access has been checked."""
+    storage, name = field_file.storage, field_file.name
+    filename = os.path.basename(name)
+    if _local_path(storage, name) is None:
+        # S3: presigned GET that also makes the browser keep the original file name
+        return storage.url(name, expire=settings.FILE_DOWNLOAD_TTL, parameters={
+            'ResponseContentDisposition': content_disposition_header(False, filename),
+        })
+    token = signing.dumps({'name': name}, salt=SALT)
+    return request.build_absolute_uri(reverse('file-download', args=[token]))
+
+
+def download_payload(request, field_file):
+    return {
+        "url": download_link(request, field_file),
+        "name": os.path.basename(field_file.name),
+        "expires_in": settings.FILE_DOWNLOAD_TTL,
+    }
+
+
+def _chunks(handle, length):
+    with handle:
+        while length > 0:
+            data = handle.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _byte_range(request, size, etag, last_modified):
+    """(start, end) for a satisfiable single Range header, None to send the whole file, False if unsatisfiable."""
+    match = RANGE_RE.match(request.headers.get('Range', '').strip())
+    if not match or not any(match.groups()):
+        # Absent, multi-range or malformed: RFC 9110 lets us answer with the full representation
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        # The client's partial copy is stale, so it gets the whole file
+        return None
+
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # bytes=5-3 is not a valid range-spec, so the header is ignored rather than unsatisfiable (RFC 9110 §14.1.1)
+        return None
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            return False
+    if start >= size:
+        return False
+    return start, end
+
+
+def serve_signed_file(request, token):
+    """Public endpoint behind the signed links handed out by download_link() on local storage."""
+    try:
+        name = signing.loads(token, salt=SALT, max_age=settings.FILE_DOWNLOAD_TTL)['name']
+    except (signing.BadSignature, KeyError, TypeError):
+        raise Http404("Download link is invalid or has expired.")
+
+    storage = default_storage
+    path = _local_path(storage, name)
+    if path is None or not storage.exists(name):
+        raise Http404("File not found.")
+
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = content_disposition_header(False, filename)
+
+    offload = settings.FILE_DOWNLOAD_OFFLOAD
+    if offload:
+        # The web server handles Range, conditionals and the transfer itself
+        response = HttpResponse(content_type=content_type)
+        if offload == 'nginx':
+            response['X-Accel-Redirect'] = settings.FILE_DOWNLOAD_ACCEL_PREFIX + name
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = disposition
+        return response
+
+    size = storage.size(name)
+    last_modified = int(storage.get_modified_time(name).timestamp())
+    etag = quote_etag(f'{size:x}-{last_modified:x}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0',
+        'Content-Disposition': disposition,
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for key in ('ETag', 'Last-Modified', 'Cache-Control'):
+            not_modified[key] = headers[key]
+        return not_modified
+
+    byte_range = _byte_range(request, size, etag, last_modified)
+    if byte_range is False:
+        return HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}', **headers})
+
+    handle = storage.open(name, 'rb')
+    if byte_range is None:
+        response = streaming_response(request, _chunks(handle, size), content_type=content_type, headers=headers)
+        response['Content-Length'] = size
+        return response
+
+    start, end = byte_range
+    handle.seek(start)
+    response = streaming_response(
+        request, _chunks(handle, end - start + 1), status=206, content_type=content_type, headers=headers
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
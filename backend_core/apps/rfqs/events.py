@@ -0,0 +1,93 @@
+"""
+Resumable RFQ streams: a bounded, sequence-numbered log of each RFQ's group events.
+
+Every event sent to an RFQ group gets the next number from a per-RFQ counter and is stored in a
+ring of RFQ_EVENT_LOG_SIZE cache slots (slot = seq % size), so the log never grows. A client that
+reconnects with the last seq it saw gets exactly the events it missed; if any of them has been
+overwritten or expired, it gets a fresh snapshot instead. The counter and slots live in the
+default cache, i.e. Redis in production, so every web process shares one log per RFQ.
+"""
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from .models import RFQ
+
+
+def _seq_key(rfq_id):
+    return f"rfq_events:{rfq_id}:seq"
+
+
+def _slot_key(rfq_id, seq):
+    return f"rfq_events:{rfq_id}:{seq % settings.RFQ_EVENT_LOG_SIZE}"
+
+
+async def append(rfq_id, event):
+    """Number `event` and store it in the RFQ's ring. Returns the numbered copy to broadcast."""
+    await cache.aadd(_seq_key(rfq_id), 0, timeout=None)
+    seq = await cache.aincr(_seq_key(rfq_id))
+    event = dict(event, seq=seq)
+    await cache.aset(_slot_key(rfq_id, seq), event, settings.RFQ_EVENT_LOG_TTL)
+    return event
+
+
+async def current_seq(rfq_id):
+    return await cache.aget(_seq_key(rfq_id), 0)
+
+
+async def missed(rfq_id, last_seq):
+    """
+    (seq, events after `last_seq`) when the log still holds all of them, else (seq, None): the
+    ring has rolled over, a slot expired, or the counter was reset (last_seq from the future).
+    """
+    seq = await current_seq(rfq_id)
+    if last_seq > seq or seq - last_seq > settings.RFQ_EVENT_LOG_SIZE:
+        return seq, None
+    wanted = range(last_seq + 1, seq + 1)
+    stored = await cache.aget_many([_slot_key(rfq_id, n) for n in wanted])
+    events = [stored.get(_slot_key(rfq_id, n)) for n in wanted]
+    # A slot holding another seq was overwritten (or is still being written): resync
+    if any(event is None or event['seq'] != n for n, event in zip(wanted, events)):
+        return seq, None
+    return seq, events
+
+
+@database_sync_to_async
+def snapshot(rfq_id, user):
+    """
+    Compact state of an RFQ from its denormalized summaries (two small queries, no bid rows).
+    `version` matches the detail endpoint's ETag, so a client whose cached copy has the same
+    version can skip refetching /rfqs/<id>/ entirely.
+    """
+    rfq = RFQ.objects.filter(pk=rfq_id).only(
+        'id', 'created_by_id', 'status', 'deadline', 'version', 'visible_bids',
+        'lane_count', 'bid_count', 'lowest_bid_amount', 'best_transit_days', 'last_bid_at',
+    ).first()
+    if rfq is None:
+        return None
+
+    # Same rule as the serializers: best price and transit stay hidden from vendors unless the owner shares them
+    privileged = user is not None and user.is_authenticated and (user.role == 'ADMIN' or user.id == rfq.created_by_id)
+    show_prices = privileged or rfq.visible_bids
+    price = lambda amount: float(amount) if show_prices and amount is not None else None
+    transit = lambda days: days if show_prices else None
+
+    lanes = rfq.shipments.order_by('id').values(
+        'id', 'bid_count', 'lowest_bid_amount', 'best_transit_days', 'last_bid_at'
+    )
+    return {
+        "rfq": rfq.id,
+        "status": rfq.status,
+        "deadline": rfq.deadline.isoformat(),
+        "version": rfq.version,
+        "lane_count": rfq.lane_count,
+        "bid_count": rfq.bid_count,
+        "lowest_bid_amount": price(rfq.lowest_bid_amount),
+        "best_transit_days": transit(rfq.best_transit_days),
+        "last_bid_at": rfq.last_bid_at.isoformat() if rfq.last_bid_at else None,
+        "lanes": [
+            dict(lane, lowest_bid_amount=price(lane['lowest_bid_amount']),
+                 best_transit_days=transit(lane['best_transit_days']),
+                 last_bid_at=lane['last_bid_at'].isoformat() if lane['last_bid_at'] else None)
+            for lane in lanes
+        ],
+    }
@@ -0,0 +1,85 @@
+"""
+DB-backed contract generation queue.
+
+Awards enqueue a ContractJob in the same transaction that marks the winner, and
+`manage.py run_contract_worker` renders them in a warm process pool, retrying
+failures with exponential backoff. Jobs survive restarts: anything left RUNNING past
+its lease is put back in the queue.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import ContractJob
+from .pdf_service import generate_contract_for_bid
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = [ContractJob.Status.PENDING, ContractJob.Status.RUNNING]
+
+
+def enqueue_contracts(bid_ids):
+    """Queue contract generation for `bid_ids`, skipping bids that already have a queued or running job."""
+    bid_ids = list(bid_ids)
+    active = set(ContractJob.objects.filter(bid_id__in=bid_ids, status__in=ACTIVE).values_list('bid_id', flat=True))
+    # ignore_conflicts: a concurrent award may have queued the same bid in between (one-active-job constraint)
+    ContractJob.objects.bulk_create(
+        [ContractJob(bid_id=bid_id) for bid_id in bid_ids if bid_id not in active],
+        ignore_conflicts=True,
+    )
+
+
+def requeue_stale():
+    """Put jobs whose worker died mid-render (RUNNING past the lease) back in the queue."""
+    lease_expired = timezone.now() - timedelta(seconds=settings.CONTRACT_JOB_LEASE_SECONDS)
+    return ContractJob.objects.filter(status=ContractJob.Status.RUNNING, started_at__lt=lease_expired).update(
+        status=ContractJob.Status.PENDING, run_after=timezone.now()
+    )
+
+
+def claim_jobs(limit):
+    """Atomically take up to `limit` due jobs; SKIP LOCKED lets several workers share the queue."""
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            ContractJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ContractJob.Status.PENDING, run_after__lte=now)
+            .order_by('run_after')
+            .values_list('pk', flat=True)[:limit]
+        )
+        ContractJob.objects.filter(pk__in=job_ids).update(
+            status=ContractJob.Status.RUNNING, attempts=F('attempts') + 1, started_at=now
+        )
+    return job_ids
+
+
+def retry_delay(attempts):
+    # 10s, 20s, 40s, ... capped at an hour
+    return timedelta(seconds=min(settings.CONTRACT_JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def run_job(job_id, render_pool=None):
+    """Render one claimed job and record the outcome. Safe to call from a worker thread."""
+    job = ContractJob.objects.get(pk=job_id)
+    try:
+        generate_contract_for_bid(job.bid_id, render_pool=render_pool)
+    except Exception as e:
+        logger.exception("Contract job %s for bid %s failed (attempt %s/%s)", job.pk, job.bid_id, job.attempts, job.max_attempts)
+        job.last_error = f"{type(e).__name__}: {e}"
+        if job.attempts >= job.max_attempts:
+            job.status = ContractJob.Status.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = ContractJob.Status.PENDING
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+    else:
+        job.status = ContractJob.Status.DONE
+        job.last_error = ""
+        job.finished_at = timezone.now()
+    finally:
+        job.save(update_fields=['status', 'last_error', 'run_after', 'finished_at'])
+        # Worker threads each hold their own connection; don't leak them
+        connection.close()
+    return job.status
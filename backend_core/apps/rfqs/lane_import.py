@@ -0,0 +1,121 @@
+"""
+Bulk lane import: streams a CSV/XLSX lane sheet into an RFQ in fixed-size chunks.
+
+Rows are validated with LaneImportSerializer and inserted with bulk_create, so a
+2,000-lane tender costs a handful of INSERTs instead of one request per lane.
+"""
+import csv
+import io
+from xml.etree.ElementTree import ParseError
+from zipfile import BadZipFile
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from django.db import transaction
+from .models import Shipment
+from .serializers import LaneImportSerializer
+from .cache import bump_rfq_version
+from . import summaries
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+
+
+def _normalize_header(value):
+    # "Origin Port" / "origin-port" / " ORIGIN_PORT " -> "origin_port"
+    return str(value or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _clean_row(header, values):
+    # Blank cells fall back to the model defaults instead of failing validation
+    return {
+        column: value.strip() if isinstance(value, str) else value
+        for column, value in zip(header, values)
+        if column in LaneImportSerializer.Meta.fields and value is not None and str(value).strip() != ''
+    }
+
+
+def _chunked(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_rows(upload):
+    # csv.reader counts physical lines, so numbers stay right across blank lines and quoted newlines
+    reader = csv.reader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+    try:
+        header = [_normalize_header(column) for column in next(reader, ())]
+        while True:
+            first_line = reader.line_num + 1
+            values = next(reader, None)
+            if values is None:
+                return
+            if any(value.strip() for value in values):
+                yield first_line, _clean_row(header, values)
+    except (csv.Error, UnicodeDecodeError):
+        raise ValueError("Could not read the uploaded .csv file. Save it as UTF-8 CSV and try again.")
+
+
+def _xlsx_rows(upload):
+    # read_only mode streams rows instead of loading the whole workbook into memory
+    try:
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError, ParseError):
+        # KeyError: a zip that is not a workbook (openpyxl looks up its parts by name)
+        raise ValueError("Could not read the uploaded .xlsx file.")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(column) for column in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, _clean_row(header, values)
+    except (BadZipFile, KeyError, ParseError):
+        raise ValueError("Could not read the uploaded .xlsx file.")
+    finally:
+        workbook.close()
+
+
+def iter_lane_chunks(upload):
+    """Yield lists of (sheet row number, row dict) from an uploaded .csv or .xlsx file."""
+    name = upload.name.lower()
+    if name.endswith('.csv'):
+        return _chunked(_csv_rows(upload))
+    if name.endswith(('.xlsx', '.xlsm')):
+        return _chunked(_xlsx_rows(upload))
+    raise ValueError("Unsupported file type. Upload a .csv or .xlsx lane sheet.")
+
+
+def import_lanes(rfq, upload):
+    """
+    Validate and insert every lane in `upload` into `rfq`.
+    Valid rows are created, invalid rows are reported back with their sheet row number.
+    """
+    created = 0
+    failed = 0
+    errors = []
+
+    with transaction.atomic():
+        for chunk in iter_lane_chunks(upload):
+            lanes = []
+            for row_number, row in chunk:
+                serializer = LaneImportSerializer(data=row)
+                if serializer.is_valid():
+                    lanes.append(Shipment(rfq=rfq, **serializer.validated_data))
+                else:
+                    failed += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"row": row_number, "errors": serializer.errors})
+            # bulk_create skips Shipment.save() and its signals; summaries/version are refreshed once below
+            Shipment.objects.bulk_create(lanes, batch_size=CHUNK_SIZE)
+            created += len(lanes)
+
+        if created:
+            summaries.refresh_rfq(rfq.pk)
+            bump_rfq_version(pk=rfq.pk)
+
+    return {"created": created, "failed": failed, "errors": errors}
@@ -0,0 +1,58 @@
+import statistics
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from apps.rfqs.models import Bid
+from apps.rfqs.pdf_service import ENGINES, generate_contract_pdf, sample_contract_bid
+
+
+class Command(BaseCommand):
+    help = "Compare per-contract latency and memory of the contract PDF engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine', action='append', dest='engines', choices=sorted(ENGINES),
+                            help="Engine to benchmark (repeatable). Defaults to all of them.")
+        parser.add_argument('--iterations', type=int, default=50, help="Timed renders per engine.")
+        parser.add_argument('--bid', type=int, help="Render this stored bid instead of an in-memory sample.")
+
+    def sample_bid(self, bid_id):
+        if not bid_id:
+            return sample_contract_bid()
+        try:
+            return Bid.objects.select_related('shipment__rfq__created_by', 'vendor').get(pk=bid_id)
+        except Bid.DoesNotExist:
+            raise CommandError(f"Bid {bid_id} does not exist.")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError("--iterations must be at least 1.")
+        bid = self.sample_bid(options['bid'])
+
+        self.stdout.write(f"{'engine':<10} {'cold ms':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} "
+                          f"{'peak KiB':>10} {'size KiB':>9}")
+        for engine in options['engines'] or sorted(ENGINES):
+            # The first render pays for template compilation, style setup and font loading
+            started = time.perf_counter()
+            pdf = generate_contract_pdf(bid, engine=engine)
+            cold = (time.perf_counter() - started) * 1000
+            if pdf is None:
+                raise CommandError(f"The {engine} engine failed to render the contract.")
+
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                generate_contract_pdf(bid, engine=engine)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            # Memory is measured in a separate pass, tracemalloc slows allocation-heavy code down
+            tracemalloc.start()
+            generate_contract_pdf(bid, engine=engine)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f"{engine:<10} {cold:>9.1f} {statistics.mean(timings):>9.1f} {statistics.median(timings):>9.1f} "
+                f"{p95:>9.1f} {peak / 1024:>10.0f} {pdf.size / 1024:>9.1f}"
+            )
@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import datetime
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.rfqs.models import RFQ, Shipment, Bid
+from apps.users.models import User
+
+
+def summary(values):
+    """mean/p50/p95/p99/max of `values` in ms, rounded for the report."""
+    if not values:
+        return None
+    cuts = statistics.quantiles(values, n=100) if len(values) > 1 else [values[0]] * 99
+    return {
+        'mean': round(statistics.mean(values), 2), 'p50': round(cuts[49], 2), 'p95': round(cuts[94], 2),
+        'p99': round(cuts[98], 2), 'max': round(max(values), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Load-test the realtime path: N vendor sockets per RFQ on the in-process ASGI app, bursts of bids "
+            "saved through bid_notification, and connect/fan-out latency, throughput and memory per socket.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rfqs', type=int, default=5, help="RFQs receiving bids at the same time.")
+        parser.add_argument('--vendors', type=int, default=50, help="Vendor sockets connected to each RFQ.")
+        parser.add_argument('--bursts', type=int, default=10, help="Bid bursts to send.")
+        parser.add_argument('--burst-size', type=int, default=5, help="Bids saved per RFQ in each burst.")
+        parser.add_argument('--window', type=float, default=settings.BID_BROADCAST_WINDOW,
+                            help="BID_BROADCAST_WINDOW (seconds) for this run; bids of a burst coalesce into one event.")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Seconds to wait for a burst to reach every socket.")
+        parser.add_argument('--memory-sample', type=int, default=100,
+                            help="Sockets opened in a separate tracemalloc pass to measure memory per connection.")
+        parser.add_argument('--redis', metavar='URL',
+                            help="Use channels_redis against this (local, disposable) Redis instead of the in-memory layer.")
+        parser.add_argument('--json', action='store_true', help="Print the results as one JSON object.")
+        parser.add_argument('--allow-db', action='store_true',
+                            help="Write the run's fixtures to the configured database and cache instead of a throwaway "
+                                 "test database and local cache. Never point this at production: bids fire the "
+                                 "dashboard and rollup signals.")
+
+    def handle(self, *args, **options):
+        for name in ('rfqs', 'vendors', 'bursts', 'burst_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1.")
+
+        if options['redis']:
+            layer = {"BACKEND": "channels_redis.core.RedisChannelLayer", "CONFIG": {"hosts": [options['redis']]}}
+        else:
+            layer = {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+
+        # The app's print() logging goes to stderr so --json output stays parseable
+        with contextlib.redirect_stdout(sys.stderr), contextlib.ExitStack() as isolation:
+            if not options['allow_db']:
+                isolation.enter_context(self.throwaway_database())
+            fixtures = self.create_fixtures(options['rfqs'], options['vendors'])
+            try:
+                with override_settings(CHANNEL_LAYERS={"default": layer}, BID_BROADCAST_WINDOW=options['window']):
+                    report = asyncio.run(self.run(fixtures, options))
+            finally:
+                # Cascades to the RFQs, lanes and bids created for the run
+                User.objects.filter(pk__in=[fixtures['org'].pk, *[user.pk for user in fixtures['users']]]).delete()
+
+        report['config'] = {
+            'rfqs': options['rfqs'], 'vendors_per_rfq': options['vendors'],
+            'connections': options['rfqs'] * options['vendors'], 'bursts': options['bursts'],
+            'bids_per_burst': options['burst_size'], 'window_ms': options['window'] * 1000,
+            'layer': 'redis' if options['redis'] else 'in-memory',
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+        else:
+            self.print_report(report)
+
+    @contextlib.contextmanager
+    def throwaway_database(self):
+        """
+        A fresh test database, created and destroyed the way the test runner does it, and a process-local
+        cache, so the fixtures and everything their signals write (rollups, dashboard keys, event logs)
+        never reach real data.
+        """
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set())
+        try:
+            with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                                       "LOCATION": "benchmark-websocket-fanout"}}):
+                yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def create_fixtures(self, rfq_count, vendor_count):
+        run = uuid.uuid4().hex[:8]
+        org = User.objects.create_user(f'fanout-{run}-org', role='ORG')
+        bidder = User.objects.create_user(f'fanout-{run}-bidder', role='VENDOR')
+        vendors = [User(username=f'fanout-{run}-v{i}', role='VENDOR') for i in range(vendor_count)]
+        for vendor in vendors:
+            vendor.set_unusable_password()
+        vendors = User.objects.bulk_create(vendors)
+        deadline = timezone.now() + datetime.timedelta(days=1)
+        rfqs = [RFQ.objects.create(created_by=org, title=f'Fan-out {run} #{i}', status='OPEN', deadline=deadline)
+                for i in range(rfq_count)]
+        lanes = [Shipment.objects.create(rfq=rfq, origin_port='Shanghai', destination_port='Rotterdam') for rfq in rfqs]
+        return {
+            'org': org, 'bidder': bidder, 'users': [bidder, *vendors], 'rfqs': rfqs, 'lanes': lanes,
+            # One token per vendor, shared across its RFQ sockets like a browser with several tabs
+            'tokens': [str(RefreshToken.for_user(vendor).access_token) for vendor in vendors],
+        }
+
+    async def connect(self, application, rfq, token):
+        socket = WebsocketCommunicator(application, f'/ws/rfq/{rfq.pk}/?token={token}')
+        started = time.perf_counter()
+        connected, _ = await socket.connect(timeout=10)
+        if not connected:
+            raise CommandError(f"Socket to RFQ {rfq.pk} was refused.")
+        await socket.receive_json_from(timeout=10) # snapshot
+        return socket, (time.perf_counter() - started) * 1000
+
+    async def run(self, fixtures, options):
+        from config.asgi import application
+
+        # Connect: every vendor to every RFQ, concurrently per RFQ like a tender-close rush
+        connect_ms, sockets = [], []
+        for rfq in fixtures['rfqs']:
+            results = await asyncio.gather(*[self.connect(application, rfq, token) for token in fixtures['tokens']])
+            sockets.append([socket for socket, _ in results])
+            connect_ms += [elapsed for _, elapsed in results]
+
+        save_ms, latency_ms, delivered = [], [], 0
+        expected = options['bursts'] * len(fixtures['rfqs']) * options['vendors']
+        delivery_seconds = 0.0
+        try:
+            for burst in range(options['bursts']):
+                amount = 1000 + burst # tags the burst in the payload
+                sent_at = {}
+
+                def save_burst():
+                    for rfq, lane in zip(fixtures['rfqs'], fixtures['lanes']):
+                        for _ in range(options['burst_size']):
+                            started = time.perf_counter()
+                            Bid.objects.create(shipment=lane, vendor=fixtures['bidder'], amount=amount,
+                                               transit_time_days=30, valid_until=datetime.date.today())
+                            save_ms.append((time.perf_counter() - started) * 1000)
+                            # The first commit schedules the RFQ's broadcast, so latency includes the coalescing window
+                            sent_at.setdefault(rfq.pk, time.perf_counter())
+
+                burst_started = time.perf_counter()
+                await database_sync_to_async(save_burst)()
+                received = await asyncio.gather(*[
+                    self.receive_burst(socket, rfq.pk, amount, options['timeout'])
+                    for rfq, rfq_sockets in zip(fixtures['rfqs'], sockets) for socket in rfq_sockets
+                ])
+                delivery_seconds += max([at for _, at in received if at] or [time.perf_counter()]) - burst_started
+                for rfq_id, at in received:
+                    if at:
+                        delivered += 1
+                        latency_ms.append((at - sent_at[rfq_id]) * 1000)
+        finally:
+            await asyncio.gather(*[socket.disconnect() for rfq_sockets in sockets for socket in rfq_sockets])
+
+        return {
+            'connect_ms': summary(connect_ms),
+            'memory_per_connection_kib': await self.memory_per_connection(application, fixtures, options['memory_sample']),
+            'bid_save_ms': summary(save_ms),
+            'broadcast_latency_ms': summary(latency_ms),
+            'messages': {
+                'expected': expected, 'delivered': delivered, 'lost': expected - delivered,
+                'per_second': round(delivered / delivery_seconds, 1) if delivery_seconds else None,
+            },
+        }
+
+    async def receive_burst(self, socket, rfq_id, amount, timeout):
+        """(rfq_id, perf_counter when this socket got the burst's bid_update) or (rfq_id, None) on timeout."""
+        deadline = time.perf_counter() + timeout
+        while (remaining := deadline - time.perf_counter()) > 0:
+            try:
+                event = await socket.receive_json_from(timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if event.get('type') == 'bid_update' and any(bid['amount'] == amount for bid in event['data']['bids']):
+                return rfq_id, time.perf_counter()
+        return rfq_id, None
+
+    async def memory_per_connection(self, application, fixtures, count):
+        """Separate pass: tracemalloc slows everything down, so it stays out of the timed numbers."""
+        if count < 1:
+            return None
+        rfq, tokens = fixtures['rfqs'][0], fixtures['tokens']
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        results = await asyncio.gather(*[self.connect(application, rfq, tokens[i % len(tokens)]) for i in range(count)])
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        await asyncio.gather(*[socket.disconnect() for socket, _ in results])
+        return round((after - before) / count / 1024, 1)
+
+    def print_report(self, report):
+        config, messages = report['config'], report['messages']
+        self.stdout.write(
+            f"{config['connections']} sockets ({config['rfqs']} RFQs x {config['vendors_per_rfq']} vendors), "
+            f"{config['bursts']} bursts of {config['bids_per_burst']} bids per RFQ, "
+            f"window {config['window_ms']:.0f} ms, {config['layer']} layer"
+        )
+        self.stdout.write(f"{'':<22} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for label, key in (('connect ms', 'connect_ms'), ('bid save ms', 'bid_save_ms'),
+                           ('broadcast latency ms', 'broadcast_latency_ms')):
+            row = report[key]
+            if row:
+                self.stdout.write(f"{label:<22} {row['mean']:>8.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+                                  f"{row['p99']:>8.1f} {row['max']:>8.1f}")
+        self.stdout.write(
+            f"messages: {messages['delivered']}/{messages['expected']} delivered, {messages['lost']} lost, "
+            f"{messages['per_second']} msg/s; memory per connection: {report['memory_per_connection_kib']} KiB"
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.rfqs.models import RFQ, Shipment
+from apps.rfqs.summaries import refresh_lane_summaries, refresh_rfq_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized lane and RFQ bid summaries from the Bid table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rfq', type=int, action='append', dest='rfq_ids',
+                            help="Only repair this RFQ (repeatable). Defaults to every RFQ.")
+
+    def handle(self, *args, **options):
+        rfqs = RFQ.objects.all()
+        shipments = Shipment.objects.all()
+        if options['rfq_ids']:
+            rfqs = rfqs.filter(pk__in=options['rfq_ids'])
+            shipments = shipments.filter(rfq_id__in=options['rfq_ids'])
+
+        # Two set-based UPDATEs: lanes from their bids, then RFQs from their lanes
+        with transaction.atomic():
+            lanes = refresh_lane_summaries(shipments)
+            tenders = refresh_rfq_summaries(rfqs)
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed bid summaries for {lanes} lanes across {tenders} RFQs."))
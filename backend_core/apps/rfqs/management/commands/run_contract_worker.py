@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.rfqs.jobs import claim_jobs, requeue_stale, run_job
+from apps.rfqs.render_pool import ContractRenderPool
+
+
+class Command(BaseCommand):
+    help = "Render queued contract PDFs (ContractJob) with bounded concurrency. Run as a separate process next to Daphne."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.CONTRACT_WORKER_CONCURRENCY,
+                            help="Maximum contracts rendered at the same time (one warm render process each).")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue of due jobs and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        # Threads only do the DB bookkeeping and block on the render processes; rendering never holds this GIL
+        render_pool = ContractRenderPool(concurrency)
+        job = partial(run_job, render_pool=render_pool)
+        self.stdout.write(f"Contract worker started (concurrency={concurrency}).")
+
+        running = set()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                while True:
+                    requeued = requeue_stale()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale contract jobs."))
+
+                    running = {future for future in running if not future.done()}
+                    job_ids = claim_jobs(concurrency - len(running)) if len(running) < concurrency else []
+                    for job_id in job_ids:
+                        running.add(pool.submit(job, job_id))
+
+                    if options['once'] and not job_ids and not running:
+                        break
+                    if not job_ids:
+                        time.sleep(options['poll_interval'] if not options['once'] else 0.1)
+        finally:
+            render_pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS("Contract worker stopped."))
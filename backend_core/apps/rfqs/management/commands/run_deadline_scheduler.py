@@ -0,0 +1,70 @@
+import asyncio
+import heapq
+import time
+from channels.db import database_sync_to_async
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.rfqs.broadcast import broadcaster
+from apps.rfqs.deadlines import SCHEDULER_GROUP, close_if_due, upcoming_deadlines
+
+
+class Command(BaseCommand):
+    help = "Close OPEN RFQs the moment their deadline passes. Run as a separate process next to Daphne."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resync', type=float, default=settings.RFQ_DEADLINE_RESYNC_SECONDS,
+                            help="Seconds between reloads of the deadline queue from the database (safety net for missed notices).")
+        parser.add_argument('--once', action='store_true',
+                            help="Close every RFQ already past its deadline and exit (e.g. from cron).")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options['resync'], options['once']))
+
+    async def run(self, resync, once):
+        # Close events go out on this loop
+        broadcaster.attach(asyncio.get_running_loop())
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        heap, next_resync = [], 0.0
+        if isinstance(layer, InMemoryChannelLayer) and resync > settings.RFQ_DEADLINE_LOCAL_RESYNC_SECONDS:
+            # The layer lives in this process only: deadline notices sent by the web processes never arrive
+            resync = settings.RFQ_DEADLINE_LOCAL_RESYNC_SECONDS
+            self.stderr.write(self.style.WARNING(
+                f"In-memory channel layer: deadline changes are not pushed to this process (set REDIS_URL). "
+                f"Reloading deadlines from the database every {resync:g}s instead."
+            ))
+        self.stdout.write("Deadline scheduler started.")
+
+        try:
+            while True:
+                if time.monotonic() >= next_resync:
+                    # Re-joining also renews the group membership before the layer expires it
+                    await layer.group_add(SCHEDULER_GROUP, channel)
+                    heap = await database_sync_to_async(upcoming_deadlines)() # sorted, so already a heap
+                    next_resync = time.monotonic() + resync
+
+                while heap and heap[0][0] <= timezone.now():
+                    _, rfq_id = heapq.heappop(heap)
+                    # No-op when the entry is stale (deadline moved, RFQ closed or awarded meanwhile)
+                    if await database_sync_to_async(close_if_due)(rfq_id):
+                        self.stdout.write(f"Closed RFQ #{rfq_id} at its deadline.")
+                if once:
+                    break
+
+                # Sleep until the next deadline, a deadline notice, or the next resync
+                timeout = next_resync - time.monotonic()
+                if heap:
+                    timeout = min(timeout, (heap[0][0] - timezone.now()).total_seconds())
+                try:
+                    notice = await asyncio.wait_for(layer.receive(channel), timeout=max(timeout, 0))
+                except asyncio.TimeoutError:
+                    continue
+                heapq.heappush(heap, (parse_datetime(notice['deadline']), notice['rfq_id']))
+        finally:
+            await layer.group_discard(SCHEDULER_GROUP, channel)
+            await broadcaster.drain()
+
+        self.stdout.write(self.style.SUCCESS("Deadline scheduler stopped."))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0009_shipment_title_alter_shipment_container_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfq',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_latest_winner_per_shipment(apps, schema_editor):
+    # Admin edits could leave several winners on a lane; keep the most recent one so the unique constraint can be added
+    Bid = apps.get_model('rfqs', 'Bid')
+    seen = set()
+    stale = []
+    for bid_id, shipment_id in Bid.objects.filter(is_winner=True).order_by('shipment_id', '-id').values_list('id', 'shipment_id'):
+        if shipment_id in seen:
+            stale.append(bid_id)
+        seen.add(shipment_id)
+    Bid.objects.filter(id__in=stale).update(is_winner=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0010_rfq_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['vendor', 'is_winner'], name='bid_vendor_winner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['shipment', 'amount'], name='bid_shipment_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['vendor', 'created_at'], name='bid_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['status', '-created_at'], name='rfq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['created_by', '-created_at'], name='rfq_owner_created_idx'),
+        ),
+        migrations.RunPython(keep_latest_winner_per_shipment, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bid',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_winner', True)), fields=('shipment',), name='bid_one_winner_per_shipment'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:20
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_summaries(apps, schema_editor):
+    # Same set-based UPDATEs as `manage.py refresh_bid_summaries`, against the historical models
+    Bid = apps.get_model('rfqs', 'Bid')
+    Shipment = apps.get_model('rfqs', 'Shipment')
+    RFQ = apps.get_model('rfqs', 'RFQ')
+
+    def aggregate(queryset, group_field, expression):
+        return Subquery(
+            queryset.filter(**{group_field: OuterRef('pk')}).order_by()
+            .values(group_field).annotate(value=expression).values('value')[:1]
+        )
+
+    bids = Bid.objects.all()
+    Shipment.objects.update(
+        bid_count=Coalesce(aggregate(bids, 'shipment', Count('id')), Value(0)),
+        lowest_bid_amount=aggregate(bids, 'shipment', Min('amount')),
+        best_transit_days=aggregate(bids, 'shipment', Min('transit_time_days')),
+        last_bid_at=aggregate(bids, 'shipment', Max('created_at')),
+    )
+    lanes = Shipment.objects.all()
+    RFQ.objects.update(
+        lane_count=Coalesce(aggregate(lanes, 'rfq', Count('id')), Value(0)),
+        bid_count=Coalesce(aggregate(lanes, 'rfq', Sum('bid_count', output_field=IntegerField())), Value(0)),
+        lowest_bid_amount=aggregate(lanes, 'rfq', Min('lowest_bid_amount')),
+        best_transit_days=aggregate(lanes, 'rfq', Min('best_transit_days')),
+        last_bid_at=aggregate(lanes, 'rfq', Max('last_bid_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0011_procurement_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfq',
+            name='best_transit_days',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rfq',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rfq',
+            name='lane_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='rfq',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rfq',
+            name='lowest_bid_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='best_transit_days',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='lowest_bid_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
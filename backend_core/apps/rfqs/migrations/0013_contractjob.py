@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0012_bid_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up before this time (retry backoff)')),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contract_jobs', to='rfqs.bid')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='contractjob_due_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('bid',), name='contractjob_one_active_per_bid')],
+            },
+        ),
+    ]
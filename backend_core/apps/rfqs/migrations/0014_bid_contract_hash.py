@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0013_contractjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='contract_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
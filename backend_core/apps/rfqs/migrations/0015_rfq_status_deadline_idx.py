@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0014_bid_contract_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['status', 'deadline'], name='rfq_status_deadline_idx'),
+        ),
+    ]
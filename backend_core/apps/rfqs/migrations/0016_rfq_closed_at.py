@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_closed_at(apps, schema_editor):
+    # No record of when existing tenders closed: date them at their deadline
+    RFQ = apps.get_model('rfqs', 'RFQ')
+    RFQ.objects.filter(status='CLOSED', closed_at__isnull=True).update(closed_at=F('deadline'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0015_rfq_status_deadline_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfq',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_closed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:10
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_awarded_at(apps, schema_editor):
+    # No record of when existing winners were picked: date them when their RFQ closed, else when they were placed
+    Bid = apps.get_model('rfqs', 'Bid')
+    RFQ = apps.get_model('rfqs', 'RFQ')
+    closed_at = RFQ.objects.filter(shipments=OuterRef('shipment_id')).values('closed_at')[:1]
+    Bid.objects.filter(is_winner=True, awarded_at__isnull=True).update(
+        awarded_at=Coalesce(Subquery(closed_at), F('created_at'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0016_rfq_closed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='awarded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_awarded_at, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.conf import settings
 
+
+def saved_fields(instance, update_fields, maintained):
+    """
+    update_fields for saving `instance`, minus the `maintained` columns when it is an existing row.
+    Those columns move with set-based UPDATEs (summaries.py, bump_rfq_version) made by other
+    transactions; writing back the copy held in memory would undo them.
+    """
+    if instance._state.adding:
+        return update_fields
+    if update_fields is None:
+        update_fields = [field.name for field in instance._meta.concrete_fields if not field.primary_key]
+    return [name for name in update_fields if name not in maintained]
+
+
 class RFQ(models.Model):
     class Status(models.TextChoices):
         DRAFT = "DRAFT", "Draft"
@@ -18,14 +33,58 @@ class RFQ(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.DRAFT)
     created_at = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField()
+    # When the RFQ last became CLOSED (deadline, award or manual); dates the daily rollups in apps/analytics
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     # Visibility Settings
     visible_target_price = models.BooleanField(default=False)
     visible_bids = models.BooleanField(default=False)
 
+    # Bumped on every RFQ / lane / bid write (see signals.py); keys the detail cache and ETags
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Never written by save(): see saved_fields()
+    MAINTAINED_FIELDS = {'version', 'lane_count', 'bid_count', 'lowest_bid_amount', 'best_transit_days', 'last_bid_at'}
+
+    # Roll-ups of the lane summaries below, maintained by summaries.py
+    lane_count = models.PositiveIntegerField(default=0, editable=False)
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    lowest_bid_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    best_transit_days = models.IntegerField(null=True, blank=True, editable=False)
+    last_bid_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Vendor feed: OPEN tenders, newest first
+            models.Index(fields=['status', '-created_at'], name='rfq_status_created_idx'),
+            # Shipper's own tenders, newest first (list + dashboard counts)
+            models.Index(fields=['created_by', '-created_at'], name='rfq_owner_created_idx'),
+            # Deadline scheduler: OPEN tenders by deadline
+            models.Index(fields=['status', 'deadline'], name='rfq_status_deadline_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the close date as loaded: reopening or re-closing moves the RFQ between rollup days
+        if 'closed_at' in field_names:
+            instance._loaded_closed_at = instance.closed_at
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.status == self.Status.CLOSED:
+            self.closed_at = self.closed_at or timezone.now()
+        else:
+            self.closed_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            update_fields = {*update_fields, 'closed_at'}
+        kwargs['update_fields'] = saved_fields(self, update_fields, self.MAINTAINED_FIELDS)
+        super().save(*args, **kwargs)
+
 class Shipment(models.Model):
     """A specific lane within an RFQ."""
     rfq = models.ForeignKey(RFQ, related_name="shipments", on_delete=models.CASCADE)
@@ -39,8 +98,27 @@ class Shipment(models.Model):
     volume = models.IntegerField(default=1)
     target_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    # Never written by save(): see saved_fields()
+    MAINTAINED_FIELDS = {'bid_count', 'lowest_bid_amount', 'best_transit_days', 'last_bid_at'}
+
+    # Bid summary for this lane, kept in step with its bids by summaries.py
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    lowest_bid_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    best_transit_days = models.IntegerField(null=True, blank=True, editable=False)
+    last_bid_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     def __str__(self):
         return f"{self.title or 'Lane'} : {self.origin_port} to {self.destination_port}"
+
+    # Atomic so the RFQ lane count (updated from post_save/post_delete) commits with the lane itself
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = saved_fields(self, kwargs.get('update_fields'), self.MAINTAINED_FIELDS)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
     
 class Bid(models.Model):
     # --- NEW: Counter Offer Status Choices ---
@@ -67,9 +145,92 @@ class Bid(models.Model):
     
     # --- NEW: Field to store the generated PDF Contract ---
     contract_file = models.FileField(upload_to='contracts/', blank=True, null=True)
+    # Fingerprint of everything printed on contract_file (see pdf_service.contract_hash); a match means it can be reused
+    contract_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     is_winner = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # When the bid was last awarded (None while it isn't the winner); dates awards and spend in the daily rollups
+    awarded_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Vendor's active/won bid counts
+            models.Index(fields=['vendor', 'is_winner'], name='bid_vendor_winner_idx'),
+            # Lowest bid per lane / lane ranking
+            models.Index(fields=['shipment', 'amount'], name='bid_shipment_amount_idx'),
+            # Vendor's bids per day (analytics chart)
+            models.Index(fields=['vendor', 'created_at'], name='bid_vendor_created_idx'),
+        ]
+        constraints = [
+            # A lane can only ever have one awarded bid (partial unique index, also serves winner lookups)
+            models.UniqueConstraint(
+                fields=['shipment'], condition=models.Q(is_winner=True), name='bid_one_winner_per_shipment'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Bid {self.amount} by {self.vendor.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the terms as loaded, so summaries.py only recomputes a lane when they actually change
+        if {'shipment_id', 'amount', 'transit_time_days'}.issubset(field_names):
+            instance._loaded_terms = instance.summary_terms()
+        # Likewise the award date: re-awarding or un-awarding moves the bid between rollup days
+        if 'awarded_at' in field_names:
+            instance._loaded_awarded_at = instance.awarded_at
+        return instance
+
+    def summary_terms(self):
+        return (self.shipment_id, self.amount, self.transit_time_days)
+
+    # Atomic so the lane/RFQ summaries (updated from post_save/post_delete) commit with the bid itself
+    def save(self, *args, **kwargs):
+        self.awarded_at = (self.awarded_at or timezone.now()) if self.is_winner else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'is_winner' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'awarded_at'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+class ContractJob(models.Model):
+    """
+    Durable queue entry for rendering an awarded bid's contract PDF.
+    Picked up by `manage.py run_contract_worker`; see jobs.py.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    bid = models.ForeignKey(Bid, related_name="contract_jobs", on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time (retry backoff)")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker poll: next due pending jobs
+            models.Index(fields=['status', 'run_after'], name='contractjob_due_idx'),
+        ]
+        constraints = [
+            # Deduplication: at most one queued or running job per bid
+            models.UniqueConstraint(
+                fields=['bid'], condition=models.Q(status__in=['PENDING', 'RUNNING']), name='contractjob_one_active_per_bid'
+            ),
+        ]
 
     def __str__(self):
-        return f"Bid {self.amount} by {self.vendor.username}"
\ No newline at end of file
+        return f"Contract job #{self.id} for Bid #{self.bid_id} ({self.status})"
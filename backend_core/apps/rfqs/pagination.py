@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RFQCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pagination for the RFQ list.
+    Cursors stay stable while new tenders are being published, unlike page numbers.
+    The nested tree (?expand=shipments) is paginated the same way: at most max_page_size RFQs per
+    response, follow `next` for the rest. Whole-account figures belong to /analytics/stats/ instead.
+    """
+    ordering = '-created_at'
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
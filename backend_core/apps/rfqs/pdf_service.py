@@ -1,230 +1,384 @@
+import datetime
+import hashlib
 import io
+import json
+from decimal import Decimal
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.base import ContentFile
-from xhtml2pdf import pisa
+from django.template.loader import get_template
 from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xhtml2pdf import pisa
 
-def generate_contract_pdf(bid):
-    rfq = bid.shipment.rfq
-    org = rfq.created_by
-    vendor = bid.vendor
-    
-    # Format the date and money to look professional
-    current_date = timezone.now().strftime('%B %d, %Y')
-    formatted_amount = f"{bid.amount:,.2f}"
-    
-    # Calculate a mock percentage for the visual cost bar
-    base_cost_pct = 80
-    surcharge_pct = 20
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            @page {{
-                size: a4 portrait;
-                margin: 1.5cm 2cm 2cm 2cm;
-                @frame footer_frame {{
-                    -pdf-frame-content: footer_content;
-                    left: 2cm; right: 2cm; bottom: 1cm; height: 1.5cm;
-                }}
-            }}
-            body {{ 
-                font-family: Helvetica, Arial, sans-serif; 
-                font-size: 11px; 
-                color: #1e293b; 
-                line-height: 1.5;
-            }}
-            
-            /* --- HEADER & LOGO --- */
-            .header-table {{ width: 100%; border-bottom: 2px solid #e2e8f0; padding-bottom: 15px; margin-bottom: 25px; }}
-            .logo {{ font-size: 32px; font-weight: 900; color: #0f172a; margin: 0; letter-spacing: -1px; }}
-            .logo-os {{ color: #ea580c; }} /* Primary Orange */
-            .doc-type {{ font-size: 10px; color: #64748b; text-transform: uppercase; letter-spacing: 1.5px; text-align: right; font-weight: bold; }}
-            .doc-ref {{ font-size: 16px; font-weight: bold; color: #0f172a; text-align: right; margin-top: 5px; }}
-            .doc-date {{ font-size: 12px; color: #ea580c; text-align: right; font-weight: bold; margin-top: 5px; }} /* Primary Orange */
-            
-            /* --- TWO COLUMN PARTIES --- */
-            .parties-table {{ width: 100%; margin-bottom: 30px; }}
-            .party-box {{ background-color: #f8fafc; padding: 20px; border-left: 4px solid #cbd5e1; }}
-            .party-box.vendor {{ border-left: 4px solid #ea580c; background-color: #fff7ed; }} /* Light Orange BG, Dark Orange Border */
-            .party-spacer {{ width: 4%; }}
-            .party-title {{ font-size: 9px; color: #64748b; text-transform: uppercase; margin-bottom: 10px; font-weight: bold; letter-spacing: 0.5px; }}
-            .party-title.vendor-title {{ color: #c2410c; }}
-            .party-name {{ font-size: 16px; font-weight: bold; color: #0f172a; margin-bottom: 4px; }}
-            .party-name.vendor-name {{ color: #ea580c; }}
-            .party-sub {{ font-size: 11px; color: #475569; margin-bottom: 2px; }}
-
-            /* --- METRICS / ANALYTICS BAR --- */
-            .section-title {{ font-size: 13px; font-weight: bold; color: #0f172a; border-bottom: 1px solid #cbd5e1; padding-bottom: 6px; margin-bottom: 15px; text-transform: uppercase; letter-spacing: 1px; }}
-            
-            .metrics-table {{ width: 100%; margin-bottom: 25px; background-color: #ffffff; border-collapse: collapse; }}
-            .metric-box {{ text-align: center; padding: 18px 10px; border: 1px solid #e2e8f0; width: 33.33%; }}
-            .metric-box.highlight {{ background-color: #fff7ed; border: 1px solid #fdba74; }} /* Orange Tint */
-            .metric-label {{ font-size: 9px; color: #64748b; text-transform: uppercase; font-weight: bold; letter-spacing: 0.5px; }}
-            .metric-value {{ font-size: 22px; font-weight: bold; color: #0f172a; margin-top: 6px; }}
-            .metric-value.orange {{ color: #ea580c; }}
-            .metric-sub {{ font-size: 10px; color: #94a3b8; margin-top: 4px; }}
-
-            /* --- VISUAL TIMELINE (CSS CHART) --- */
-            .timeline-table {{ width: 100%; margin-bottom: 35px; border-collapse: collapse; text-align: center; }}
-            .timeline-line {{ border-top: 2px dashed #cbd5e1; padding-top: 10px; width: 40%; }}
-            .timeline-node {{ width: 20%; font-weight: bold; color: #0f172a; font-size: 14px; }}
-            .timeline-label {{ font-size: 9px; color: #64748b; text-transform: uppercase; margin-top: 4px; }}
-
-            /* --- SCOPE OF WORK --- */
-            .details-table {{ width: 100%; border-collapse: collapse; margin-bottom: 35px; }}
-            .details-table th, .details-table td {{ padding: 14px 15px; text-align: left; border-bottom: 1px solid #e2e8f0; }}
-            .details-table th {{ background-color: #f8fafc; color: #475569; font-size: 10px; text-transform: uppercase; font-weight: bold; width: 35%; }}
-            .details-table td {{ font-size: 12px; color: #0f172a; font-weight: bold; }}
-
-            /* --- FINANCIAL ANALYTICS & TOTALS --- */
-            .finance-chart-table {{ width: 100%; margin-bottom: 15px; border-collapse: collapse; }}
-            .bar-base {{ background-color: #0f172a; height: 8px; }} /* Dark Slate */
-            .bar-surcharge {{ background-color: #fb923c; height: 8px; }} /* Bright Orange */
-            .legend {{ font-size: 9px; color: #64748b; text-transform: uppercase; padding-top: 5px; }}
-
-            .financials-table {{ width: 100%; border-collapse: collapse; margin-bottom: 10px; border: 1px solid #e2e8f0; }}
-            .financials-table th {{ background-color: #f8fafc; color: #475569; padding: 14px 15px; text-align: left; font-size: 10px; text-transform: uppercase; letter-spacing: 1px; }}
-            .financials-table td {{ padding: 14px 15px; border-bottom: 1px solid #e2e8f0; font-size: 12px; color: #0f172a; }}
-            .total-row td {{ background-color: #fff7ed; border-bottom: none; font-size: 20px; color: #ea580c; text-align: right; font-weight: bold; padding: 20px 15px; }}
-            .total-label {{ text-align: left !important; font-size: 14px !important; color: #c2410c !important; text-transform: uppercase; }}
-
-            /* --- FOOTER --- */
-            .footer-text {{ font-size: 9px; color: #94a3b8; text-align: center; border-top: 1px solid #e2e8f0; padding-top: 10px; line-height: 1.5; }}
-        </style>
-    </head>
-    <body>
-        
-        <table class="header-table">
-            <tr>
-                <td style="width: 50%; vertical-align: bottom;">
-                    <div class="logo">Freight<span class="logo-os">OS</span></div>
-                </td>
-                <td style="width: 50%; vertical-align: bottom;">
-                    <div class="doc-type">Digital Freight Agreement</div>
-                    <div class="doc-ref">REF: BID-{bid.id}-RFQ-{rfq.id}</div>
-                    <div class="doc-date">Executed on: {current_date}</div>
-                </td>
-            </tr>
-        </table>
-        
-        <table class="parties-table" cellspacing="0" cellpadding="0">
-            <tr>
-                <td class="party-box" style="width: 48%;">
-                    <div class="party-title">Shipper / Awarding Party</div>
-                    <div class="party-name">{org.company_name or org.username}</div>
-                    <div class="party-sub">Account: Organization</div>
-                    <div class="party-sub">Contact: {org.email}</div>
-                </td>
-                <td class="party-spacer"></td>
-                <td class="party-box vendor" style="width: 48%;">
-                    <div class="party-title vendor-title">Carrier / Executing Party</div>
-                    <div class="party-name vendor-name">{vendor.company_name or vendor.username}</div>
-                    <div class="party-sub">Account: Verified Vendor</div>
-                    <div class="party-sub">Contact: {vendor.email}</div>
-                </td>
-            </tr>
-        </table>
-
-        <div class="section-title">Logistics Overview & Timeline</div>
-        <table class="metrics-table">
-            <tr>
-                <td class="metric-box">
-                    <div class="metric-label">Estimated Transit</div>
-                    <div class="metric-value">{bid.transit_time_days}</div>
-                    <div class="metric-sub">Total Days</div>
-                </td>
-                <td class="metric-box">
-                    <div class="metric-label">Destination Free Time</div>
-                    <div class="metric-value">{bid.free_days_demurrage}</div>
-                    <div class="metric-sub">Demurrage Days</div>
-                </td>
-                <td class="metric-box highlight">
-                    <div class="metric-label">Cargo Volume</div>
-                    <div class="metric-value orange">{bid.shipment.volume}x</div>
-                    <div class="metric-sub">{bid.shipment.container_type}</div>
-                </td>
-            </tr>
-        </table>
-
-        <table class="timeline-table">
-            <tr>
-                <td class="timeline-node">
-                    <div>{bid.shipment.origin_port}</div>
-                    <div class="timeline-label">Port of Loading</div>
-                </td>
-                <td class="timeline-line">
-                    <span style="font-size: 10px; color: #ea580c; background: #fff; padding: 0 10px; font-weight: bold;">OCEAN TRANSIT</span>
-                </td>
-                <td class="timeline-node">
-                    <div>{bid.shipment.destination_port}</div>
-                    <div class="timeline-label">Port of Discharge</div>
-                </td>
-            </tr>
-        </table>
-
-        <div class="section-title">Cargo Specifications</div>
-        <table class="details-table">
-            <tr>
-                <th>Tender Reference Title</th>
-                <td>{rfq.title}</td>
-            </tr>
-            <tr>
-                <th>Routing Requirements</th>
-                <td>Direct / Transshipment terms as per standard SLA</td>
-            </tr>
-            <tr>
-                <th>Equipment Type</th>
-                <td>Standard {bid.shipment.container_type} Dry Van Containers</td>
-            </tr>
-        </table>
-
-        <div class="section-title">Financial Breakdown & Analytics</div>
-        
-        <table class="finance-chart-table">
-            <tr>
-                <td class="bar-base" style="width: {base_cost_pct}%;"></td>
-                <td class="bar-surcharge" style="width: {surcharge_pct}%;"></td>
-            </tr>
-            <tr>
-                <td class="legend" style="text-align: left;">■ Base Freight ({base_cost_pct}%)</td>
-                <td class="legend" style="text-align: right;">■ Est. Surcharges ({surcharge_pct}%)</td>
-            </tr>
-        </table>
-
-        <table class="financials-table">
-            <tr>
-                <th>Line Item Description</th>
-                <th style="text-align: right;">Amount</th>
-            </tr>
-            <tr>
-                <td><strong>Ocean Freight Rate</strong><br/><span style="font-size: 10px; color:#64748b;">Includes base routing from POL to POD for {bid.shipment.volume} containers.</span></td>
-                <td style="text-align: right; vertical-align: top;">Included</td>
-            </tr>
-            <tr class="total-row">
-                <td class="total-label">Total Contract Value</td>
-                <td>{bid.currency} ${formatted_amount}</td>
-            </tr>
-        </table>
-        
-        <div id="footer_content">
-            <div class="footer-text">
-                <strong>SECURE DIGITAL AGREEMENT</strong><br>
-                This document was automatically generated by the FreightOS Procurement Engine.<br>
-                By executing the "Award Contract" action on the platform, both parties have digitally agreed to the terms outlined above. No further physical signature is required to commence logistics operations.<br>
-                <em>Document Hash ID: {bid.id}-{rfq.id}-{current_date}</em>
-            </div>
-        </div>
-        
-    </body>
-    </html>
+def contract_filename(rfq_id, bid_id):
+    return f'FreightOS_Contract_RFQ{rfq_id}_BID{bid_id}.pdf'
+
+
+def execution_date(bid):
+    """The "Executed on" date: the day the bid was awarded (today for bids that never were, e.g. previews)."""
+    return timezone.localdate(bid.awarded_at) if bid.awarded_at else timezone.localdate()
+
+
+def contract_hash(bid, engine=None):
     """
-    
+    SHA-256 over every input that ends up on the contract: bid terms, both parties, the lane, the
+    execution date, the engine and CONTRACT_TEMPLATE_VERSION. Re-awarding identical terms on the same
+    day reuses the stored document; a later award prints, and hashes, its own date.
+    """
+    shipment = bid.shipment
+    rfq = shipment.rfq
+    inputs = [
+        settings.CONTRACT_TEMPLATE_VERSION, engine or settings.CONTRACT_PDF_ENGINE,
+        bid.id, str(bid.amount), bid.currency, bid.transit_time_days, bid.free_days_demurrage,
+        execution_date(bid).isoformat(),
+        rfq.id, rfq.title,
+        shipment.origin_port, shipment.destination_port, shipment.container_type, shipment.volume,
+        *[(party.id, party.company_name or party.username, party.email) for party in (rfq.created_by, bid.vendor)],
+    ]
+    return hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()
+
+
+def contract_context(bid):
+    """Values shared by both contract engines, so they print the same agreement."""
+    rfq = bid.shipment.rfq
+    return {
+        'bid': bid,
+        'rfq': rfq,
+        'org': rfq.created_by,
+        'vendor': bid.vendor,
+        # Format the date and money to look professional
+        'current_date': execution_date(bid).strftime('%B %d, %Y'),
+        'formatted_amount': f"{bid.amount:,.2f}",
+        # Calculate a mock percentage for the visual cost bar
+        'base_cost_pct': 80,
+        'surcharge_pct': 20,
+    }
+
+
+@lru_cache(maxsize=None)
+def _html_template():
+    # 🚀 Compiled once per process instead of rebuilding a 200-line f-string for every contract
+    return get_template('rfqs/contract.html')
+
+
+def render_html_contract(context):
+    html_content = _html_template().render(context)
     result = io.BytesIO()
     pdf = pisa.pisaDocument(io.BytesIO(html_content.encode("UTF-8")), result)
-    
-    if not pdf.err:
-        return ContentFile(result.getvalue(), name=f'FreightOS_Contract_RFQ{rfq.id}_BID{bid.id}.pdf')
-    return None
\ No newline at end of file
+    if pdf.err:
+        return None
+    return result.getvalue()
+
+
+SLATE = colors.HexColor('#0f172a')
+INK = colors.HexColor('#1e293b')
+SLATE_SOFT = colors.HexColor('#475569')
+MUTED = colors.HexColor('#64748b')
+SUBTLE = colors.HexColor('#94a3b8')
+RULE = colors.HexColor('#cbd5e1')
+BORDER = colors.HexColor('#e2e8f0')
+PANEL = colors.HexColor('#f8fafc')
+ORANGE = colors.HexColor('#ea580c')
+ORANGE_DARK = colors.HexColor('#c2410c')
+ORANGE_BRIGHT = colors.HexColor('#fb923c')
+ORANGE_EDGE = colors.HexColor('#fdba74')
+ORANGE_TINT = colors.HexColor('#fff7ed')
+
+
+@lru_cache(maxsize=None)
+def _reportlab_styles():
+    """Paragraph styles for the native engine, built once and shared by every render."""
+    def style(name, size, color=INK, bold=False, **kwargs):
+        return ParagraphStyle(
+            name, fontName='Helvetica-Bold' if bold else 'Helvetica', fontSize=size,
+            leading=kwargs.pop('leading', size * 1.3), textColor=color, **kwargs,
+        )
+
+    return {
+        'logo': style('logo', 24, SLATE, bold=True, leading=28),
+        'doc_type': style('doc_type', 7.5, MUTED, bold=True, alignment=TA_RIGHT),
+        'doc_ref': style('doc_ref', 12, SLATE, bold=True, alignment=TA_RIGHT, spaceBefore=3),
+        'doc_date': style('doc_date', 9, ORANGE, bold=True, alignment=TA_RIGHT, spaceBefore=3),
+        'party_title': style('party_title', 7, MUTED, bold=True, spaceAfter=6),
+        'vendor_title': style('vendor_title', 7, ORANGE_DARK, bold=True, spaceAfter=6),
+        'party_name': style('party_name', 12, SLATE, bold=True, spaceAfter=3),
+        'vendor_name': style('vendor_name', 12, ORANGE, bold=True, spaceAfter=3),
+        'party_sub': style('party_sub', 8.25, SLATE_SOFT),
+        'section': style('section', 10, SLATE, bold=True),
+        'metric_label': style('metric_label', 7, MUTED, bold=True, alignment=TA_CENTER),
+        'metric_value': style('metric_value', 16.5, SLATE, bold=True, alignment=TA_CENTER, spaceBefore=4),
+        'metric_orange': style('metric_orange', 16.5, ORANGE, bold=True, alignment=TA_CENTER, spaceBefore=4),
+        'metric_sub': style('metric_sub', 7.5, SUBTLE, alignment=TA_CENTER, spaceBefore=2),
+        'node': style('node', 10.5, SLATE, bold=True, alignment=TA_CENTER),
+        'node_label': style('node_label', 7, MUTED, alignment=TA_CENTER, spaceBefore=2),
+        'transit': style('transit', 7.5, ORANGE, bold=True, alignment=TA_CENTER),
+        'th': style('th', 7.5, SLATE_SOFT, bold=True),
+        'th_right': style('th_right', 7.5, SLATE_SOFT, bold=True, alignment=TA_RIGHT),
+        'td': style('td', 9, SLATE, bold=True),
+        'cell': style('cell', 9, SLATE),
+        'cell_right': style('cell_right', 9, SLATE, alignment=TA_RIGHT),
+        'note': style('note', 7.5, MUTED),
+        'legend': style('legend', 7, MUTED),
+        'legend_right': style('legend_right', 7, MUTED, alignment=TA_RIGHT),
+        'total_label': style('total_label', 10.5, ORANGE_DARK, bold=True),
+        'total': style('total', 15, ORANGE, bold=True, alignment=TA_RIGHT, leading=18),
+        'footer': style('footer', 7, SUBTLE, alignment=TA_CENTER, leading=10),
+    }
+
+
+def _section(title, styles):
+    return [
+        Paragraph(title.upper(), styles['section']),
+        HRFlowable(width='100%', thickness=0.75, color=RULE, spaceBefore=3, spaceAfter=11),
+    ]
+
+
+def render_reportlab_contract(context):
+    """Draws the same agreement as contract.html straight onto ReportLab flowables, skipping HTML and CSS parsing."""
+    styles = _reportlab_styles()
+    bid, rfq, org, vendor = context['bid'], context['rfq'], context['org'], context['vendor']
+    shipment = bid.shipment
+    current_date = context['current_date']
+
+    result = io.BytesIO()
+    doc = SimpleDocTemplate(
+        result, pagesize=A4, leftMargin=2 * cm, rightMargin=2 * cm, topMargin=1.5 * cm, bottomMargin=3 * cm,
+        title=f"FreightOS Contract BID-{bid.id}-RFQ-{rfq.id}",
+    )
+    width = doc.width
+
+    def footer(canvas, _doc):
+        text = Paragraph(
+            "<b>SECURE DIGITAL AGREEMENT</b><br/>"
+            "This document was automatically generated by the FreightOS Procurement Engine.<br/>"
+            "By executing the \"Award Contract\" action on the platform, both parties have digitally agreed to the "
+            "terms outlined above. No further physical signature is required to commence logistics operations.<br/>"
+            f"<i>Document Hash ID: {bid.id}-{rfq.id}-{current_date}</i>",
+            styles['footer'],
+        )
+        _, height = text.wrap(width, 2 * cm)
+        canvas.saveState()
+        canvas.setStrokeColor(BORDER)
+        canvas.setLineWidth(0.75)
+        canvas.line(doc.leftMargin, cm + height + 6, doc.leftMargin + width, cm + height + 6)
+        text.drawOn(canvas, doc.leftMargin, cm)
+        canvas.restoreState()
+
+    def party(box_title, name, sub_title, email, vendor_side=False):
+        return [
+            Paragraph(box_title, styles['vendor_title' if vendor_side else 'party_title']),
+            Paragraph(escape(name), styles['vendor_name' if vendor_side else 'party_name']),
+            Paragraph(f"Account: {sub_title}", styles['party_sub']),
+            Paragraph(f"Contact: {escape(email or '')}", styles['party_sub']),
+        ]
+
+    def metric(label, value, sub, highlight=False):
+        return [
+            Paragraph(label, styles['metric_label']),
+            Paragraph(escape(str(value)), styles['metric_orange' if highlight else 'metric_value']),
+            Paragraph(escape(str(sub)), styles['metric_sub']),
+        ]
+
+    header = Table([[
+        Paragraph('Freight<font color="#ea580c">OS</font>', styles['logo']),
+        [
+            Paragraph('DIGITAL FREIGHT AGREEMENT', styles['doc_type']),
+            Paragraph(f"REF: BID-{bid.id}-RFQ-{rfq.id}", styles['doc_ref']),
+            Paragraph(f"Executed on: {current_date}", styles['doc_date']),
+        ],
+    ]], colWidths=[width / 2] * 2)
+    header.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 11),
+        ('LINEBELOW', (0, 0), (-1, 0), 1.5, BORDER),
+    ]))
+
+    parties = Table([[
+        party('SHIPPER / AWARDING PARTY', org.company_name or org.username, 'Organization', org.email),
+        '',
+        party('CARRIER / EXECUTING PARTY', vendor.company_name or vendor.username, 'Verified Vendor', vendor.email,
+              vendor_side=True),
+    ]], colWidths=[width * 0.48, width * 0.04, width * 0.48])
+    parties.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BACKGROUND', (0, 0), (0, 0), PANEL),
+        ('BACKGROUND', (2, 0), (2, 0), ORANGE_TINT),
+        ('LINEBEFORE', (0, 0), (0, 0), 3, RULE),
+        ('LINEBEFORE', (2, 0), (2, 0), 3, ORANGE),
+        ('LEFTPADDING', (0, 0), (-1, -1), 15),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+        ('TOPPADDING', (0, 0), (-1, -1), 15),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+    ]))
+
+    metrics = Table([[
+        metric('ESTIMATED TRANSIT', bid.transit_time_days, 'Total Days'),
+        metric('DESTINATION FREE TIME', bid.free_days_demurrage, 'Demurrage Days'),
+        metric('CARGO VOLUME', f"{shipment.volume}x", shipment.container_type, highlight=True),
+    ]], colWidths=[width / 3] * 3)
+    metrics.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.75, BORDER),
+        ('BACKGROUND', (2, 0), (2, 0), ORANGE_TINT),
+        ('BOX', (2, 0), (2, 0), 0.75, ORANGE_EDGE),
+        ('TOPPADDING', (0, 0), (-1, -1), 13),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 13),
+    ]))
+
+    timeline = Table([[
+        [Paragraph(escape(shipment.origin_port), styles['node']), Paragraph('PORT OF LOADING', styles['node_label'])],
+        Paragraph('OCEAN TRANSIT', styles['transit']),
+        [Paragraph(escape(shipment.destination_port), styles['node']),
+         Paragraph('PORT OF DISCHARGE', styles['node_label'])],
+    ]], colWidths=[width * 0.3, width * 0.4, width * 0.3])
+    timeline.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LINEABOVE', (1, 0), (1, 0), 1.5, RULE, None, (4, 3)),
+    ]))
+
+    details = Table([
+        [Paragraph('TENDER REFERENCE TITLE', styles['th']), Paragraph(escape(rfq.title), styles['td'])],
+        [Paragraph('ROUTING REQUIREMENTS', styles['th']),
+         Paragraph('Direct / Transshipment terms as per standard SLA', styles['td'])],
+        [Paragraph('EQUIPMENT TYPE', styles['th']),
+         Paragraph(f"Standard {escape(shipment.container_type)} Dry Van Containers", styles['td'])],
+    ], colWidths=[width * 0.35, width * 0.65])
+    details.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), PANEL),
+        ('LINEBELOW', (0, 0), (-1, -1), 0.75, BORDER),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 11),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ]))
+
+    base_pct, surcharge_pct = context['base_cost_pct'], context['surcharge_pct']
+    cost_bar = Table(
+        [['', ''], [
+            Paragraph(f"■ BASE FREIGHT ({base_pct}%)", styles['legend']),
+            Paragraph(f"■ EST. SURCHARGES ({surcharge_pct}%)", styles['legend_right']),
+        ]],
+        colWidths=[width * base_pct / 100, width * surcharge_pct / 100], rowHeights=[6, None],
+    )
+    cost_bar.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, 0), SLATE),
+        ('BACKGROUND', (1, 0), (1, 0), ORANGE_BRIGHT),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ]))
+
+    financials = Table([
+        [Paragraph('LINE ITEM DESCRIPTION', styles['th']), Paragraph('AMOUNT', styles['th_right'])],
+        [
+            [Paragraph('<b>Ocean Freight Rate</b>', styles['cell']),
+             Paragraph(f"Includes base routing from POL to POD for {shipment.volume} containers.", styles['note'])],
+            Paragraph('Included', styles['cell_right']),
+        ],
+        [
+            Paragraph('TOTAL CONTRACT VALUE', styles['total_label']),
+            Paragraph(f"{escape(bid.currency)} ${context['formatted_amount']}", styles['total']),
+        ],
+    ], colWidths=[width * 0.7, width * 0.3])
+    financials.setStyle(TableStyle([
+        ('BOX', (0, 0), (-1, -1), 0.75, BORDER),
+        ('LINEBELOW', (0, 0), (-1, 1), 0.75, BORDER),
+        ('BACKGROUND', (0, 0), (-1, 0), PANEL),
+        ('BACKGROUND', (0, 2), (-1, 2), ORANGE_TINT),
+        ('VALIGN', (0, 0), (-1, 1), 'TOP'),
+        ('VALIGN', (0, 2), (-1, 2), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 11),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 11),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 2), (-1, 2), 15),
+        ('BOTTOMPADDING', (0, 2), (-1, 2), 15),
+    ]))
+
+    story = [
+        header, Spacer(1, 19),
+        parties, Spacer(1, 22),
+        *_section('Logistics Overview & Timeline', styles), metrics, Spacer(1, 19),
+        timeline, Spacer(1, 26),
+        *_section('Cargo Specifications', styles), details, Spacer(1, 26),
+        *_section('Financial Breakdown & Analytics', styles), cost_bar, Spacer(1, 11),
+        financials,
+    ]
+    doc.build(story, onFirstPage=footer, onLaterPages=footer)
+    return result.getvalue()
+
+
+ENGINES = {
+    'html': render_html_contract,
+    'reportlab': render_reportlab_contract,
+}
+
+
+def generate_contract_pdf(bid, engine=None):
+    """Render the contract PDF for `bid` with the configured engine (`settings.CONTRACT_PDF_ENGINE`)."""
+    engine = engine or settings.CONTRACT_PDF_ENGINE
+    if engine not in ENGINES:
+        raise ImproperlyConfigured(f"Unknown contract PDF engine {engine!r}; choose one of {', '.join(ENGINES)}.")
+
+    context = contract_context(bid)
+    content = ENGINES[engine](context)
+    if content is None:
+        return None
+    return ContentFile(content, name=contract_filename(context['rfq'].id, bid.id))
+
+
+def sample_contract_bid():
+    """An unsaved, fully populated bid. The renderers only read attributes, so benchmarks and warm-ups need no rows."""
+    from apps.users.models import User
+    from .models import RFQ, Shipment, Bid
+
+    org = User(id=1, username='shipper', company_name='Acme Imports', email='ops@acme.test', role='ORG')
+    vendor = User(id=2, username='carrier', company_name='Blue Ocean Lines', email='bids@blueocean.test',
+                  role='VENDOR')
+    rfq = RFQ(id=1, created_by=org, title='Asia-Europe Annual Tender 2026')
+    shipment = Shipment(id=1, rfq=rfq, origin_port='Shanghai', destination_port='Rotterdam',
+                        container_type='40HC', volume=12)
+    return Bid(id=1, shipment=shipment, vendor=vendor, amount=Decimal('48250.00'), currency='USD',
+               transit_time_days=32, free_days_demurrage=14,
+               valid_until=datetime.date.today() + datetime.timedelta(days=30))
+
+
+def generate_contract_for_bid(bid_id, render_pool=None):
+    """
+    Render the contract for an awarded bid and store it on `contract_file`. Raises on failure.
+    Skips rendering when the stored PDF was made from the same inputs (`contract_hash`).
+    With a `render_pool` (see render_pool.py) the CPU-bound rendering happens in a warm child process
+    and only the storage write runs here.
+    """
+    from .models import Bid
+
+    bid = Bid.objects.select_related('shipment__rfq__created_by', 'vendor').get(id=bid_id)
+
+    digest = contract_hash(bid)
+    if bid.contract_file and bid.contract_hash == digest and bid.contract_file.storage.exists(bid.contract_file.name):
+        # 🚀 Re-award with identical terms: the PDF on disk is already the right one
+        return bid.contract_file.name
+
+    # 🚀 THE FIX: Delete any old "ghost" file strings from the database first
+    # This ensures we don't accidentally fetch a broken URL from earlier testing
+    if bid.contract_file:
+        bid.contract_file.delete(save=False)
+
+    # Generate the new PDF content into memory
+    pdf_content_file = render_pool.render(bid) if render_pool else generate_contract_pdf(bid)
+    if not pdf_content_file:
+        raise RuntimeError("The contract PDF engine could not render the contract.")
+
+    # Save the physical file using Django's storage system
+    bid.contract_hash = digest
+    bid.contract_file.save(pdf_content_file.name, pdf_content_file, save=False)
+    bid.save(update_fields=['contract_file', 'contract_hash'])
+    return bid.contract_file.name
@@ -0,0 +1,80 @@
+"""
+Warm process pool for contract rendering.
+
+xhtml2pdf and ReportLab are pure-Python and CPU-bound, so rendering on a thread holds the GIL
+and stalls everything else in that interpreter. The pool renders in separate processes that
+import Django, compile the contract template and load fonts once at start-up. The parent only
+ships the bid in and stores the returned bytes, so DB access and file storage stay in the parent.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+
+def _warm_up():
+    # Rendering is background work; on a shared host let the web workers win the CPU
+    if hasattr(os, 'nice'):
+        os.nice(settings.CONTRACT_RENDER_NICENESS)
+
+    # Children are spawned, not forked, so they never share the parent's DB sockets
+    import django
+    django.setup()
+
+    from .pdf_service import ENGINES, generate_contract_pdf, sample_contract_bid
+    bid = sample_contract_bid()
+    for engine in ENGINES:
+        generate_contract_pdf(bid, engine=engine)
+
+
+def _ping():
+    return True
+
+
+def _render(bid, engine):
+    from .pdf_service import generate_contract_pdf
+    pdf = generate_contract_pdf(bid, engine=engine)
+    if pdf is None:
+        return None
+    return pdf.name, pdf.read()
+
+
+class ContractRenderPool:
+    """A fixed-size pool of pre-warmed rendering processes, rebuilt if a child dies."""
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._executor = self._start()
+
+    def _start(self):
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_up,
+        )
+        # Processes are spawned lazily; make them all now so the first awards don't pay the warm-up
+        wait([executor.submit(_ping) for _ in range(self.processes)])
+        return executor
+
+    def render(self, bid, engine=None):
+        """Render `bid` in a child process. Returns a ContentFile like generate_contract_pdf, or None."""
+        executor = self._executor
+        try:
+            result = executor.submit(_render, bid, engine).result()
+        except BrokenProcessPool:
+            # A child crashed (OOM, segfault in a C extension); replace the pool for the next job
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._start()
+            raise
+        if result is None:
+            return None
+        name, content = result
+        return ContentFile(content, name=name)
+
+    def shutdown(self):
+        self._executor.shutdown()
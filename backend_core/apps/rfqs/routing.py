@@ -4,4 +4,6 @@ from . import consumers
 websocket_urlpatterns = [
     # Route: ws://localhost:8000/ws/rfq/123/
     re_path(r'ws/rfq/(?P<rfq_id>\w+)/$', consumers.RFQConsumer.as_asgi()),
+    # Route: ws://localhost:8000/ws/live/?token=<JWT> (one socket per user, subscribe to any number of RFQs)
+    re_path(r'ws/live/$', consumers.LiveConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -1,5 +1,40 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import RFQ, Shipment, Bid
+from .models import RFQ, Shipment, Bid, ContractJob
+
+
+def download_action_url(request, basename, pk, which=None):
+    """Absolute URL of a viewset's `download` action; that action checks access and mints the short-lived link."""
+    url = reverse(f'{basename}-download', args=[pk]) + (f'?file={which}' if which else '')
+    return request.build_absolute_uri(url) if request else url
+
+
+class DownloadActionField(serializers.FileField):
+    """
+    Accepts uploads like FileField, but represents a stored file by its download action instead of
+    its storage URL: payloads are cached (RFQ detail cache) and shown to everyone who can see the
+    RFQ, while storage URLs are either public or presigned.
+    """
+
+    def __init__(self, basename, which=None, **kwargs):
+        self.basename, self.which = basename, which
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return download_action_url(self.context.get('request'), self.basename, value.instance.pk, self.which)
+
+
+class BidContractField(DownloadActionField):
+    """Contract link, only once the bid has won (the download action refuses it otherwise)."""
+
+    def __init__(self, **kwargs):
+        super().__init__('bid', which='contract', read_only=True, **kwargs)
+
+    def to_representation(self, value):
+        return super().to_representation(value) if value and value.instance.is_winner else None
+
 
 class BidSerializer(serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.username', read_only=True)
@@ -9,6 +44,8 @@ class BidSerializer(serializers.ModelSerializer):
     destination_port = serializers.CharField(source='shipment.destination_port', read_only=True)
     rfq_title = serializers.CharField(source='shipment.rfq.title', read_only=True)
     rfq_id = serializers.IntegerField(source='shipment.rfq.id', read_only=True)
+    file = DownloadActionField('bid', which='document', required=False, allow_null=True)
+    contract_file = BidContractField()
 
     class Meta:
         model = Bid
@@ -28,6 +65,60 @@ class BidSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Organizations cannot submit bids.")
         return data
 
+class ContractJobSerializer(serializers.ModelSerializer):
+    contract_file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ContractJob
+        fields = ['id', 'bid', 'status', 'attempts', 'max_attempts', 'last_error', 'created_at', 'finished_at', 'contract_file']
+
+    def to_representation(self, obj):
+        if obj is None:
+            # Never queued (awarded before the job queue existed): report what is on the bid
+            bid = self.context['bid']
+            return {'bid': bid.id, 'status': ContractJob.Status.DONE if bid.contract_file else None,
+                    'contract_file': self.get_contract_file(obj)}
+        return super().to_representation(obj)
+
+    def get_contract_file(self, obj):
+        bid = self.context['bid']
+        if not bid.contract_file:
+            return None
+        return download_action_url(self.context['request'], 'bid', bid.pk, 'contract')
+
+class BatchBidItemSerializer(serializers.ModelSerializer):
+    """
+    One quote inside a batch submission. `shipment` is a plain id here; BatchBidSerializer
+    checks all of them against the RFQ in a single query instead of one lookup per bid.
+    """
+    shipment = serializers.IntegerField()
+
+    class Meta:
+        model = Bid
+        fields = ['shipment', 'amount', 'currency', 'transit_time_days', 'free_days_demurrage', 'valid_until']
+
+class BatchBidSerializer(serializers.Serializer):
+    """Quotes for many lanes of one RFQ, validated together (see BidViewSet.batch)."""
+    MAX_BIDS = 2000
+
+    rfq = serializers.PrimaryKeyRelatedField(queryset=RFQ.objects.filter(status=RFQ.Status.OPEN))
+    bids = BatchBidItemSerializer(many=True, allow_empty=False, max_length=MAX_BIDS)
+
+    def validate(self, data):
+        user = self.context['request'].user
+        if user.role == 'ORG':
+            raise serializers.ValidationError("Organizations cannot submit bids.")
+
+        shipment_ids = [item['shipment'] for item in data['bids']]
+        if len(set(shipment_ids)) != len(shipment_ids):
+            raise serializers.ValidationError({"bids": "Each lane can only be quoted once per batch."})
+
+        lanes = set(Shipment.objects.filter(rfq=data['rfq'], pk__in=shipment_ids).values_list('pk', flat=True))
+        unknown = [{"index": i, "shipment": lane} for i, lane in enumerate(shipment_ids) if lane not in lanes]
+        if unknown:
+            raise serializers.ValidationError({"bids": {"detail": "Lanes do not belong to this RFQ.", "invalid": unknown}})
+        return data
+
 class ShipmentSerializer(serializers.ModelSerializer):
     my_bid = serializers.SerializerMethodField()
     all_bids = serializers.SerializerMethodField()
@@ -36,16 +127,47 @@ class ShipmentSerializer(serializers.ModelSerializer):
         model = Shipment
         fields = [
             'id', 'rfq', 'title', 'origin_port', 'destination_port', 
-            'container_type', 'volume', 'target_price', 'my_bid', 'all_bids'
+            'container_type', 'volume', 'target_price', 'my_bid', 'all_bids',
+            'bid_count', 'lowest_bid_amount', 'best_transit_days', 'last_bid_at'
         ]
 
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # Lane summary follows the same rule as all_bids: vendors only see competitor figures when "Visible Bids" is ON
+        request = self.context.get('request')
+        if request and request.user.role == 'VENDOR' and not obj.rfq.visible_bids:
+            data['lowest_bid_amount'] = None
+            data['best_transit_days'] = None
+        return data
+
+    def get_bid_index(self, obj):
+        """
+        Per-request index of this lane's bids, built once from the prefetched `bids` and shared
+        through the root serializer context, so my_bid/all_bids never go back to the database
+        and each bid is serialized only once.
+        """
+        index = self.context.setdefault('bid_index', {})
+        if obj.pk not in index:
+            bids = list(obj.bids.all())
+            by_vendor = {}
+            for bid in sorted(bids, key=lambda bid: bid.pk, reverse=True):
+                # Vendors may bid more than once on a lane; keep their first bid, as .first() did
+                by_vendor[bid.vendor_id] = bid
+            index[obj.pk] = {'bids': bids, 'by_vendor': by_vendor}
+        return index[obj.pk]
+
+    def serialize_bid(self, bid):
+        cache = self.context.setdefault('bid_data', {})
+        if bid.pk not in cache:
+            cache[bid.pk] = BidSerializer(bid, context=self.context).data
+        return cache[bid.pk]
+
     def get_my_bid(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            bid = obj.bids.filter(vendor=request.user).first()
+            bid = self.get_bid_index(obj)['by_vendor'].get(request.user.pk)
             if bid:
-                # ADD context=self.context HERE
-                return BidSerializer(bid, context=self.context).data 
+                return self.serialize_bid(bid)
         return None
 
     def get_all_bids(self, obj):
@@ -53,20 +175,22 @@ class ShipmentSerializer(serializers.ModelSerializer):
         user = request.user
         
         # 1. Admin / Org (Owner) sees all bids
-        if user.role in ['ADMIN', 'ORG']:
-            # ADD context=self.context HERE
-            return BidSerializer(obj.bids.all(), many=True, context=self.context).data
-        
         # 2. Vendor sees bids ONLY if "Visible Bids" is ON
-        if obj.rfq.visible_bids and user.role == 'VENDOR':
-            # ADD context=self.context HERE
-            return BidSerializer(obj.bids.all(), many=True, context=self.context).data
+        if user.role in ['ADMIN', 'ORG'] or (obj.rfq.visible_bids and user.role == 'VENDOR'):
+            return [self.serialize_bid(bid) for bid in self.get_bid_index(obj)['bids']]
 
         return []
 
+class LaneImportSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk lane sheet (see lane_import.py)."""
+    class Meta:
+        model = Shipment
+        fields = ['title', 'origin_port', 'destination_port', 'container_type', 'volume', 'target_price']
+
 class RFQSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     shipments = ShipmentSerializer(many=True, read_only=True)
+    file = DownloadActionField('rfq', required=False, allow_null=True)
 
     class Meta:
         model = RFQ
@@ -75,4 +199,31 @@ class RFQSerializer(serializers.ModelSerializer):
             'file', 'status', 'created_at', 'deadline', 
             'visible_target_price', 'visible_bids', 'shipments'
         ]
-        read_only_fields = ['created_by', 'created_at', 'shipments']
\ No newline at end of file
+        read_only_fields = ['created_by', 'created_at', 'shipments']
+
+class RFQListSerializer(serializers.ModelSerializer):
+    """
+    Compact, one-row-per-RFQ payload for the list route.
+    Lane/bid figures come from the RFQ roll-up columns, so no shipments or bids are loaded.
+    """
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    my_bid_count = serializers.IntegerField(read_only=True)
+    best_bid = serializers.DecimalField(source='lowest_bid_amount', max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = RFQ
+        fields = [
+            'id', 'created_by', 'created_by_username', 'title', 'status',
+            'created_at', 'deadline', 'visible_target_price', 'visible_bids',
+            'lane_count', 'bid_count', 'my_bid_count', 'best_bid', 'best_transit_days', 'last_bid_at'
+        ]
+        read_only_fields = fields
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # Same rule as ShipmentSerializer.get_all_bids: vendors only see competitor prices when "Visible Bids" is ON
+        request = self.context.get('request')
+        if request and request.user.role == 'VENDOR' and not obj.visible_bids:
+            data['best_bid'] = None
+            data['best_transit_days'] = None
+        return data
@@ -1,31 +1,132 @@
-from django.db.models.signals import post_save
+import logging
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .models import Bid
+from django.db import transaction
+from .models import RFQ, Shipment, Bid
+from .cache import bump_rfq_version, invalidate_dashboards
+from .broadcast import broadcaster
+from .deadlines import deadline_changed
+from . import summaries
+
+logger = logging.getLogger(__name__)
+
+
+def bid_event(bid, vendor=None):
+    # Ids only: never lazy-load the lane or RFQ just to announce a bid
+    return {
+        "shipment_id": bid.shipment_id,
+        "amount": float(bid.amount),
+        "vendor": (vendor or bid.vendor).username,
+    }
+
 
 @receiver(post_save, sender=Bid)
 def bid_notification(sender, instance, created, **kwargs):
     """
     Triggered whenever a new Bid is placed.
-    Sends a WebSocket message to the RFQ group.
+    Once the transaction commits, hands the bid to the broadcaster, which sends
+    one batched bid_update per RFQ to its WebSocket group.
+    """
+    if created:
+        # The lane is already cached by the serializer; its rfq_id is a column, not another query
+        rfq_id = instance.shipment.rfq_id
+        logger.debug("New bid %s: %s on shipment %s", instance.pk, instance.amount, instance.shipment_id)
+        event = bid_event(instance)
+        transaction.on_commit(lambda: broadcaster.publish(rfq_id, event))
+
+
+def notify_bid_batch(rfq_id, vendor, bids):
+    """
+    Broadcast a batch of bids (bulk_create skips post_save, so bid_notification never sees them).
+    They are coalesced with any other bids on the RFQ into the same bid_update.
     """
+    broadcaster.publish(rfq_id, *[bid_event(bid, vendor) for bid in bids])
+
+
+# ----------------------------------------------------
+# DEADLINES
+# The scheduler (run_deadline_scheduler) hears about every OPEN RFQ that is saved,
+# so new tenders and moved deadlines are in its queue without it polling the table.
+# ----------------------------------------------------
+@receiver(post_save, sender=RFQ)
+def rfq_deadline_on_save(sender, instance, **kwargs):
+    if instance.status == RFQ.Status.OPEN:
+        deadline_changed(instance)
+
+
+# ----------------------------------------------------
+# DETAIL CACHE INVALIDATION
+# Any write to an RFQ, one of its lanes or one of their bids moves the RFQ to a new
+# version, so cached detail payloads and ETags for the old version stop matching.
+# ----------------------------------------------------
+@receiver(post_save, sender=RFQ)
+def rfq_version_on_save(sender, instance, **kwargs):
+    bump_rfq_version(pk=instance.pk)
+
+@receiver(post_save, sender=Shipment)
+@receiver(post_delete, sender=Shipment)
+def shipment_version_on_change(sender, instance, **kwargs):
+    bump_rfq_version(pk=instance.rfq_id)
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_version_on_change(sender, instance, **kwargs):
+    bump_rfq_version(shipments__id=instance.shipment_id)
+
+
+# ----------------------------------------------------
+# DASHBOARD STATS
+# The owner's RFQ counts and lane breakdown and the bidding vendor's bid/award counts change with these rows.
+# ----------------------------------------------------
+@receiver(post_save, sender=RFQ)
+@receiver(post_delete, sender=RFQ)
+def rfq_dashboard_on_change(sender, instance, **kwargs):
+    invalidate_dashboards(instance.created_by_id)
+
+@receiver(post_save, sender=Shipment)
+@receiver(post_delete, sender=Shipment)
+def shipment_dashboard_on_change(sender, instance, **kwargs):
+    if Shipment.rfq.is_cached(instance):
+        owner_id = instance.rfq.created_by_id
+    else:
+        owner_id = RFQ.objects.filter(pk=instance.rfq_id).values_list('created_by_id', flat=True).first()
+    invalidate_dashboards(owner_id)
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_dashboard_on_change(sender, instance, **kwargs):
+    shipment = instance.shipment if Bid.shipment.is_cached(instance) else None
+    if shipment is not None and Shipment.rfq.is_cached(shipment):
+        owner_id = shipment.rfq.created_by_id
+    else:
+        owner_id = RFQ.objects.filter(shipments__id=instance.shipment_id).values_list('created_by_id', flat=True).first()
+    invalidate_dashboards(instance.vendor_id, owner_id)
+
+
+# ----------------------------------------------------
+# BID SUMMARIES (lowest bid, bid count, best transit, last bid)
+# Bid.save()/Shipment.save() are atomic, so these commit together with the row.
+# ----------------------------------------------------
+@receiver(post_save, sender=Bid)
+def bid_summary_on_save(sender, instance, created, **kwargs):
+    loaded_terms = getattr(instance, '_loaded_terms', None)
     if created:
-        print(f"📡 New Bid Detected: ${instance.amount} on Shipment #{instance.shipment.id}")
-        
-        channel_layer = get_channel_layer()
-        group_name = f"rfq_{instance.shipment.rfq.id}"
-
-        # Send message to the group
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                "type": "bid_update", # Matches the method name in consumers.py
-                "message": {
-                    "shipment_id": instance.shipment.id,
-                    "amount": float(instance.amount),
-                    "vendor": instance.vendor.username
-                    # FIXED: Removed the "rank" line from here!
-                }
-            }
-        )
\ No newline at end of file
+        summaries.add_bid(instance)
+    elif loaded_terms != instance.summary_terms():
+        # Amount/transit changed (edit, accepted counter-offer) or the bid moved lane
+        previous_lane = loaded_terms[0] if loaded_terms else instance.shipment_id
+        summaries.refresh_lanes(previous_lane, instance.shipment_id)
+    instance._loaded_terms = instance.summary_terms()
+
+@receiver(post_delete, sender=Bid)
+def bid_summary_on_delete(sender, instance, **kwargs):
+    summaries.refresh_lanes(instance.shipment_id)
+
+@receiver(post_save, sender=Shipment)
+def shipment_summary_on_save(sender, instance, created, **kwargs):
+    if created:
+        summaries.refresh_rfq(instance.rfq_id)
+
+@receiver(post_delete, sender=Shipment)
+def shipment_summary_on_delete(sender, instance, **kwargs):
+    summaries.refresh_rfq(instance.rfq_id)
@@ -0,0 +1,79 @@
+"""
+Denormalized bid summaries on Shipment (per lane) and RFQ (roll-up of its lanes).
+
+New bids are folded in with F-expression UPDATEs. Edits and deletes recompute just the
+affected lane from its own bids (served by the (shipment, amount) index), then roll the
+lane up into its RFQ. All of it runs from the rfqs signals inside the atomic Bid/Shipment
+save, so summaries commit or roll back together with the row that changed them.
+"""
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from .models import RFQ, Shipment, Bid
+
+
+def _aggregate(queryset, group_field, expression):
+    """Correlated subquery returning a single aggregate of `queryset` grouped by `group_field`."""
+    return Subquery(
+        queryset.filter(**{group_field: OuterRef('pk')})
+        .order_by()
+        .values(group_field)
+        .annotate(value=expression)
+        .values('value')[:1]
+    )
+
+
+def _lane_summary_values():
+    bids = Bid.objects.all()
+    return {
+        'bid_count': Coalesce(_aggregate(bids, 'shipment', Count('id')), Value(0)),
+        'lowest_bid_amount': _aggregate(bids, 'shipment', Min('amount')),
+        'best_transit_days': _aggregate(bids, 'shipment', Min('transit_time_days')),
+        'last_bid_at': _aggregate(bids, 'shipment', Max('created_at')),
+    }
+
+
+def _rfq_summary_values():
+    lanes = Shipment.objects.all()
+    return {
+        'lane_count': Coalesce(_aggregate(lanes, 'rfq', Count('id')), Value(0)),
+        'bid_count': Coalesce(_aggregate(lanes, 'rfq', Sum('bid_count', output_field=IntegerField())), Value(0)),
+        'lowest_bid_amount': _aggregate(lanes, 'rfq', Min('lowest_bid_amount')),
+        'best_transit_days': _aggregate(lanes, 'rfq', Min('best_transit_days')),
+        'last_bid_at': _aggregate(lanes, 'rfq', Max('last_bid_at')),
+    }
+
+
+def refresh_lane_summaries(shipments):
+    """Recompute the summary columns of every lane in `shipments` with one set-based UPDATE."""
+    return shipments.update(**_lane_summary_values())
+
+
+def refresh_rfq_summaries(rfqs):
+    """Recompute the RFQ roll-ups of every RFQ in `rfqs` from its (already current) lanes."""
+    return rfqs.update(**_rfq_summary_values())
+
+
+def add_bid(bid):
+    """Fold a newly created bid into its lane and RFQ without re-reading any other bids."""
+    amount = Value(bid.amount, output_field=Bid._meta.get_field('amount'))
+    transit = Value(bid.transit_time_days)
+    created_at = Value(bid.created_at, output_field=Bid._meta.get_field('created_at'))
+    changes = {
+        'bid_count': F('bid_count') + 1,
+        # Coalesce first: NULL handling of LEAST/GREATEST differs between databases
+        'lowest_bid_amount': Least(Coalesce(F('lowest_bid_amount'), amount), amount),
+        'best_transit_days': Least(Coalesce(F('best_transit_days'), transit), transit),
+        'last_bid_at': Greatest(Coalesce(F('last_bid_at'), created_at), created_at),
+    }
+    Shipment.objects.filter(pk=bid.shipment_id).update(**changes)
+    RFQ.objects.filter(shipments__id=bid.shipment_id).update(**changes)
+
+
+def refresh_lanes(*shipment_ids):
+    """Recompute the given lanes from their bids, then roll them up into their RFQs."""
+    refresh_lane_summaries(Shipment.objects.filter(pk__in=shipment_ids))
+    refresh_rfq_summaries(RFQ.objects.filter(shipments__id__in=shipment_ids))
+
+
+def refresh_rfq(rfq_id):
+    refresh_rfq_summaries(RFQ.objects.filter(pk=rfq_id))
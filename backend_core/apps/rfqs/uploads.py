@@ -0,0 +1,141 @@
+"""
+Direct-to-storage uploads for RFQ spec sheets and bid documents.
+
+1. `upload_slot` (RFQ/bid action) checks access and returns a PUT target for a fresh object key:
+   a presigned S3 `put_object` URL (Content-Type and Content-Length are signed headers, so the bucket
+   rejects any other type or size), or on local storage a signed /uploads/<token>/ URL served by
+   `receive_upload`, which mimics the presigned contract (fixed key, Content-Type, size, expiry).
+2. The browser PUTs the file there; no Django worker buffers or re-uploads it.
+3. `attach_upload` verifies the object landed with the declared size and points the FileField at it.
+"""
+import os
+import posixpath
+import uuid
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers
+
+SALT = 'rfqs.uploads'
+# How long an uploaded object may wait to be attached; the PUT itself must start within UPLOAD_SLOT_TTL
+ATTACH_MAX_AGE = 60 * 60 * 24
+
+
+class UploadSlotSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=200)
+    content_type = serializers.CharField(max_length=100, required=False, default='application/octet-stream')
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value):
+        if value > settings.UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Files are limited to {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+        return value
+
+
+def _target(instance):
+    return f"{instance._meta.label_lower}:{instance.pk}"
+
+
+def _local(storage):
+    try:
+        storage.path('')
+        return True
+    except NotImplementedError:
+        return False
+
+
+def create_upload_slot(request, instance, data):
+    """Reserve a key under the `file` field's upload_to folder and describe how to PUT to it."""
+    slot = UploadSlotSerializer(data=data)
+    slot.is_valid(raise_exception=True)
+    filename = get_valid_filename(os.path.basename(slot.validated_data['filename'])) or 'upload'
+    content_type, size = slot.validated_data['content_type'], slot.validated_data['size']
+
+    field = instance._meta.get_field('file')
+    key = posixpath.join(field.upload_to, uuid.uuid4().hex, filename)
+    token = signing.dumps(
+        {'key': key, 'type': content_type, 'size': size, 'target': _target(instance), 'user': request.user.pk},
+        salt=SALT,
+    )
+
+    storage = field.storage
+    if _local(storage):
+        url = request.build_absolute_uri(reverse('file-upload', args=[token]))
+    else:
+        # S3: the browser talks to the bucket directly (the bucket's CORS rules must allow PUT).
+        # ContentLength makes content-length a signed header: a body of any other size fails the signature.
+        url = storage.bucket.meta.client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': storage.bucket_name, 'Key': posixpath.join(storage.location, key),
+                    'ContentType': content_type, 'ContentLength': size},
+            ExpiresIn=settings.UPLOAD_SLOT_TTL,
+        )
+    return {
+        "upload": token,
+        "key": key,
+        "url": url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "expires_in": settings.UPLOAD_SLOT_TTL,
+    }
+
+
+def attach_upload(request, instance, token):
+    """Point `instance.file` at an uploaded object after checking the slot belongs to this user and object."""
+    try:
+        slot = signing.loads(token or '', salt=SALT, max_age=ATTACH_MAX_AGE)
+    except signing.BadSignature:
+        raise serializers.ValidationError({"upload": "Invalid or expired upload."})
+    if slot['target'] != _target(instance) or slot['user'] != request.user.pk:
+        raise serializers.ValidationError({"upload": "This upload belongs to a different record."})
+
+    storage = instance._meta.get_field('file').storage
+    if not storage.exists(slot['key']):
+        raise serializers.ValidationError({"upload": "The file has not been uploaded yet."})
+    if storage.size(slot['key']) != slot['size']:
+        storage.delete(slot['key'])
+        raise serializers.ValidationError({"upload": "Uploaded file size does not match the reserved slot."})
+
+    instance.file.name = slot['key']
+    instance.save(update_fields=['file'])
+    return instance.file
+
+
+class _RequestStream:
+    """Read-only file object over the request body, capped at the slot size so nothing is buffered whole."""
+
+    def __init__(self, request, limit):
+        self.request, self.remaining = request, limit
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        data = self.request.read(self.remaining if size is None or size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+@csrf_exempt
+def receive_upload(request, token):
+    """Local stand-in for the presigned S3 PUT: same expiry, key, Content-Type and size rules, S3-style status codes."""
+    if request.method != 'PUT':
+        return HttpResponseNotAllowed(['PUT'])
+    try:
+        slot = signing.loads(token, salt=SALT, max_age=settings.UPLOAD_SLOT_TTL)
+    except signing.BadSignature:
+        return HttpResponse("Request has expired or the signature does not match.", status=403)
+    if request.content_type != slot['type'].split(';')[0]:
+        return HttpResponse("Content-Type does not match the signed upload.", status=403)
+    if int(request.META.get('CONTENT_LENGTH') or 0) != slot['size']:
+        return HttpResponse("Content-Length does not match the reserved size.", status=400)
+
+    # PUT overwrites, like S3
+    if default_storage.exists(slot['key']):
+        default_storage.delete(slot['key'])
+    default_storage.save(slot['key'], File(_RequestStream(request, slot['size']), name=slot['key']))
+    return HttpResponse(status=200)
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import RFQViewSet, ShipmentViewSet, BidViewSet
+from .downloads import serve_signed_file
+from .uploads import receive_upload
 
 router = DefaultRouter()
 router.register(r'rfqs', RFQViewSet, basename='rfq')
@@ -9,4 +11,8 @@ router.register(r'bids', BidViewSet, basename='bid')
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Signed, short-lived links handed out by the download actions (no JWT: the token is the credential)
+    path('files/<str:token>/', serve_signed_file, name='file-download'),
+    # Local-storage stand-in for presigned S3 PUTs handed out by the upload_slot actions
+    path('uploads/<str:token>/', receive_upload, name='file-upload'),
 ]
\ No newline at end of file
@@ -1,29 +1,66 @@
-import threading
-import pandas as pd
 from rest_framework import viewsets, permissions, status
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.analytics import rollups
 from .models import RFQ, Shipment, Bid
-from .serializers import RFQSerializer, ShipmentSerializer, BidSerializer
+from .serializers import RFQSerializer, RFQListSerializer, ShipmentSerializer, BidSerializer, BatchBidSerializer, ContractJobSerializer
+from .pagination import RFQCursorPagination
 from .permissions import IsOrganizationOrReadOnly
-from .pdf_service import generate_contract_pdf
+from .jobs import enqueue_contracts
+from .cache import bump_rfq_version, detail_cache_key, get_cached_detail, invalidate_dashboards, set_cached_detail
+from .lane_import import import_lanes
+from .contract_pack import missing_contracts, stream_merged_pdf, stream_zip, winning_bids
+from .downloads import download_payload, streaming_response
+from .uploads import attach_upload, create_upload_slot
+from .signals import notify_bid_batch
+from .deadlines import lock_open_rfq
+from . import summaries
+
+# Tenders that were never published or were called off keep their bids un-awarded
+AWARD_REFUSED_STATUSES = (RFQ.Status.DRAFT, RFQ.Status.CANCELLED)
+
 
 class RFQViewSet(viewsets.ModelViewSet):
     serializer_class = RFQSerializer
     # 🔒 SECURE: Only Org can create, Vendors can only read
     permission_classes = [IsOrganizationOrReadOnly] 
-    parser_classes = [MultiPartParser, FormParser] # Allows file uploads
+    parser_classes = [MultiPartParser, FormParser, JSONParser] # Allows file uploads (and JSON for the bulk award map)
+    pagination_class = RFQCursorPagination
+    TREE_PREFETCH = ('shipments', 'shipments__bids', 'shipments__bids__vendor')
+
+    def is_slim_list(self):
+        # The list route returns compact rows unless the caller explicitly asks for the nested tree (?expand=shipments)
+        return self.action == 'list' and self.request.query_params.get('expand') != 'shipments'
+
+    def get_serializer_class(self):
+        if self.is_slim_list():
+            return RFQListSerializer
+        return RFQSerializer
 
     def get_queryset(self):
         user = self.request.user
-        
-        # 🚀 THE FIX: Fetch everything in one single, fast database query
-        optimized_queryset = RFQ.objects.select_related('created_by').prefetch_related(
-            'shipments',
-            'shipments__bids',
-            'shipments__bids__vendor'
-        ).order_by('-created_at')
+
+        if self.is_slim_list():
+            # One row per RFQ: lane/bid figures come from the denormalized roll-ups (summaries.py),
+            # only the caller's own bid count is looked up, through the Bid(vendor, ...) indexes
+            my_bids = Bid.objects.filter(shipment__rfq=OuterRef('pk'), vendor=user).order_by().values('vendor')
+            optimized_queryset = RFQ.objects.select_related('created_by').annotate(
+                my_bid_count=Coalesce(Subquery(my_bids.annotate(total=Count('id')).values('total')[:1]), Value(0)),
+            ).order_by('-created_at')
+        elif self.action in ['retrieve', 'import_lanes', 'award', 'contracts', 'download', 'upload_slot', 'attach_upload']:
+            # Plain row only: retrieve() loads the lane/bid tree itself, and only on a cache miss
+            optimized_queryset = RFQ.objects.select_related('created_by')
+        else:
+            # 🚀 THE FIX: Fetch everything in one single, fast database query
+            optimized_queryset = RFQ.objects.select_related('created_by').prefetch_related(
+                *self.TREE_PREFETCH
+            ).order_by('-created_at')
 
         if user.role == 'VENDOR':
             # Vendors see OPEN RFQs
@@ -34,13 +71,194 @@ class RFQViewSet(viewsets.ModelViewSet):
         # Org sees ONLY their own
         return optimized_queryset.filter(created_by=user)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detail tree served from a versioned cache.
+        A matching If-None-Match is answered with 304 after reading just the RFQ row.
+        """
+        rfq = self.get_object()
+        cache_key, etag = detail_cache_key(rfq, request.user)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = get_cached_detail(cache_key)
+        if data is None:
+            prefetch_related_objects([rfq], *self.TREE_PREFETCH)
+            data = self.get_serializer(rfq).data
+            set_cached_detail(cache_key, data)
+        return Response(data, headers=headers)
+
     def perform_create(self, serializer):
         # Automatically assign the creator
         serializer.save(created_by=self.request.user)
-        
-        
+
+    @action(detail=True, methods=['post'])
+    def award(self, request, pk=None):
+        """
+        Award a whole RFQ in one transaction and close it.
+        Body: {"awards": {"<lane id>": <bid id>, ...}} or {"strategy": "lowest"} (lowest bid on every lane).
+        """
+        rfq = self.get_object()
+        if rfq.created_by_id != request.user.id:
+            return Response({"error": "Not authorized to award this RFQ."}, status=403)
+
+        strategy = request.data.get('strategy')
+        awards = request.data.get('awards')
+        if strategy != 'lowest' and not isinstance(awards, dict):
+            return Response({"error": "Provide an 'awards' lane→bid map or strategy 'lowest'."}, status=400)
+
+        with transaction.atomic():
+            # Lock the RFQ, then its lanes. BidViewSet.award takes the same locks in the same order,
+            # so single-bid awards on this RFQ wait for us (and vice versa) instead of deadlocking.
+            locked = RFQ.objects.select_for_update().get(pk=rfq.pk)
+            if locked.status in AWARD_REFUSED_STATUSES:
+                return Response({"error": f"A {locked.get_status_display().lower()} RFQ cannot be awarded."}, status=400)
+            lane_ids = set(Shipment.objects.select_for_update().filter(rfq=rfq).values_list('pk', flat=True))
+
+            if strategy == 'lowest':
+                winners = {}
+                ranked = Bid.objects.filter(shipment__rfq=rfq).order_by('shipment_id', 'amount', 'created_at', 'id')
+                for bid_id, lane_id in ranked.values_list('pk', 'shipment_id'):
+                    winners.setdefault(lane_id, bid_id)
+            else:
+                try:
+                    requested = {int(lane): int(bid) for lane, bid in awards.items()}
+                except (TypeError, ValueError):
+                    return Response({"error": "awards must map lane ids to bid ids."}, status=400)
+                found = dict(
+                    Bid.objects.filter(pk__in=requested.values(), shipment_id__in=lane_ids).values_list('pk', 'shipment_id')
+                )
+                invalid = [lane for lane, bid in requested.items() if found.get(bid) != lane]
+                if invalid:
+                    return Response({"error": "Some bids do not belong to their lane on this RFQ.", "lanes": invalid}, status=400)
+                winners = requested
+
+            if not winners:
+                return Response({"error": "There are no bids to award on this RFQ."}, status=400)
+
+            winner_ids = list(winners.values())
+            now = timezone.now()
+            # Bulk updates skip the signals: refresh the dashboards and rollups of everyone whose award count changes.
+            # Loaded before the update so the rollups also revisit the days of the awards being replaced.
+            affected = list(Bid.objects.filter(
+                Q(pk__in=winner_ids) | Q(shipment_id__in=list(winners), is_winner=True)
+            ).only('vendor', 'shipment', 'created_at', 'awarded_at'))
+            invalidate_dashboards(rfq.created_by_id, *[bid.vendor_id for bid in affected])
+            # Set-based: clear old winners on the affected lanes first so the one-winner constraint always holds
+            Bid.objects.filter(shipment_id__in=list(winners), is_winner=True).exclude(pk__in=winner_ids).update(
+                is_winner=False, awarded_at=None
+            )
+            # A bid that already won keeps its award date, as in Bid.save()
+            Bid.objects.filter(pk__in=winner_ids).update(is_winner=True, awarded_at=Coalesce('awarded_at', Value(now)))
+            RFQ.objects.filter(pk=rfq.pk).update(
+                status=RFQ.Status.CLOSED, closed_at=locked.closed_at or now, version=F('version') + 1
+            )
+            rollups.refresh_bids([*affected, *Bid.objects.filter(pk__in=[bid.pk for bid in affected])])
+            rollups.refresh_rfqs(RFQ.objects.filter(pk=rfq.pk))
+
+            enqueue_contracts(winner_ids)
+
+        return Response({
+            "message": f"Awarded {len(winner_ids)} lanes. Contracts are generating in the background.",
+            "awards": {str(lane): bid for lane, bid in winners.items()},
+        })
+
+    @action(detail=True, methods=['post'])
+    def import_lanes(self, request, pk=None):
+        """
+        Bulk-create lanes from an uploaded CSV/XLSX sheet (multipart field "file").
+        Columns: origin_port, destination_port and optionally title, container_type, volume, target_price.
+        """
+        rfq = self.get_object()
+        if rfq.created_by != request.user and request.user.role != 'ADMIN':
+            return Response({"error": "Not authorized to add lanes to this RFQ."}, status=403)
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "file is required."}, status=400)
+
+        try:
+            report = import_lanes(rfq, upload)
+        except ValueError as e:
+            # Unsupported extension or a sheet csv/openpyxl cannot parse
+            return Response({"error": str(e)}, status=400)
+
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['get'])
+    def contracts(self, request, pk=None):
+        """
+        Every awarded lane's contract in one download, streamed as it is built.
+        ?pack=zip (default) returns one PDF per lane in a ZIP, ?pack=pdf a single merged PDF with a bookmark per lane.
+        The merged PDF is built in memory, so RFQs with more than CONTRACT_PACK_PDF_MAX_LANES awards get the ZIP instead.
+        Only stored contracts are packed: while any lane's PDF is missing or out of date its render is queued
+        and the answer is 202 with a Retry-After, so the client polls instead of waiting on a render.
+        """
+        rfq = self.get_object()
+        if rfq.created_by_id != request.user.id and request.user.role != 'ADMIN':
+            return Response({"error": "Not authorized to download contracts for this RFQ."}, status=403)
+
+        pack = request.query_params.get('pack', 'zip')
+        if pack not in ('zip', 'pdf'):
+            return Response({"error": "pack must be 'zip' or 'pdf'."}, status=400)
+        awarded = winning_bids(rfq).count()
+        if not awarded:
+            return Response({"error": "No lanes have been awarded on this RFQ yet."}, status=404)
+        if pack == 'pdf' and awarded > settings.CONTRACT_PACK_PDF_MAX_LANES:
+            pack = 'zip'
+
+        missing = missing_contracts(rfq)
+        if missing:
+            enqueue_contracts(missing)
+            response = Response({
+                "message": "Some contracts are still generating. Try again shortly.",
+                "pending": len(missing),
+            }, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = str(settings.CONTRACT_JOB_RETRY_BASE_SECONDS)
+            return response
+
+        if pack == 'zip':
+            chunks, content_type = stream_zip(rfq), 'application/zip'
+        else:
+            chunks, content_type = stream_merged_pdf(rfq), 'application/pdf'
+        response = streaming_response(request, chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="FreightOS_Contracts_RFQ{rfq.id}.{pack}"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Short-lived link to the RFQ's spec sheet for anyone who can see the RFQ (see downloads.py)."""
+        rfq = self.get_object()
+        if not rfq.file:
+            return Response({"error": "This RFQ has no attached document."}, status=404)
+        return Response(download_payload(request, rfq.file))
+
+    @action(detail=True, methods=['post'])
+    def upload_slot(self, request, pk=None):
+        """
+        Step 1 of a direct upload of the RFQ spec sheet. Body: {"filename", "content_type", "size"}.
+        Returns a URL to PUT the file to (straight to storage) and an `upload` token for attach_upload.
+        """
+        rfq = self.get_object()
+        if rfq.created_by_id != request.user.id and request.user.role != 'ADMIN':
+            return Response({"error": "Not authorized to upload files to this RFQ."}, status=403)
+        return Response(create_upload_slot(request, rfq, request.data), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def attach_upload(self, request, pk=None):
+        """Step 3: body {"upload": <token from upload_slot>} once the PUT has finished."""
+        rfq = self.get_object()
+        if rfq.created_by_id != request.user.id and request.user.role != 'ADMIN':
+            return Response({"error": "Not authorized to upload files to this RFQ."}, status=403)
+        attach_upload(request, rfq, request.data.get('upload'))
+        return Response(download_payload(request, rfq.file))
+
+
 class ShipmentViewSet(viewsets.ModelViewSet):
-    queryset = Shipment.objects.all()
+    # Bids (and their lane/RFQ/vendor) are preloaded so ShipmentSerializer can resolve my_bid/all_bids from memory
+    queryset = Shipment.objects.select_related('rfq').prefetch_related('bids__vendor')
     serializer_class = ShipmentSerializer
     # 🔒 SECURE: Only Org can add shipments
     permission_classes = [IsOrganizationOrReadOnly]
@@ -56,76 +274,138 @@ class BidViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # BidSerializer reads vendor, lane and RFQ for every row
+        queryset = Bid.objects.select_related('vendor', 'shipment__rfq')
         if user.role == 'VENDOR':
-            return Bid.objects.filter(vendor=user)
-        return Bid.objects.all()
+            return queryset.filter(vendor=user)
+        if user.role == 'ORG':
+            # Shippers only see bids placed on their own tenders
+            return queryset.filter(shipment__rfq__created_by=user)
+        return queryset.all()
 
     def perform_create(self, serializer):
         if self.request.user.role == 'ORG':
              raise permissions.exceptions.PermissionDenied("Organizations cannot place bids.")
-        serializer.save(vendor=self.request.user)
+        with transaction.atomic():
+            # Row lock on the RFQ: the bid either commits before the deadline close or is refused
+            lock_open_rfq(serializer.validated_data['shipment'].rfq_id)
+            serializer.save(vendor=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Quotes cannot be changed after the deadline either
+            lock_open_rfq(serializer.instance.shipment.rfq_id)
+            serializer.save()
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Quote many lanes of one RFQ in a single request:
+        {"rfq": <id>, "bids": [{"shipment": <id>, "amount": ..., "transit_time_days": ..., "valid_until": ...}, ...]}
+        """
+        serializer = BatchBidSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        rfq = serializer.validated_data['rfq']
+
+        bids = [
+            Bid(vendor=request.user, shipment_id=item.pop('shipment'), **item)
+            for item in serializer.validated_data['bids']
+        ]
+        with transaction.atomic():
+            lock_open_rfq(rfq.pk)
+            # bulk_create skips post_save: refresh summaries, rollups, the detail cache version and dashboards once for the whole batch
+            bids = Bid.objects.bulk_create(bids)
+            summaries.refresh_lanes(*[bid.shipment_id for bid in bids])
+            rollups.add_bids(bids, owner_id=rfq.created_by_id)
+            bump_rfq_version(pk=rfq.pk)
+            invalidate_dashboards(request.user.id, rfq.created_by_id)
+            transaction.on_commit(lambda: notify_bid_batch(rfq.pk, request.user, bids))
+
+        return Response(
+            {"created": len(bids), "bids": [{"id": bid.id, "shipment": bid.shipment_id} for bid in bids]},
+            status=status.HTTP_201_CREATED
+        )
 
     @action(detail=True, methods=['post'])
     def award(self, request, pk=None):
         bid = self.get_object()
         
         # Security: Make sure only the Org who created the RFQ can award it
-        if bid.shipment.rfq.created_by != request.user:
+        if bid.shipment.rfq.created_by_id != request.user.id:
             return Response({"error": "Not authorized to award this bid."}, status=403)
         
-        try:
-            # 1. Safely un-award any other bids for this specific shipment
-            from .models import Bid
-            Bid.objects.filter(shipment=bid.shipment).update(is_winner=False)
+        with transaction.atomic():
+            # RFQ first, then the lane: the order RFQViewSet.award locks in. Saving the winner bumps the
+            # RFQ version, so taking the lane first would deadlock against a concurrent whole-RFQ award.
+            # Concurrent awards on the lane (double-clicks, two tabs) run one after another.
+            locked = RFQ.objects.select_for_update().get(pk=bid.shipment.rfq_id)
+            if locked.status in AWARD_REFUSED_STATUSES:
+                return Response({"error": f"A {locked.get_status_display().lower()} RFQ cannot be awarded."}, status=400)
+            Shipment.objects.select_for_update().get(pk=bid.shipment_id)
+
+            # 1. Un-award any other bids for this specific shipment
+            previous = list(Bid.objects.filter(shipment_id=bid.shipment_id, is_winner=True).exclude(pk=bid.pk))
+            invalidate_dashboards(*[other.vendor_id for other in previous])
+            Bid.objects.filter(pk__in=[other.pk for other in previous]).update(is_winner=False, awarded_at=None)
+            rollups.refresh_bids(previous)
             
             # 2. Mark this specific bid as the winner
             bid.is_winner = True
-            bid.save()
-        except Exception as e:
-            print(f"Database Error during Award: {e}")
-            return Response({"error": "Failed to update database."}, status=500)
-        
-        # 3. 🚀 BACKGROUND PDF GENERATION
-        # 3. 🚀 BACKGROUND PDF GENERATION
-        def background_pdf_task(bid_id):
-            try:
-                from .models import Bid 
-                from .pdf_service import generate_contract_pdf
-                
-                thread_bid = Bid.objects.get(id=bid_id)
-                print(f"--- STARTING PDF GENERATION FOR BID {bid_id} ---")
-                
-                # 🚀 THE FIX: Delete any old "ghost" file strings from the database first
-                # This ensures we don't accidentally fetch a broken URL from earlier testing
-                if thread_bid.contract_file:
-                    thread_bid.contract_file.delete(save=False)
-                
-                # Generate the new PDF content into memory
-                pdf_content_file = generate_contract_pdf(thread_bid)
-                
-                if pdf_content_file:
-                    # Save the physical file using Django's storage system
-                    thread_bid.contract_file.save(
-                        pdf_content_file.name, 
-                        pdf_content_file, 
-                        save=True
-                    )
-                    print(f"✅ SUCCESS: PDF saved to {thread_bid.contract_file.name}")
-                else:
-                    print("❌ ERROR: pdf_service returned None. Check your HTML template!")
-                    
-            except Exception as e:
-                print(f"❌ THREAD CRASHED: {e}")
-
-        # Start the thread unconditionally to overwrite old broken data
-        pdf_thread = threading.Thread(target=background_pdf_task, args=(bid.id,))
-        pdf_thread.start()
+            bid.save(update_fields=['is_winner'])
+
+            # 3. 🚀 BACKGROUND PDF GENERATION: queued in the same transaction, rendered by run_contract_worker
+            enqueue_contracts([bid.id])
         
         return Response({"message": "Bid successfully awarded! Contract is generating in the background."})
 
+    @action(detail=True, methods=['get'])
+    def contract_status(self, request, pk=None):
+        """Progress of the bid's latest contract job, for polling after an award."""
+        bid = self.get_object()
+        if request.user.id not in (bid.vendor_id, bid.shipment.rfq.created_by_id) and request.user.role != 'ADMIN':
+            return Response({"error": "Not authorized."}, status=403)
+
+        job = bid.contract_jobs.order_by('-created_at').first()
+        return Response(ContractJobSerializer(job, context={'request': request, 'bid': bid}).data)
+
     # ----------------------------------------------------
     # COUNTER-OFFER LOGIC
     # ----------------------------------------------------
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Short-lived link to a bid file: ?file=contract (default, awarded bids only) or ?file=document (the vendor's upload).
+        Visible to the same people as the bid itself: its vendor, the RFQ owner and admins.
+        """
+        bid = self.get_object()
+        which = request.query_params.get('file', 'contract')
+        if which == 'contract':
+            field_file = bid.contract_file if bid.is_winner else None
+        elif which == 'document':
+            field_file = bid.file
+        else:
+            return Response({"error": "file must be 'contract' or 'document'."}, status=400)
+
+        if not field_file:
+            return Response({"error": "File not available."}, status=404)
+        return Response(download_payload(request, field_file))
+
+    @action(detail=True, methods=['post'])
+    def upload_slot(self, request, pk=None):
+        """Direct upload of the vendor's bid document, same flow as RFQViewSet.upload_slot."""
+        bid = self.get_object()
+        if bid.vendor_id != request.user.id:
+            return Response({"error": "Only the bidding vendor can attach documents."}, status=403)
+        return Response(create_upload_slot(request, bid, request.data), status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def attach_upload(self, request, pk=None):
+        bid = self.get_object()
+        if bid.vendor_id != request.user.id:
+            return Response({"error": "Only the bidding vendor can attach documents."}, status=403)
+        attach_upload(request, bid, request.data.get('upload'))
+        return Response(download_payload(request, bid.file))
+
     @action(detail=True, methods=['post'])
     def make_counter(self, request, pk=None):
         bid = self.get_object()
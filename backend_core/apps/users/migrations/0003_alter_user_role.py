@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_systemsettings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('ADMIN', 'Admin'), ('ORG', 'Organization (Shipper)'), ('VENDOR', 'Vendor (Freight Forwarder)')], db_index=True, default='ADMIN', max_length=10),
+        ),
+    ]
@@ -8,7 +8,7 @@ class User(AbstractUser):
         ORGANIZATION = "ORG", "Organization (Shipper)"
         VENDOR = "VENDOR", "Vendor (Freight Forwarder)"
 
-    role = models.CharField(max_length=10, choices=Roles.choices, default=Roles.ADMIN)
+    role = models.CharField(max_length=10, choices=Roles.choices, default=Roles.ADMIN, db_index=True)
     company_name = models.CharField(max_length=255, blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
 
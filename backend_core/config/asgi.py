@@ -10,13 +10,17 @@ django.setup()
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from apps.rfqs import routing # We will create this next
+from apps.chat import routing as chat_routing
+from apps.users.middleware import JWTAuthMiddleware
 
 # 3. Define the Router
 application = ProtocolTypeRouter({
     "http": get_asgi_application(), # Handle normal HTTP requests
     "websocket": AuthMiddlewareStack( # Handle WebSocket connections
-        URLRouter(
-            routing.websocket_urlpatterns
+        JWTAuthMiddleware( # ?token=<access JWT> wins over the session user
+            URLRouter(
+                routing.websocket_urlpatterns + chat_routing.websocket_urlpatterns
+            )
         )
     ),
 })
\ No newline at end of file
@@ -127,7 +127,9 @@ if os.environ.get('RENDER'):
     AWS_S3_REGION_NAME = 'ap-southeast-1' 
     AWS_S3_SIGNATURE_VERSION = 's3v4'
     AWS_S3_FILE_OVERWRITE = False
-    AWS_DEFAULT_ACL = 'public-read'
+    # Objects are private; downloads go through presigned URLs (apps/rfqs/downloads.py)
+    AWS_DEFAULT_ACL = 'private'
+    AWS_QUERYSTRING_AUTH = True
     AWS_S3_ADDRESSING_STYLE = 'path'
 else:
     # LOCAL DEVELOPMENT
@@ -142,6 +144,16 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Authenticated downloads (apps/rfqs/downloads.py): lifetime of presigned / signed links, in seconds
+FILE_DOWNLOAD_TTL = 60 * 5
+# Local storage only: let the web server send the bytes. 'nginx' (X-Accel-Redirect to an internal
+# location mapped onto MEDIA_ROOT) or 'sendfile' (Apache/Lighttpd X-Sendfile). Empty streams from Django.
+FILE_DOWNLOAD_OFFLOAD = os.environ.get('FILE_DOWNLOAD_OFFLOAD', '')
+FILE_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+# Direct uploads (apps/rfqs/uploads.py): presigned PUT lifetime and the largest accepted attachment
+UPLOAD_SLOT_TTL = 60 * 15
+UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Allow Django to find the 'apps' folder
@@ -279,7 +291,29 @@ UNFOLD = {
     ]
 }
 
+# Contract PDF job queue (apps/rfqs/jobs.py, `manage.py run_contract_worker`)
+CONTRACT_WORKER_CONCURRENCY = int(os.environ.get('CONTRACT_WORKER_CONCURRENCY', 2))
+CONTRACT_JOB_LEASE_SECONDS = 60 * 10
+CONTRACT_JOB_RETRY_BASE_SECONDS = 10
+# ?pack=pdf has to hold every contract's pages until the merged file is written; bigger packs are served as the streamed ZIP
+CONTRACT_PACK_PDF_MAX_LANES = int(os.environ.get('CONTRACT_PACK_PDF_MAX_LANES', 50))
+# Render processes run at lower CPU priority than the web workers sharing the host
+CONTRACT_RENDER_NICENESS = 10
+# 'html' renders templates/rfqs/contract.html with xhtml2pdf, 'reportlab' draws the same layout natively
+CONTRACT_PDF_ENGINE = os.environ.get('CONTRACT_PDF_ENGINE', 'html')
+# Bump whenever contract.html or the ReportLab layout changes: every stored contract is re-rendered on its next award
+CONTRACT_TEMPLATE_VERSION = 1
+
+# Versioned RFQ detail payloads (apps/rfqs/cache.py). Keys change on every write, so the timeout only bounds memory.
+RFQ_DETAIL_CACHE_TIMEOUT = 60 * 10
+
 if os.environ.get('REDIS_URL'):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get('REDIS_URL'),
+        }
+    }
     CHANNEL_LAYERS = {
         "default": {
             "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -293,4 +327,29 @@ else:
         "default": {
             "BACKEND": "channels.layers.InMemoryChannelLayer"
         }
-    }
\ No newline at end of file
+    }
+# Live bid events (apps/rfqs/broadcast.py): bids on the same RFQ within this many seconds go out as one bid_update
+BID_BROADCAST_WINDOW = float(os.environ.get('BID_BROADCAST_WINDOW', 0.25))
+
+# Chat history pages (GET /api/v1/chat/messages/bid/<id>/?since=&limit=)
+CHAT_PAGE_SIZE = 100
+CHAT_PAGE_MAX = 500
+
+# Resumable RFQ sockets (apps/rfqs/events.py): events kept per RFQ for replay after a reconnect
+RFQ_EVENT_LOG_SIZE = 200
+RFQ_EVENT_LOG_TTL = 60 * 60
+
+# RFQ deadline scheduler (manage.py run_deadline_scheduler): full reload of its queue, in case a notice was lost
+RFQ_DEADLINE_RESYNC_SECONDS = 60 * 10
+# ...and how often it reloads instead when the channel layer is in-memory (no REDIS_URL): deadline
+# notices from the web processes can't reach it then, so the reload is the only way it sees changes
+RFQ_DEADLINE_LOCAL_RESYNC_SECONDS = 15
+
+# Dashboard stats (apps/analytics/stats.py): fresh for DASHBOARD_CACHE_SECONDS, then served stale
+# for up to DASHBOARD_STALE_SECONDS while one background refresh recomputes them
+DASHBOARD_CACHE_SECONDS = 60
+DASHBOARD_STALE_SECONDS = 30
+
+# Admin dashboard KPIs (apps/analytics/kpis.py): page loads read the newest snapshot; one older than
+# this is refreshed in the background (or run `manage.py refresh_admin_kpis` from cron)
+ADMIN_KPI_REFRESH_SECONDS = int(os.environ.get('ADMIN_KPI_REFRESH_SECONDS', 60 * 5))
@@ -0,0 +1,9 @@
+import api from './axios';
+
+// ws(s)://<API host>/<path>?token=<JWT>: browsers cannot send an Authorization header on a WebSocket.
+export const socketUrl = (path) => {
+    const base = new URL(api.defaults.baseURL, window.location.href);
+    const protocol = base.protocol === 'https:' ? 'wss:' : 'ws:';
+    const token = localStorage.getItem('token') || '';
+    return `${protocol}//${base.host}/${path}?token=${encodeURIComponent(token)}`;
+};
@@ -0,0 +1,15 @@
+import axios from 'axios';
+import api from './axios';
+
+// Direct upload: reserve a slot, PUT the file straight to storage, then attach it to the RFQ/bid.
+// resource is "rfqs" or "bids". The PUT goes through plain axios: the signed URL is the credential.
+export const uploadAttachment = async (resource, id, file) => {
+    const { data: slot } = await api.post(`/${resource}/${id}/upload_slot/`, {
+        filename: file.name,
+        content_type: file.type || 'application/octet-stream',
+        size: file.size,
+    });
+    await axios.put(slot.url, file, { headers: slot.headers });
+    const { data } = await api.post(`/${resource}/${id}/attach_upload/`, { upload: slot.upload });
+    return data;
+};
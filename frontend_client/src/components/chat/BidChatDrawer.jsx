@@ -1,24 +1,76 @@
 import React, { useState, useEffect, useRef } from 'react';
 import api from '../../api/axios';
+import { socketUrl } from '../../api/socket';
 import { X, Send, MessageSquare, User, Clock, Loader2 } from 'lucide-react';
 import { useAuth } from '../../context/AuthContext';
 
+const PAGE_SIZE = 100;
+
 const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
     const { user } = useAuth();
     const [messages, setMessages] = useState([]);
     const [newMessage, setNewMessage] = useState("");
     const [loading, setLoading] = useState(true);
     const [sending, setSending] = useState(false);
+    const [typingName, setTypingName] = useState(null);
     const messagesEndRef = useRef(null);
+    const socketRef = useRef(null);
+    const typingTimer = useRef(null);
+    const lastTypingSent = useRef(0);
+    const lastId = useRef(0);
+
+    // Merge by id: reloads after a reconnect and socket pushes may overlap or arrive out of order
+    const mergeMessages = (incoming) => {
+        lastId.current = Math.max(lastId.current, ...incoming.map((m) => m.id));
+        setMessages((prev) => {
+            const known = new Set(prev.map((m) => m.id));
+            return [...prev, ...incoming.filter((m) => !known.has(m.id))].sort((a, b) => a.id - b.id);
+        });
+    };
 
-    // Fetch messages when the drawer opens or bidId changes
+    // Load the thread once the socket is up (so nothing slips between the two), then let it push
+    // new messages, typing indicators and read receipts. A dropped socket reconnects and reloads.
     useEffect(() => {
-        if (isOpen && bidId) {
-            fetchMessages();
-            // Optional: Auto-refresh messages every 10 seconds
-            const interval = setInterval(fetchMessages, 10000);
-            return () => clearInterval(interval);
-        }
+        if (!isOpen || !bidId) return;
+        setMessages([]);
+        setLoading(true);
+        lastId.current = 0;
+        let closed = false;
+        let retry = null;
+
+        const connect = () => {
+            const socket = new WebSocket(socketUrl(`ws/chat/bid/${bidId}/`));
+            socketRef.current = socket;
+            socket.onopen = fetchMessages;
+            socket.onmessage = (e) => {
+                const event = JSON.parse(e.data);
+                if (event.type === 'message') {
+                    mergeMessages([event.data]);
+                    if (event.data.is_mine) return;
+                    setTypingName(null);
+                    socket.send(JSON.stringify({ type: 'read', up_to: event.data.id }));
+                } else if (event.type === 'typing') {
+                    setTypingName(event.name);
+                    clearTimeout(typingTimer.current);
+                    typingTimer.current = setTimeout(() => setTypingName(null), 3000);
+                } else if (event.type === 'read') {
+                    setMessages((prev) => prev.map((m) => (m.is_mine && m.id <= event.up_to ? { ...m, is_read: true } : m)));
+                }
+            };
+            socket.onclose = () => {
+                setLoading(false);
+                if (!closed) retry = setTimeout(connect, 3000);
+            };
+        };
+        connect();
+
+        return () => {
+            closed = true;
+            clearTimeout(retry);
+            clearTimeout(typingTimer.current);
+            socketRef.current?.close();
+            socketRef.current = null;
+        };
     }, [isOpen, bidId]);
 
     // Auto-scroll to the bottom of the chat
@@ -26,10 +78,28 @@ const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
     }, [messages]);
 
+    // Only what we have not seen yet: pages after the last known id
     const fetchMessages = async () => {
         try {
-            const response = await api.get(`/chat/messages/bid/${bidId}/`);
-            setMessages(response.data);
+            // Own cursor: socket pushes arriving meanwhile move lastId past rows we still need
+            let since = lastId.current;
+            let page = [];
+            let latestIncoming = null;
+            do {
+                const response = await api.get(`/chat/messages/bid/${bidId}/`, {
+                    params: { since: since || undefined, limit: PAGE_SIZE },
+                });
+                page = response.data;
+                if (page.length) {
+                    since = page[page.length - 1].id;
+                    mergeMessages(page);
+                }
+                latestIncoming = [...page].reverse().find((m) => !m.is_mine && !m.is_read) || latestIncoming;
+            } while (page.length === PAGE_SIZE);
+
+            if (latestIncoming && socketRef.current?.readyState === WebSocket.OPEN) {
+                socketRef.current.send(JSON.stringify({ type: 'read', up_to: latestIncoming.id }));
+            }
         } catch (error) {
             console.error("Error fetching messages:", error);
         } finally {
@@ -47,8 +117,7 @@ const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
                 bid: bidId,
                 message: newMessage
             });
-            setNewMessage("");
-            fetchMessages(); // Instantly refresh chat
+            setNewMessage(""); // The socket delivers the saved message to both sides
         } catch (error) {
             console.error("Error sending message:", error);
             alert("Failed to send message.");
@@ -57,6 +126,15 @@ const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
         }
     };
 
+    const handleTyping = (value) => {
+        setNewMessage(value);
+        const now = Date.now();
+        if (socketRef.current?.readyState === WebSocket.OPEN && now - lastTypingSent.current > 1500) {
+            lastTypingSent.current = now;
+            socketRef.current.send(JSON.stringify({ type: 'typing' }));
+        }
+    };
+
     return (
         <>
             {/* Darkened Backdrop */}
@@ -119,10 +197,16 @@ const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
                                     }`}>
                                         {msg.message}
                                     </div>
+                                    {isMine && msg.is_read && (
+                                        <span className="text-[10px] text-gray-400 font-bold mt-1">Seen</span>
+                                    )}
                                 </div>
                             );
                         })
                     )}
+                    {typingName && (
+                        <p className="text-xs text-gray-400 font-bold italic">{typingName} is typing…</p>
+                    )}
                     <div ref={messagesEndRef} />
                 </div>
 
@@ -134,7 +218,7 @@ const BidChatDrawer = ({ isOpen, onClose, bidId, chatTitle }) => {
                             placeholder="Type your message..."
                             className="flex-1 bg-gray-50 border border-gray-200 rounded-xl px-4 py-3 text-sm focus:outline-none focus:ring-2 focus:ring-[#EF7D00] focus:bg-white transition-all font-medium"
                             value={newMessage}
-                            onChange={(e) => setNewMessage(e.target.value)}
+                            onChange={(e) => handleTyping(e.target.value)}
                         />
                         <button 
                             type="submit" 
@@ -71,118 +71,52 @@ const Dashboard = () => {
     const fetchDashboardData = async () => {
       try {
         // Fetch stats and RFQs simultaneously
+        // Both roles only need the compact list rows: shippers get their charts pre-aggregated over
+        // every lane from /analytics/stats/ (stats.lanes), instead of walking a capped nested RFQ list
+        const isVendor = user?.role === "VENDOR";
         const [statsRes, rfqRes] = await Promise.all([
           api.get("/analytics/stats/").catch(() => ({ data: {} })),
-          api.get("/rfqs/"),
+          api.get(isVendor ? "/rfqs/" : "/rfqs/?page_size=5"),
         ]);
 
         setStats(statsRes.data);
-        const rfqData = rfqRes.data || [];
+        const rfqData = rfqRes.data?.results || [];
 
-        if (user?.role === "VENDOR") {
+        if (isVendor) {
           setOpenMarket(rfqData);
 
           let activeCount = 0;
           rfqData.forEach((rfq) => {
-            rfq.shipments?.forEach((shipment) => {
-              if (shipment.my_bid) activeCount++;
-            });
+            activeCount += rfq.my_bid_count || 0;
           });
           setVendorActiveBids(activeCount);
         } else {
-          setMyRfqs(rfqData.slice(0, 5));
-
-          let targetTotal = 0;
-          let lowestTotal = 0;
-          let vendorMap = {};
-          let categoryMap = {};
-
-          // 1. Pre-fill a 7-day week so the chart ALWAYS has 7 points to draw curves
-          const daysOfWeek = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
-          let timeMap = {};
-          daysOfWeek.forEach((day) => {
-            timeMap[day] = { spend: 0, savings: 0, bids: 0, volume: 0 };
-          });
-
-          rfqData.forEach((rfq) => {
-            // 2. Group by Day of the Week instead of Month
-            const date = new Date(rfq.created_at || Date.now());
-            const dayName = date.toLocaleString("en-US", { weekday: "short" });
-
-            rfq.shipments?.forEach((ship) => {
-              const target = parseFloat(ship.target_price) || 0;
-              let lowestBid = target;
-              const hasBids = ship.all_bids && ship.all_bids.length > 0;
-
-              const vol = ship.volume || 1;
-
-              // Make sure the day exists in our map before adding
-              if (timeMap[dayName]) {
-                timeMap[dayName].volume += vol;
-              }
-
-              const cType = ship.container_type || "Standard";
-              categoryMap[cType] = (categoryMap[cType] || 0) + vol;
-
-              if (hasBids) {
-                if (timeMap[dayName])
-                  timeMap[dayName].bids += ship.all_bids.length;
-                let currentLowest = Infinity;
-
-                ship.all_bids.forEach((bid) => {
-                  const amt = parseFloat(bid.amount);
-                  if (amt < currentLowest) currentLowest = amt;
-
-                  const vName =
-                    bid.vendor_company || bid.vendor_name || "Unknown";
-                  if (!vendorMap[vName])
-                    vendorMap[vName] = { name: vName, submitted: 0, won: 0 };
-                  vendorMap[vName].submitted += 1;
-                  if (bid.is_winner) vendorMap[vName].won += 1;
-                });
-
-                if (currentLowest !== Infinity) lowestBid = currentLowest;
-              }
-
-              if (target > 0 && hasBids) {
-                targetTotal += target;
-                lowestTotal += lowestBid;
-                if (timeMap[dayName]) {
-                  timeMap[dayName].spend += lowestBid;
-                  timeMap[dayName].savings +=
-                    target > lowestBid ? target - lowestBid : 0;
-                }
-              }
-            });
-          });
-
-          const savingsPct =
-            targetTotal > 0
-              ? (((targetTotal - lowestTotal) / targetTotal) * 100).toFixed(1)
-              : 0;
-          setCalculatedSavings(savingsPct);
-
-          // 3. Map the days chronologically based on our pre-filled array
-          const dynamicTrend = daysOfWeek.map((day) => ({
-            name: day,
-            spend: timeMap[day].spend,
-            savings: timeMap[day].savings,
-            bids: timeMap[day].bids,
+          setMyRfqs(rfqData);
+
+          const activity = statsRes.data?.chart_data || [];
+          const lanes = statsRes.data?.lanes || {};
+          const laneBuckets = lanes.chart_data || [];
+          setCalculatedSavings(lanes.savings_pct || 0);
+
+          // Both series share the same buckets (same range/granularity), oldest first
+          const dynamicTrend = activity.map((point, i) => ({
+            name: point.name,
+            spend: point.spend,
+            savings: laneBuckets[i]?.savings || 0,
+            bids: point.bids,
           }));
 
-          const dynamicVol = daysOfWeek.map((day) => ({
-            month: day, // Keeping the key as 'month' to prevent breaking your other chart
-            volume: timeMap[day].volume,
-            capacity: Math.floor(timeMap[day].volume * 1.3),
-          }));
+          const dynamicVol = activity.map((point, i) => {
+            const volume = laneBuckets[i]?.volume || 0;
+            return {
+              month: point.name, // Keeping the key as 'month' to prevent breaking your other chart
+              volume,
+              capacity: Math.floor(volume * 1.3),
+            };
+          });
 
-          const dynamicVendors = Object.values(vendorMap)
-            .sort((a, b) => b.submitted - a.submitted)
-            .slice(0, 5);
-          const dynamicCategories = Object.keys(categoryMap).map((k) => ({
-            name: k,
-            value: categoryMap[k],
-          }));
+          const dynamicVendors = lanes.top_vendors || [];
+          const dynamicCategories = lanes.containers || [];
 
           setChartData({
             trend: dynamicTrend,
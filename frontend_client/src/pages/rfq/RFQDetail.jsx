@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { uploadAttachment } from "../../api/uploads";
 import { useAuth } from "../../context/AuthContext";
 import Navbar from "../../components/Navbar";
 import {
@@ -87,12 +88,28 @@ const RFQDetail = () => {
   // --- CHAT STATES ---
   const [activeChatBid, setActiveChatBid] = useState(null);
   const [isChatOpen, setIsChatOpen] = useState(false);
+  const [unreadChats, setUnreadChats] = useState({});
 
   const openChat = (bid) => {
     setActiveChatBid(bid);
     setIsChatOpen(true);
   };
 
+  const closeChat = () => {
+    setIsChatOpen(false);
+    fetchUnreadChats();
+  };
+
+  // Unread message counts for all of the user's bids, one request for every badge on the page
+  const fetchUnreadChats = async () => {
+    try {
+      const response = await api.get("/chat/messages/unread/");
+      setUnreadChats(response.data.bids);
+    } catch (error) {
+      console.error("Error loading unread messages", error);
+    }
+  };
+
   const fetchRFQDetails = async () => {
     try {
       const response = await api.get(`/rfqs/${id}/`);
@@ -107,12 +124,21 @@ const RFQDetail = () => {
 
   useEffect(() => {
     fetchRFQDetails();
+    fetchUnreadChats();
   }, [id]);
 
-  const getFileUrl = (path) => {
-    if (!path) return "#";
-    if (path.startsWith("http")) return path;
-    return `${import.meta.env.VITE_API_URL?.replace("/api/v1", "") || "http://127.0.0.1:8000"}${path}`;
+  // Files are private: ask the API for a short-lived link (presigned on S3), then open it
+  const openDownload = async (endpoint) => {
+    try {
+      const response = await api.get(endpoint);
+      const link = document.createElement("a");
+      link.href = response.data.url;
+      link.target = "_blank";
+      link.rel = "noopener noreferrer";
+      link.click();
+    } catch (error) {
+      toast.error(error.response?.data?.error || "This file is not available.");
+    }
   };
 
   const handleAddShipment = async (e) => {
@@ -135,6 +161,60 @@ const RFQDetail = () => {
     }
   };
 
+  // Bulk lane import: one multipart upload instead of one POST per lane
+  const handleImportLanes = async (e) => {
+    const file = e.target.files?.[0];
+    e.target.value = "";
+    if (!file) return;
+    const loadingToast = toast.loading("Importing lanes...");
+    try {
+      const formData = new FormData();
+      formData.append("file", file);
+      const response = await api.post(`/rfqs/${id}/import_lanes/`, formData, {
+        headers: { "Content-Type": "multipart/form-data" },
+      });
+      const { created, failed } = response.data;
+      fetchRFQDetails();
+      toast.success(
+        failed
+          ? `Imported ${created} lanes, ${failed} rows skipped.`
+          : `Imported ${created} lanes.`,
+        { id: loadingToast },
+      );
+    } catch (error) {
+      const firstError = error.response?.data?.errors?.[0];
+      toast.error(
+        error.response?.data?.error ||
+          (firstError ? `Row ${firstError.row}: ${JSON.stringify(firstError.errors)}` : "Failed to import lanes."),
+        { id: loadingToast },
+      );
+    }
+  };
+
+  const handleDownloadContracts = async () => {
+    const loadingToast = toast.loading("Preparing contract pack...");
+    try {
+      const response = await api.get(`/rfqs/${id}/contracts/`, {
+        params: { pack: "zip" },
+        responseType: "blob",
+      });
+      if (response.status === 202) {
+        // Some contracts are still being rendered by the worker; they were queued just now
+        toast("Contracts are still generating. Try again in a few seconds.", { id: loadingToast });
+        return;
+      }
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = `FreightOS_Contracts_RFQ${id}.zip`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+      toast.success("Contract pack downloaded.", { id: loadingToast });
+    } catch (error) {
+      toast.error("Failed to download the contract pack.", { id: loadingToast });
+    }
+  };
+
   const executeAwardBid = async () => {
     if (!awardConfirmModal.bidId || isAwarding) return;
     setIsAwarding(true);
@@ -146,15 +226,27 @@ const RFQDetail = () => {
       // 1. Send the award request
       await api.post(`/bids/${awardConfirmModal.bidId}/award/`);
 
-      // 2. 🚀 THE FIX: Wait 3.5 seconds to give the backend thread time to generate the PDF!
-      await new Promise((resolve) => setTimeout(resolve, 3500));
+      // 2. 🚀 Poll the contract job until the worker has rendered the PDF (or given up)
+      let job = null;
+      for (let i = 0; i < 40; i++) {
+        const response = await api.get(`/bids/${awardConfirmModal.bidId}/contract_status/`);
+        job = response.data;
+        if (job.status === "DONE" || job.status === "FAILED") break;
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+      }
 
       // 3. Now fetch the updated data, which will contain the correct PDF file name
       await fetchRFQDetails();
 
-      toast.success("Contract awarded & PDF generated successfully!", {
-        id: loadingToast,
-      });
+      if (job?.status === "DONE") {
+        toast.success("Contract awarded & PDF generated successfully!", {
+          id: loadingToast,
+        });
+      } else {
+        toast.success("Bid awarded! The contract PDF is still being generated.", {
+          id: loadingToast,
+        });
+      }
       setAwardConfirmModal({ isOpen: false, bidId: null });
     } catch (error) {
       console.error(error);
@@ -211,17 +303,15 @@ const RFQDetail = () => {
     setSubmittingBid(true);
     const loadingToast = toast.loading("Submitting quote...");
     try {
-      const submitData = new FormData();
-      submitData.append("shipment", biddingShipment.id);
-      submitData.append("amount", bidForm.amount);
-      submitData.append("transit_time_days", bidForm.transit_time_days);
-      submitData.append("free_days_demurrage", bidForm.free_days_demurrage);
-      submitData.append("valid_until", bidForm.valid_until);
-      if (bidFile) submitData.append("file", bidFile);
-
-      await api.post("/bids/", submitData, {
-        headers: { "Content-Type": "multipart/form-data" },
+      const response = await api.post("/bids/", {
+        shipment: biddingShipment.id,
+        amount: bidForm.amount,
+        transit_time_days: bidForm.transit_time_days,
+        free_days_demurrage: bidForm.free_days_demurrage,
+        valid_until: bidForm.valid_until,
       });
+      // Quote documents go straight to storage, then get attached to the new bid
+      if (bidFile) await uploadAttachment("bids", response.data.id, bidFile);
 
       setBiddingShipment(null);
       setBidForm({
@@ -347,10 +437,8 @@ const RFQDetail = () => {
             </div>
 
             {rfq.file && (
-              <a
-                href={getFileUrl(rfq.file)}
-                target="_blank"
-                rel="noopener noreferrer"
+              <button
+                onClick={() => openDownload(`/rfqs/${id}/download/`)}
                 className="flex flex-col items-center justify-center p-5 bg-white border-2 border-orange-100 rounded-2xl hover:bg-orange-50 hover:border-orange-400 hover:shadow-md hover:shadow-orange-100 transition-all group w-full md:w-56 text-center"
               >
                 <FileText className="h-10 w-10 text-orange-400 mb-3 group-hover:scale-110 group-hover:-translate-y-1 transition-transform" />
@@ -360,8 +448,24 @@ const RFQDetail = () => {
                 <span className="text-xs text-orange-500 mt-1 font-medium">
                   PDF / Excel Document
                 </span>
-              </a>
+              </button>
             )}
+
+            {!isVendor &&
+              rfq.shipments?.some((ship) => ship.all_bids?.some((bid) => bid.is_winner)) && (
+                <button
+                  onClick={handleDownloadContracts}
+                  className="flex flex-col items-center justify-center p-5 bg-white border-2 border-orange-100 rounded-2xl hover:bg-orange-50 hover:border-orange-400 hover:shadow-md hover:shadow-orange-100 transition-all group w-full md:w-56 text-center"
+                >
+                  <Download className="h-10 w-10 text-orange-400 mb-3 group-hover:scale-110 group-hover:-translate-y-1 transition-transform" />
+                  <span className="text-sm font-black text-stone-800">
+                    Download All Contracts
+                  </span>
+                  <span className="text-xs text-orange-500 mt-1 font-medium">
+                    ZIP of every awarded lane
+                  </span>
+                </button>
+              )}
           </div>
         </div>
 
@@ -500,14 +604,14 @@ const RFQDetail = () => {
                               {/* VENDOR: PDF DOWNLOAD */}
                               {ship.my_bid.is_winner &&
                                 ship.my_bid.contract_file && (
-                                  <a
-                                    href={getFileUrl(ship.my_bid.contract_file)}
-                                    target="_blank"
-                                    rel="noopener noreferrer"
+                                  <button
+                                    onClick={() =>
+                                      openDownload(`/bids/${ship.my_bid.id}/download/`)
+                                    }
                                     className="bg-green-100 text-green-800 border border-green-200 px-4 py-2.5 rounded-xl font-black text-sm flex items-center gap-2 hover:bg-green-200 transition shadow-sm"
                                   >
                                     <Download className="h-4 w-4" /> Contract
-                                  </a>
+                                  </button>
                                 )}
 
                               <button
@@ -515,6 +619,11 @@ const RFQDetail = () => {
                                 className="flex-1 sm:flex-none flex items-center justify-center gap-2 bg-slate-100 hover:bg-slate-200 text-slate-800 px-4 py-2.5 rounded-xl font-bold transition border border-slate-200 shadow-sm text-sm"
                               >
                                 <MessageSquare className="h-4 w-4" /> Message
+                                {unreadChats[ship.my_bid.id] > 0 && (
+                                  <span className="bg-[#EF7D00] text-white text-[10px] font-black rounded-full px-1.5 py-0.5">
+                                    {unreadChats[ship.my_bid.id]}
+                                  </span>
+                                )}
                               </button>
 
                               {ship.my_bid.is_winner ? (
@@ -897,6 +1006,11 @@ const RFQDetail = () => {
                                             <span className="hidden sm:inline">
                                               Chat
                                             </span>
+                                            {unreadChats[bid.id] > 0 && (
+                                              <span className="bg-[#EF7D00] text-white text-[10px] font-black rounded-full px-1.5 py-0.5">
+                                                {unreadChats[bid.id]}
+                                              </span>
+                                            )}
                                           </button>
 
                                           {!bid.is_winner &&
@@ -923,17 +1037,17 @@ const RFQDetail = () => {
 
                                           {bid.is_winner &&
                                             bid.contract_file && (
-                                              <a
-                                                href={getFileUrl(
-                                                  bid.contract_file,
-                                                )}
-                                                target="_blank"
-                                                rel="noopener noreferrer"
+                                              <button
+                                                onClick={() =>
+                                                  openDownload(
+                                                    `/bids/${bid.id}/download/`,
+                                                  )
+                                                }
                                                 className="flex-1 sm:flex-none h-12 bg-green-100 text-green-800 border border-green-200 text-xs font-black uppercase px-4 rounded-xl flex items-center justify-center gap-2 hover:bg-green-200 transition"
                                               >
                                                 <Download className="h-4 w-4" />{" "}
                                                 Contract
-                                              </a>
+                                              </button>
                                             )}
 
                                           {!bid.is_winner &&
@@ -1092,6 +1206,21 @@ const RFQDetail = () => {
                 </button>
               </div>
             </form>
+
+            <div className="mt-6 pt-6 border-t border-slate-100 flex flex-col sm:flex-row sm:items-center justify-between gap-3">
+              <p className="text-xs font-medium text-slate-500">
+                Bulk upload a lane sheet (.csv / .xlsx) with columns origin_port, destination_port, volume, target_price, title.
+              </p>
+              <label className="cursor-pointer inline-flex items-center justify-center gap-2 border-2 border-slate-200 hover:border-orange-500 text-slate-700 px-5 py-2.5 rounded-xl text-sm font-bold transition">
+                <FileText className="h-4 w-4" /> Import Lanes
+                <input
+                  type="file"
+                  accept=".csv,.xlsx"
+                  className="hidden"
+                  onChange={handleImportLanes}
+                />
+              </label>
+            </div>
           </div>
         )}
       </div>
@@ -1308,7 +1437,7 @@ const RFQDetail = () => {
       {/* --- IN-APP CHAT DRAWER --- */}
       <BidChatDrawer
         isOpen={isChatOpen}
-        onClose={() => setIsChatOpen(false)}
+        onClose={closeChat}
         bidId={activeChatBid?.id}
         chatTitle={
           activeChatBid
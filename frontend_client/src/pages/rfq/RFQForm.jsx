@@ -1,5 +1,6 @@
 import { useState } from "react";
 import api from "../../api/axios";
+import { uploadAttachment } from "../../api/uploads";
 import { useNavigate } from "react-router-dom";
 import Navbar from "../../components/Navbar";
 import {
@@ -25,19 +26,10 @@ const RFQForm = () => {
     e.preventDefault();
     setLoading(true);
     try {
-      const submitData = new FormData();
-      submitData.append("title", formData.title);
-      submitData.append("description", formData.description);
-      submitData.append("deadline", formData.deadline);
-      submitData.append("visible_target_price", formData.visible_target_price);
-      submitData.append("visible_bids", formData.visible_bids);
-      submitData.append("status", "OPEN");
-
-      if (file) submitData.append("file", file);
-
-      await api.post("/rfqs/", submitData, {
-        headers: { "Content-Type": "multipart/form-data" },
-      });
+      const response = await api.post("/rfqs/", { ...formData, status: "OPEN" });
+
+      // The spec sheet goes straight to storage instead of through the API server
+      if (file) await uploadAttachment("rfqs", response.data.id, file);
 
       navigate("/rfq-list");
     } catch (error) {
@@ -7,6 +7,7 @@ import { useAuth } from "../../context/AuthContext";
 
 const RFQList = () => {
   const [rfqs, setRfqs] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
   const { user } = useAuth();
@@ -17,10 +18,12 @@ const RFQList = () => {
     fetchRFQs();
   }, []);
 
-  const fetchRFQs = async () => {
+  // The list endpoint is cursor-paginated: append each page and keep the "next" cursor URL
+  const fetchRFQs = async (url = "/rfqs/") => {
     try {
-      const response = await api.get("/rfqs/");
-      setRfqs(response.data);
+      const response = await api.get(url);
+      setRfqs((prev) => (url === "/rfqs/" ? response.data.results : [...prev, ...response.data.results]));
+      setNextPage(response.data.next);
     } catch (error) {
       console.error("Error fetching RFQs:", error);
     } finally {
@@ -131,6 +134,16 @@ const RFQList = () => {
                             ))}
                         </tbody>
                     </table>
+                    {nextPage && (
+                        <div className="px-6 py-4 border-t border-gray-100 text-center">
+                            <button
+                                onClick={() => fetchRFQs(nextPage)}
+                                className="text-[#EF7D00] font-bold text-sm hover:underline"
+                            >
+                                Load more tenders
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>